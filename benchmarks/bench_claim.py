@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# Multi-process claim stress benchmark
+#
+#   python benchmarks/bench_claim.py --jobs 2000 --workers 1,2,4,8,16
+#
+# Every worker process claims jobs until the queue is empty. The run fails
+# if any job id is claimed by more than one process.
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.models import Job
+from queuectl.storage import JobStorage
+
+
+def claimloop(db_path, worker_id, start_event, results):
+
+    storage = JobStorage(db_path)
+    claimed = []
+
+    start_event.wait()
+    while True:
+        job = storage.get_pending_job(f"bench:{worker_id}")
+        if job is None:
+            break
+        claimed.append(job.jid)
+
+    storage.close()
+    results.put(claimed)
+
+
+def run(jobs: int, workers: int) -> dict:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        storage = JobStorage(db_path)
+        for i in range(jobs):
+            storage.save_job(Job(jid=f"job-{i}", command="true"))
+        storage.close()
+
+        start_event = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=claimloop, args=(db_path, w, start_event, results))
+            for w in range(workers)
+        ]
+        for proc in procs:
+            proc.start()
+
+        started = time.perf_counter()
+        start_event.set()
+        claimed = []
+        for _ in procs:
+            claimed.extend(results.get())
+        elapsed = time.perf_counter() - started
+
+        for proc in procs:
+            proc.join()
+
+    counts = Counter(claimed)
+    return {
+        'workers': workers,
+        'claimed': len(claimed),
+        'unique': len(counts),
+        'double_claims': sum(1 for c in counts.values() if c > 1),
+        'claims_per_sec': len(claimed) / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=2000)
+    parser.add_argument('--workers', default='1,2,4,8,16')
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'workers':>8} {'claimed':>8} {'unique':>8} {'doubles':>8} {'claims/sec':>12}")
+    for workers in [int(w) for w in args.workers.split(',')]:
+        r = run(args.jobs, workers)
+        print(f"{r['workers']:>8} {r['claimed']:>8} {r['unique']:>8} "
+              f"{r['double_claims']:>8} {r['claims_per_sec']:>12.1f}")
+        if r['double_claims'] or r['unique'] != args.jobs:
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
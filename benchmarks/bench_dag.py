@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# Dependency release cost on large DAGs
+#
+#   python benchmarks/bench_dag.py --sizes 10000 100000 --fanin 3
+#
+# Enqueues --sizes jobs where each job depends on up to --fanin random jobs
+# among the previous --window, in chunks of 1000 as `enqueue --file` does,
+# then drains the queue in claim batches of --batch: claim, start, and
+# complete through finish_jobs, which releases dependents in the same
+# transaction. The same number of jobs without dependencies is drained as a
+# baseline. If readiness updates cost O(edges), the extra finish time per
+# edge stays flat as the DAG grows; "scan" is one pass of the readiness
+# check a scanning design would repeat, for comparison.
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.models import Job, JobState
+from queuectl.storage import JobStorage
+
+OWNER = 'bench'
+
+SCAN_SQL = """
+    SELECT COUNT(*) FROM jobs j
+    WHERE state = 'pending' AND NOT EXISTS (SELECT 1 FROM job_deps d WHERE d.child = j.id)
+"""
+
+
+def makejobs(size: int, fanin: int, window: int, rng: random.Random) -> list:
+
+    jobs = []
+    for i in range(size):
+        parents = None
+        if fanin and i:
+            lo = max(0, i - window)
+            parents = [f"n{p}" for p in rng.sample(range(lo, i), min(fanin, i - lo))]
+        jobs.append(Job(jid=f"n{i}", command='true', depends_on=parents))
+    return jobs
+
+
+def run(size: int, fanin: int, window: int, batch: int, seed: int) -> dict:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = JobStorage(os.path.join(tmp, 'bench.db'), profile='fast')
+        jobs = makejobs(size, fanin, window, random.Random(seed))
+        edges = sum(len(job.depends_on or ()) for job in jobs)
+
+        started = time.perf_counter()
+        for i in range(0, size, 1000):
+            storage.insert_jobs(jobs[i:i + 1000])
+        enqueue = time.perf_counter() - started
+
+        conn = storage._get_connection()
+        started = time.perf_counter()
+        conn.execute(SCAN_SQL).fetchone()
+        scan = time.perf_counter() - started
+
+        finish = 0.0
+        done = rounds = 0
+        while True:
+            claimed = storage.claim_batch(batch, OWNER)
+            if not claimed:
+                break
+            rounds += 1
+
+            for job in claimed:
+                storage.mark_processing(job, OWNER)
+                job.state = JobState.COMPLETED
+                job.exit_code = 0
+
+            started = time.perf_counter()
+            stale, _ = storage.finish_jobs(claimed, OWNER)
+            finish += time.perf_counter() - started
+            done += len(claimed) - len(stale)
+
+        left = conn.execute("SELECT COUNT(*) FROM job_deps").fetchone()[0]
+        assert done == size, f"only {done} of {size} jobs completed"
+        assert left == 0, f"{left} edges left"
+        storage.close()
+
+    return {'edges': edges, 'enqueue': enqueue, 'finish': finish, 'rounds': rounds, 'scan': scan}
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--fanin', type=int, default=3)
+    parser.add_argument('--window', type=int, default=1000)
+    parser.add_argument('--batch', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'jobs':>8} {'edges':>8} {'enqueue/s':>10} {'finish us/job':>14} {'flat us/job':>12} "
+          f"{'us/edge':>8} {'scan ms':>8}")
+    for size in args.sizes:
+        dag = run(size, args.fanin, args.window, args.batch, args.seed)
+        flat = run(size, 0, args.window, args.batch, args.seed)
+
+        perjob = dag['finish'] / size * 1e6
+        flatjob = flat['finish'] / size * 1e6
+        peredge = (dag['finish'] - flat['finish']) / max(dag['edges'], 1) * 1e6
+        print(f"{size:>8} {dag['edges']:>8} {size / dag['enqueue']:>10.0f} {perjob:>14.1f} {flatjob:>12.1f} "
+              f"{peredge:>8.2f} {dag['scan'] * 1000:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
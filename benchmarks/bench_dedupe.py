@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# Job id schemes and the cost of deduplicated enqueue
+#
+#   python benchmarks/bench_dedupe.py --jobs 200000
+#
+# ids: how many duplicates --jobs generated ids contain, for the old 8 hex
+# character ids, full UUIDv4 and UUIDv7 (Job.generate_jid).
+# enqueue: inserts --jobs jobs in chunks of 1000, as `enqueue --file`
+# does, with each id scheme and conflict mode, then enqueues the same jobs
+# again. Random ids land all over the primary key index; UUIDv7 ids append
+# to its right edge, which shows in rows/sec and in the database size.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.models import Job, uuid7
+from queuectl.storage import JobStorage
+
+SCHEMES = {
+    'hex8': lambda: str(uuid.uuid4())[:8],
+    'uuid4': lambda: str(uuid.uuid4()),
+    'uuid7': uuid7,
+}
+
+
+def duplicates(scheme, n: int) -> int:
+
+    ids = [scheme() for _ in range(n)]
+    return len(ids) - len(set(ids))
+
+
+def enqueue(scheme, n: int, on_conflict, keys: bool) -> dict:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        storage = JobStorage(path, profile='fast')
+        ids = [scheme() for _ in range(n)]
+
+        def batch():
+            return [Job(jid=jid, command='true', idempotency_key=f"key-{i}" if keys else None)
+                    for i, jid in enumerate(ids)]
+
+        result = {}
+        for phase in ('first', 'again'):
+            jobs = batch()
+            started = time.perf_counter()
+            written = 0
+            for i in range(0, n, 1000):
+                written += storage.insert_jobs(jobs[i:i + 1000], on_conflict)
+            result[phase] = n / (time.perf_counter() - started)
+            result[phase + '_written'] = written
+
+        storage.close()
+        result['mb'] = os.path.getsize(path) / 1e6
+    return result
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=200000)
+    args = parser.parse_args()
+
+    print(f"{'ids':>6} {'duplicates in ' + str(args.jobs):>22}")
+    for name, scheme in SCHEMES.items():
+        print(f"{name:>6} {duplicates(scheme, args.jobs):>22}")
+
+    print()
+    print(f"{'ids':>6} {'on_conflict':>18} {'keys':>5} {'rows/s':>8} {'again rows/s':>13} {'again written':>14} {'db MB':>6}")
+    runs = [('hex8', None, False), ('uuid4', None, False), ('uuid7', None, False),
+            ('uuid7', 'skip', False), ('uuid7', 'skip', True), ('uuid7', 'replace_if_pending', True)]
+    for name, mode, keys in runs:
+        r = enqueue(SCHEMES[name], args.jobs, mode, keys)
+        print(f"{name:>6} {mode or 'upsert':>18} {'yes' if keys else 'no':>5} {r['first']:>8.0f} "
+              f"{r['again']:>13.0f} {r['again_written']:>14} {r['mb']:>6.1f}")
+
+
+if __name__ == '__main__':
+    main()
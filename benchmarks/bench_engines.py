@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# Jobs/sec of the process-per-job model versus the asyncio engine
+#
+#   python benchmarks/bench_engines.py --jobs 400 --command "sleep 0.1"
+#
+# process: --processes worker processes, one job at a time each
+# async:   one worker process running --concurrency jobs at a time
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.async_worker import AsyncWorker
+from queuectl.config import Config
+from queuectl.models import Job, JobState
+from queuectl.storage import JobStorage
+from queuectl.worker import Worker
+
+
+def workerloop(db_path, engine, worker_id, concurrency, stop_event):
+
+    sys.stdout = open(os.devnull, 'w')
+    config = Config(os.path.join(os.path.dirname(db_path), 'config.json'))
+
+    if engine == 'async':
+        worker = AsyncWorker(worker_id, db_path, config, concurrency)
+    else:
+        worker = Worker(worker_id, db_path, config)
+
+    threading.Thread(target=lambda: (stop_event.wait(), worker.stop()), daemon=True).start()
+    worker.run()
+
+
+def run(engine: str, jobs: int, command: str, processes: int, concurrency: int) -> float:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        storage = JobStorage(db_path)
+        storage.insert_jobs([Job(jid=f"job-{i}", command=command) for i in range(jobs)])
+
+        stop_event = multiprocessing.Event()
+        count = processes if engine == 'process' else 1
+        procs = [
+            multiprocessing.Process(target=workerloop, args=(db_path, engine, w + 1, concurrency, stop_event))
+            for w in range(count)
+        ]
+
+        started = time.perf_counter()
+        for proc in procs:
+            proc.start()
+
+        while storage.get_job_counts()[JobState.COMPLETED.value] < jobs:
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - started
+
+        stop_event.set()
+        for proc in procs:
+            proc.join()
+        storage.close()
+
+    return jobs / elapsed
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=400)
+    parser.add_argument('--command', default='sleep 0.1')
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=64)
+    args = parser.parse_args()
+
+    print(f"{'engine':>24} {'jobs/sec':>10}")
+    rate = run('process', args.jobs, args.command, args.processes, 1)
+    print(f"{f'process x{args.processes}':>24} {rate:>10.1f}")
+    rate = run('async', args.jobs, args.command, 1, args.concurrency)
+    print(f"{f'async x1, concurrency {args.concurrency}':>24} {rate:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
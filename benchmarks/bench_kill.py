@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# Timeout kill latency and resource limit enforcement
+#
+#   python benchmarks/bench_kill.py --timeout 1 --grace 1 --runs 5
+#
+# Runs jobs through Worker.executecommand (both engines) and reports how long
+# after the timeout the call returned, and whether any process of the job's
+# tree survived. Cases:
+#   tree       a shell with background children, all exit on SIGTERM
+#   stubborn   the whole tree ignores SIGTERM, so SIGKILL after --grace
+#   memory     allocation beyond max_memory_mb fails
+#   cpu        a busy loop is stopped by max_cpu_seconds
+# Exits non-zero if a process survives or a limit is not enforced.
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.async_worker import AsyncWorker
+from queuectl.config import Config
+from queuectl.models import Job
+
+CASES = {
+    'tree': "sleep 60 & sleep 60 & sleep 60",
+    'stubborn': "trap '' TERM; sleep 60 & sleep 60",
+}
+
+
+def survivors(pidfile: str) -> int:
+
+    # live (non-zombie) processes of the job's group after executecommand
+    # returned; zombies are skipped since PID 1 in a container may never
+    # reap them
+    pgid = int(open(pidfile).read())
+    alive = 0
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            stat = open(f"/proc/{entry}/stat").read()
+        except OSError:
+            continue
+        fields = stat[stat.rindex(')') + 2:].split()
+        if int(fields[2]) == pgid and fields[0] != 'Z':
+            alive += 1
+    return alive
+
+
+def execute(worker, engine: str, job: Job) -> tuple:
+
+    started = time.perf_counter()
+    if engine == 'async':
+        result = asyncio.run(worker.executecommand_async(job))
+    else:
+        result = worker.executecommand(job)
+    return time.perf_counter() - started, result
+
+
+def killcase(worker, engine: str, case: str, tmp: str, timeout: float, runs: int) -> tuple:
+
+    latencies = []
+    alive = 0
+    for run in range(runs):
+        pidfile = os.path.join(tmp, f"{engine}-{case}-{run}.pid")
+        # the group id is the shell's pid, recorded before the children start
+        command = f"echo $$ > {pidfile}; {CASES[case]}; wait"
+        job = Job(jid=f"{engine}-{case}-{run}", command=command, timeout_seconds=timeout)
+
+        elapsed, _ = execute(worker, engine, job)
+        latencies.append((elapsed - timeout) * 1000)
+        alive += survivors(pidfile)
+
+    return statistics.median(latencies), max(latencies), alive
+
+
+def limitcases(worker, engine: str) -> bool:
+
+    memory = Job(jid=f"{engine}-memory", max_memory_mb=200,
+                 command=f"{sys.executable} -c \"b = bytearray(1024 * 1024 * 1024)\"")
+    _, (code, _, _) = execute(worker, engine, memory)
+    print(f"{engine:>8} memory: 1 GB allocation with max_memory_mb=200 exited {code}")
+    ok = code != 0
+
+    cpu = Job(jid=f"{engine}-cpu", max_cpu_seconds=1, timeout_seconds=30,
+              command=f"{sys.executable} -c \"while True: pass\"")
+    elapsed, (code, _, error) = execute(worker, engine, cpu)
+    print(f"{engine:>8} cpu: busy loop with max_cpu_seconds=1 exited {code} after {elapsed:.2f}s ({error})")
+
+    return ok and code != 0 and elapsed < 10
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--timeout', type=float, default=1)
+    parser.add_argument('--grace', type=float, default=1)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Config(os.path.join(tmp, 'config.json'))
+        config.config['kill_grace_seconds'] = args.grace
+        worker = AsyncWorker(1, os.path.join(tmp, 'bench.db'), config)
+
+        print(f"{'engine':>8} {'case':>10} {'p50 ms':>8} {'max ms':>8} {'survivors':>10}")
+        for engine in ('process', 'async'):
+            for case in CASES:
+                p50, worst, alive = killcase(worker, engine, case, tmp, args.timeout, args.runs)
+                print(f"{engine:>8} {case:>10} {p50:>8.1f} {worst:>8.1f} {alive:>10}")
+                ok = ok and alive == 0
+
+        for engine in ('process', 'async'):
+            ok = limitcases(worker, engine) and ok
+
+        worker.listener.close()
+        worker.storage.close()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# Enqueue-to-start latency benchmark
+#
+#   python benchmarks/bench_latency.py --jobs 200
+#
+# Enqueues jobs one at a time into an idle queue, the way `queuectl enqueue`
+# does, and measures how long each one waits before a worker starts it.
+# Modes:
+#   notify  - wakeup socket plus adaptive polling (default behaviour)
+#   poll    - adaptive polling only (platforms without AF_UNIX)
+#   fixed   - the old fixed 1 second sleep
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import queuectl.worker
+from queuectl.config import Config
+from queuectl.models import Job
+from queuectl.notify import notify_workers
+from queuectl.storage import JobStorage
+from queuectl.worker import Worker
+
+
+class TimingWorker(Worker):
+
+    def __init__(self, *args, latencies=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = latencies
+
+    def processjob(self, job):
+        self.latencies.put((datetime.now() - job.created_at).total_seconds())
+        super().processjob(job)
+
+    def executecommand(self, job):
+        return 0, "", ""
+
+
+def workerloop(db_path, mode, latencies, stop_event):
+
+    sys.stdout = open(os.devnull, 'w')
+
+    config = Config(os.path.join(os.path.dirname(db_path), 'config.json'))
+    if mode == 'fixed':
+        queuectl.worker.POLL_MIN_INTERVAL = 1
+        config.config['worker_poll_interval'] = 1
+
+    worker = TimingWorker(1, db_path, config, latencies=latencies)
+    if mode != 'notify':
+        worker.listener.close()
+
+    threading.Thread(target=lambda: (stop_event.wait(), worker.stop()), daemon=True).start()
+    worker.run()
+
+
+def percentile(values, pct):
+
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(mode: str, jobs: int, max_gap: float) -> dict:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        storage = JobStorage(db_path)
+
+        latencies = multiprocessing.Queue()
+        stop_event = multiprocessing.Event()
+        proc = multiprocessing.Process(target=workerloop, args=(db_path, mode, latencies, stop_event))
+        proc.start()
+        time.sleep(0.5)
+
+        rng = random.Random(42)
+        for i in range(jobs):
+            time.sleep(rng.uniform(0, max_gap))
+            storage.save_job(Job(jid=f"job-{i}", command="true"))
+            notify_workers(db_path)
+
+        results = [latencies.get(timeout=30) for _ in range(jobs)]
+        stop_event.set()
+        proc.join()
+        storage.close()
+
+    return {
+        'mode': mode,
+        'p50_ms': percentile(results, 50) * 1000,
+        'p99_ms': percentile(results, 99) * 1000,
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--max-gap', type=float, default=0.5, help='Max seconds between enqueues')
+    parser.add_argument('--modes', default='notify,poll,fixed')
+    args = parser.parse_args()
+
+    print(f"{'mode':>8} {'p50 ms':>10} {'p99 ms':>10}")
+    for mode in args.modes.split(','):
+        r = run(mode, args.jobs, args.max_gap)
+        print(f"{r['mode']:>8} {r['p50_ms']:>10.1f} {r['p99_ms']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# Lease heartbeats and recovery of jobs orphaned in PROCESSING
+#
+#   python benchmarks/bench_leases.py --running 100,1000,10000 --lease 2
+#
+# Heartbeat cost: time of one heartbeat() for a worker running N jobs. It
+# is a single UPDATE whatever N is, so write load is workers/interval.
+# Recovery: a worker with a short lease runs a job longer than the lease
+# (heartbeats must keep it), then a second worker is SIGKILLed mid-job and
+# the time until reap_expired returns its job to pending is measured.
+
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.config import Config
+from queuectl.models import Job, JobState
+from queuectl.storage import JobStorage
+from queuectl.worker import Worker
+
+OWNER = 'bench:0:1'
+
+
+def heartbeat_cost(running: int) -> float:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = JobStorage(os.path.join(tmp, 'bench.db'))
+        storage.insert_jobs([Job(jid=f"job-{i}", command="true") for i in range(running)])
+        for job in storage.claim_batch(running, OWNER):
+            storage.mark_processing(job, OWNER)
+
+        rounds = 20
+        started = time.perf_counter()
+        for _ in range(rounds):
+            assert storage.heartbeat(OWNER) == running
+        elapsed = time.perf_counter() - started
+        storage.close()
+
+    return elapsed / rounds * 1000
+
+
+def workerloop(db_path, lease, stop_event):
+
+    sys.stdout = open(os.devnull, 'w')
+    config = Config(os.path.join(os.path.dirname(db_path), 'config.json'))
+    config.config['lease_seconds'] = lease
+    config.config['heartbeat_interval'] = lease / 4
+
+    worker = Worker(1, db_path, config)
+    threading.Thread(target=lambda: (stop_event.wait(), worker.stop()), daemon=True).start()
+    worker.run()
+
+
+def wait_state(storage: JobStorage, jid: str, state: JobState, timeout: float) -> float:
+
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        storage.reap_expired()
+        if storage.get_job(jid).state == state:
+            return time.perf_counter() - started
+        time.sleep(0.05)
+    return -1
+
+
+def recovery(lease: float) -> bool:
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        storage = JobStorage(db_path)
+
+        # A live worker keeps a job that runs for 3 leases
+        storage.insert_jobs([Job(jid='long', command=f"sleep {lease * 3}")])
+        stop_event = multiprocessing.Event()
+        proc = multiprocessing.Process(target=workerloop, args=(db_path, lease, stop_event))
+        proc.start()
+        wait_state(storage, 'long', JobState.PROCESSING, 10)
+        took = wait_state(storage, 'long', JobState.COMPLETED, lease * 6)
+        print(f"live worker, job of {lease * 3:.0f}s with a {lease:.0f}s lease: "
+              f"{'completed without being reaped' if took >= 0 else 'NOT completed'}")
+        ok = ok and took >= 0 and storage.get_job('long').attempts == 1
+        stop_event.set()
+        proc.join()
+
+        # A killed worker's job is recovered once its lease runs out
+        storage.insert_jobs([Job(jid='orphan', command="sleep 60")])
+        proc = multiprocessing.Process(target=workerloop, args=(db_path, lease, multiprocessing.Event()))
+        proc.start()
+        wait_state(storage, 'orphan', JobState.PROCESSING, 10)
+        os.kill(proc.pid, signal.SIGKILL)
+        proc.join()
+
+        took = wait_state(storage, 'orphan', JobState.PENDING, lease * 4)
+        print(f"killed worker: job back in pending after {took:.2f}s")
+        ok = ok and took >= 0
+        storage.close()
+
+    return ok
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--running', default='100,1000,10000')
+    parser.add_argument('--lease', type=float, default=2)
+    args = parser.parse_args()
+
+    print(f"{'running jobs':>12} {'ms/heartbeat':>13}")
+    for running in [int(n) for n in args.running.split(',')]:
+        print(f"{running:>12} {heartbeat_cost(running):>13.2f}")
+
+    sys.exit(0 if recovery(args.lease) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# Cost of worker metrics per job
+#
+#   python benchmarks/bench_metrics.py --jobs 2000 --rounds 5
+#
+# instrument  the Metrics calls one job makes (claim, start, queue wait,
+#             execute, outcome, result flush and three write-lock waits)
+#             replayed in a tight loop, in microseconds per job (best round)
+# drain       --jobs no-op jobs (shell `true`, and an inline python call)
+#             claimed and run one at a time through Worker.claim and
+#             Worker.processjob, with metrics on (metrics_interval 10) and
+#             off (0); rounds alternate and the median is reported
+# Overhead is instrument time as a share of the cheaper no-op job.
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.config import Config
+from queuectl.metrics import Metrics
+from queuectl.models import Job
+from queuectl.worker import Worker
+
+KINDS = {
+    'shell true': lambda i: Job(jid=f"job-{i}", command='true'),
+    'python noop': lambda i: Job(jid=f"job-{i}", command='os:getpid', kind='python', args=[]),
+}
+
+
+def instrument(jobs: int) -> float:
+
+    # microseconds per job for the calls Worker makes around one job
+    metrics = Metrics()
+    created = datetime.now()
+    started = time.perf_counter()
+    for _ in range(jobs):
+        t = time.perf_counter()
+        metrics.observe('queuectl_db_lock_wait_seconds', time.perf_counter() - t)
+        metrics.observe('queuectl_claim_seconds', time.perf_counter() - t)
+        metrics.inc('queuectl_jobs_claimed_total', value=1)
+        metrics.observe('queuectl_db_lock_wait_seconds', time.perf_counter() - t)
+        metrics.observe('queuectl_persist_seconds', time.perf_counter() - t, 'op="start"')
+        metrics.inc('queuectl_jobs_started_total')
+        wait = (datetime.now() - created).total_seconds()
+        metrics.observe('queuectl_queue_wait_seconds', max(wait, 0.0))
+        metrics.observe('queuectl_execute_seconds', time.perf_counter() - t)
+        metrics.inc('queuectl_jobs_finished_total', 'state="completed"')
+        metrics.observe('queuectl_db_lock_wait_seconds', time.perf_counter() - t)
+        metrics.observe('queuectl_persist_seconds', time.perf_counter() - t, 'op="finish"')
+    return (time.perf_counter() - started) / jobs * 1e6
+
+
+def drain(kind: str, jobs: int, enabled: bool) -> float:
+
+    # microseconds per job from claim to persisted result
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Config(os.path.join(tmp, 'config.json'))
+        config.set('metrics_interval', 10 if enabled else 0)
+
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            # no metricsloop: snapshots are written outside the job path
+            worker = Worker(1, os.path.join(tmp, 'bench.db'), config)
+            worker.storage.insert_jobs([KINDS[kind](i) for i in range(jobs)])
+
+            started = time.perf_counter()
+            while True:
+                claimed = worker.claim(1)
+                if not claimed:
+                    break
+                worker.processjob(claimed[0])
+            elapsed = time.perf_counter() - started
+
+            worker.listener.close()
+            worker.python.close()
+            worker.storage.close()
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+    return elapsed / jobs * 1e6
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    cost = min(instrument(args.jobs * 10) for _ in range(args.rounds))
+    print(f"instrumentation: {cost:.2f} us/job")
+
+    print(f"{'job':>12} {'off us/job':>11} {'on us/job':>10} {'measured':>9} {'instrument':>11}")
+    cheapest = None
+    for kind in KINDS:
+        on, off = [], []
+        for _ in range(args.rounds):
+            off.append(drain(kind, args.jobs, False))
+            on.append(drain(kind, args.jobs, True))
+        on, off = statistics.median(on), statistics.median(off)
+        cheapest = off if cheapest is None else min(cheapest, off)
+        print(f"{kind:>12} {off:>11.1f} {on:>10.1f} {(on - off) / off:>+9.2%} {cost / off:>11.2%}")
+
+    print(f"overhead on the cheapest no-op job: {cost / cheapest:.2%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# Warm executor pool vs spawning every job
+#
+#   python benchmarks/bench_pool.py --jobs 200
+#
+# Runs --jobs short Python snippets one after another through
+# Worker.executecommand, as a process worker would, with executor = spawn
+# (sh -c and a fresh interpreter per job) and executor = pool (warm
+# interpreter, recycled every --max-jobs jobs). A shell job is included to
+# show that ineligible commands keep the spawn cost either way.
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.config import Config
+from queuectl.models import Job
+from queuectl.worker import Worker
+
+PYTHON = os.path.basename(sys.executable)
+
+JOBS = {
+    'python -c pass': f"{PYTHON} -c pass",
+    'python -c json': f"{PYTHON} -c 'import json; print(json.dumps({{\"n\": sum(range(1000))}}))'",
+    'shell true': "true",
+}
+
+
+def run(executor: str, command: str, jobs: int, max_jobs: int) -> list:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Config(os.path.join(tmp, 'config.json'))
+        config.set('executor', executor)
+        config.set('executor_max_jobs', max_jobs)
+
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        worker = Worker(1, os.path.join(tmp, 'bench.db'), config)
+        sys.stdout = stdout
+
+        times = []
+        for i in range(jobs):
+            started = time.perf_counter()
+            exit_code, _, error = worker.executecommand(Job(jid=f"job-{i}", command=command))
+            times.append((time.perf_counter() - started) * 1000)
+            assert exit_code == 0, error
+
+        recycled = worker.pool.recycled if worker.pool else 0
+        if worker.pool:
+            worker.pool.close()
+        worker.storage.close()
+
+    return times, recycled
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--max-jobs', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'job':>16} {'executor':>9} {'mean ms':>8} {'p50 ms':>7} {'p99 ms':>7} {'jobs/sec':>9} {'recycled':>9}")
+    for name, command in JOBS.items():
+        for executor in ('spawn', 'pool'):
+            times, recycled = run(executor, command, args.jobs, args.max_jobs)
+            times.sort()
+            mean = statistics.mean(times)
+            print(f"{name:>16} {executor:>9} {mean:>8.2f} {statistics.median(times):>7.2f} "
+                  f"{times[int(len(times) * 0.99) - 1]:>7.2f} {1000 / mean:>9.0f} {recycled:>9}")
+
+
+if __name__ == '__main__':
+    main()
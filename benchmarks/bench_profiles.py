@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# Enqueue and claim throughput per storage profile
+#
+#   python benchmarks/bench_profiles.py --jobs 2000 --workers 4
+#
+# enqueue: one save_job (one commit) per job, like `queuectl enqueue`
+# claim:   worker processes draining the queue with claim_batch(1, ...)
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.models import Job
+from queuectl.storage import JobStorage, STORAGE_PROFILES
+
+
+def claimloop(db_path, profile, worker_id, start_event, results):
+
+    storage = JobStorage(db_path, profile)
+    claimed = 0
+
+    start_event.wait()
+    while storage.claim_batch(1, f"bench:{worker_id}"):
+        claimed += 1
+
+    storage.close()
+    results.put(claimed)
+
+
+def run(profile: str, jobs: int, workers: int) -> dict:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        storage = JobStorage(db_path, profile)
+
+        started = time.perf_counter()
+        for i in range(jobs):
+            storage.save_job(Job(jid=f"job-{i}", command="true"))
+        enqueue_elapsed = time.perf_counter() - started
+        storage.close()
+
+        start_event = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=claimloop, args=(db_path, profile, w, start_event, results))
+            for w in range(workers)
+        ]
+        for proc in procs:
+            proc.start()
+
+        started = time.perf_counter()
+        start_event.set()
+        claimed = sum(results.get() for _ in procs)
+        claim_elapsed = time.perf_counter() - started
+
+        for proc in procs:
+            proc.join()
+
+    return {
+        'profile': profile,
+        'enqueue_per_sec': jobs / enqueue_elapsed,
+        'claims_per_sec': claimed / claim_elapsed,
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--profiles', default=','.join(STORAGE_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{'profile':>10} {'enqueue/sec':>12} {'claims/sec':>12}")
+    for profile in args.profiles.split(','):
+        r = run(profile, args.jobs, args.workers)
+        print(f"{r['profile']:>10} {r['enqueue_per_sec']:>12.1f} {r['claims_per_sec']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# Python-callable jobs vs shell commands that do the same work
+#
+#   python benchmarks/bench_python.py --jobs 200
+#
+# Runs --jobs calls of json.dumps through Worker.executecommand, as a
+# process worker would:
+#   shell spawn    python -c '...' through sh -c and a fresh interpreter
+#   shell pool     the same command on a warm executor (executor = pool)
+#   python inline  {"type": "python", "target": "json:dumps"}, called in the worker
+#   python procs   the same job in a one-process ProcessPoolExecutor
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.config import Config
+from queuectl.models import Job
+from queuectl.worker import Worker
+
+PYTHON = os.path.basename(sys.executable)
+
+MODES = {
+    'shell spawn': ({'executor': 'spawn'}, 'shell'),
+    'shell pool': ({'executor': 'pool'}, 'shell'),
+    'python inline': ({'python_processes': 0}, 'python'),
+    'python procs': ({'python_processes': 1}, 'python'),
+}
+
+
+def makejob(i: int, kind: str) -> Job:
+
+    if kind == 'python':
+        return Job(jid=f"job-{i}", command='json:dumps', kind='python', args=[{'n': i}])
+    return Job(jid=f"job-{i}", command=f"{PYTHON} -c 'import json; print(json.dumps({{\"n\": {i}}}))'")
+
+
+def run(settings: dict, kind: str, jobs: int) -> list:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Config(os.path.join(tmp, 'config.json'))
+        for key, value in settings.items():
+            config.set(key, value)
+
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        worker = Worker(1, os.path.join(tmp, 'bench.db'), config)
+        sys.stdout = stdout
+
+        times = []
+        for i in range(jobs):
+            job = makejob(i, kind)
+            started = time.perf_counter()
+            exit_code, _, error = worker.executecommand(job)
+            times.append((time.perf_counter() - started) * 1000)
+            assert exit_code == 0, error
+
+        if worker.pool:
+            worker.pool.close()
+        worker.python.close()
+        worker.storage.close()
+
+    return times
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'mode':>14} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8} {'jobs/sec':>9}")
+    for name, (settings, kind) in MODES.items():
+        times = sorted(run(settings, kind, args.jobs))
+        mean = statistics.mean(times)
+        print(f"{name:>14} {mean:>8.3f} {statistics.median(times):>8.3f} "
+              f"{times[int(len(times) * 0.99) - 1]:>8.3f} {1000 / mean:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# Queue/priority claims: cost against backlog size, weighted shares, starvation
+#
+#   python benchmarks/bench_queues.py --backlogs 10000,100000,500000
+#
+# cost:       claim one job from high,default,bulk while `bulk` holds a large
+#             backlog over several priorities; should stay flat
+# levels:     the same with the starvation pass on and a 100k backlog spread
+#             over --levels priorities; should stay flat too
+# shares:     claims from high:5,default:3,bulk:1 with every queue full
+# starvation: strict high,bulk with high always refilled; the bulk job must
+#             still be claimed once it has waited queue_starvation_seconds
+# Fails if a per-queue claim query needs a temp b-tree or a table scan.
+
+import argparse
+import collections
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.models import Job
+from queuectl.queues import QueueSelector
+from queuectl.storage import JobStorage
+
+OWNER = 'bench:0:1'
+
+
+def fill(storage: JobStorage, queue: str, count: int, priorities: int = 1, start: int = 0) -> None:
+
+    chunk = []
+    for i in range(start, start + count):
+        chunk.append(Job(jid=f"{queue}-{i}", command="true", queue=queue, priority=i % priorities))
+        if len(chunk) == 10000:
+            storage.insert_jobs(chunk)
+            chunk = []
+    storage.insert_jobs(chunk)
+
+
+def cost(backlog: int, claims: int, priorities: int = 5, starve_after: float = 0) -> float:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = JobStorage(os.path.join(tmp, 'bench.db'), 'fast')
+        fill(storage, 'bulk', backlog, priorities=priorities)
+        fill(storage, 'high', claims)
+
+        selector = QueueSelector('high,default,bulk')
+        started = time.perf_counter()
+        for _ in range(claims):
+            storage.claim_batch(1, OWNER, 300, selector.order(), starve_after)
+        elapsed = time.perf_counter() - started
+        storage.close()
+
+    return elapsed / claims * 1e6
+
+
+def shares(claims: int) -> dict:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = JobStorage(os.path.join(tmp, 'bench.db'), 'fast')
+        for queue in ('high', 'default', 'bulk'):
+            fill(storage, queue, claims)
+
+        selector = QueueSelector('high:5,default:3,bulk:1')
+        counts = collections.Counter()
+        for _ in range(claims):
+            for job in storage.claim_batch(1, OWNER, 300, selector.order()):
+                counts[job.queue] += 1
+        storage.close()
+
+    return counts
+
+
+def starvation(starve_after: float) -> float:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = JobStorage(os.path.join(tmp, 'bench.db'), 'fast')
+        fill(storage, 'bulk', 1)
+        started = time.perf_counter()
+
+        refill = 0
+        while time.perf_counter() - started < starve_after * 10:
+            fill(storage, 'high', 2, start=refill)
+            refill += 2
+            jobs = storage.claim_batch(1, OWNER, 300, ['high', 'bulk'], starve_after)
+            if jobs and jobs[0].queue == 'bulk':
+                storage.close()
+                return time.perf_counter() - started
+            time.sleep(0.01)
+
+        storage.close()
+    return -1
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--backlogs', default='10000,100000,500000')
+    parser.add_argument('--claims', type=int, default=900)
+    parser.add_argument('--levels', default='5,100,1000')
+    parser.add_argument('--starve-after', type=float, default=0.5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = JobStorage(os.path.join(tmp, 'bench.db'))
+        plan = storage.claim_query_plan('bulk')
+        storage.close()
+    print("Per-queue claim plan:")
+    for detail in plan:
+        print(f"  {detail}")
+
+    print(f"{'bulk backlog':>12} {'us/claim':>10}")
+    for backlog in [int(b) for b in args.backlogs.split(',')]:
+        print(f"{backlog:>12} {cost(backlog, args.claims):>10.1f}")
+
+    print(f"{'levels':>12} {'us/claim':>10}  (starvation pass on)")
+    for levels in [int(n) for n in args.levels.split(',')]:
+        print(f"{levels:>12} {cost(100000, args.claims, levels, 3600):>10.1f}")
+
+    counts = shares(args.claims)
+    total = sum(counts.values())
+    print("high:5,default:3,bulk:1 -> " + ', '.join(
+        f"{queue} {counts[queue] / total:.1%}" for queue in ('high', 'default', 'bulk')))
+
+    took = starvation(args.starve_after)
+    print(f"strict high,bulk with high always full: bulk job claimed after {took:.2f}s "
+          f"(queue_starvation_seconds={args.starve_after})")
+
+    ok = took >= 0 and all('idx_queue_' in d for d in plan) and not any('TEMP B-TREE' in d for d in plan)
+    if not ok:
+        print("FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# Claim query plan and latency on a large, mostly completed table
+#
+#   python benchmarks/bench_ready_query.py --rows 1000000 --ready 1000
+#
+# Fails unless EXPLAIN QUERY PLAN shows the claim query searching the
+# partial ready index without a separate sort step.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.models import Job, JobState, now_micros
+from queuectl.storage import CLAIM_SQL, JobStorage
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--ready', type=int, default=1000, help='Pending jobs among the rows')
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = JobStorage(os.path.join(tmp, 'bench.db'), 'fast')
+
+        chunk = []
+        for i in range(args.rows):
+            state = JobState.PENDING if i % max(1, args.rows // args.ready) == 0 else JobState.COMPLETED
+            chunk.append(Job(jid=f"job-{i}", command="true", state=state))
+            if len(chunk) == 10000:
+                storage.insert_jobs(chunk)
+                chunk = []
+        storage.insert_jobs(chunk)
+
+        plan = storage.claim_query_plan()
+        print("Claim query plan:")
+        for detail in plan:
+            print(f"  {detail}")
+
+        conn = storage._get_connection()
+        started = time.perf_counter()
+        for _ in range(args.queries):
+            conn.execute(CLAIM_SQL, (now_micros(), 1)).fetchall()
+        elapsed = time.perf_counter() - started
+        print(f"{args.rows} rows: {elapsed / args.queries * 1e6:.1f} us per claim query")
+
+        storage.close()
+
+    if not any('idx_ready' in detail for detail in plan) or any('TEMP B-TREE' in detail for detail in plan):
+        print("FAIL: claim query does not use idx_ready")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# Write-behind result batching: throughput and crash safety
+#
+#   python benchmarks/bench_results.py --jobs 5000 --batches 1,16,64
+#
+# Runs no-op jobs (no subprocess) so commits dominate, once per
+# result_batch_size. Then SIGKILLs a batching worker mid-run and checks that
+# no job was lost and none was marked completed without having run.
+
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.config import Config
+from queuectl.models import Job, JobState
+from queuectl.storage import JobStorage
+from queuectl.worker import Worker
+
+
+class NoopWorker(Worker):
+
+    def executecommand(self, job):
+        # record that the job really ran before its result is buffered
+        open(os.path.join(os.path.dirname(self.db_path), 'ran', job.jid), 'w').close()
+        return 0, None, None
+
+
+def workerloop(db_path, batch_size, stop_event):
+
+    sys.stdout = open(os.devnull, 'w')
+    config = Config(os.path.join(os.path.dirname(db_path), 'config.json'))
+    config.config['result_batch_size'] = batch_size
+    config.config['result_flush_ms'] = 100
+
+    worker = NoopWorker(1, db_path, config, prefetch=batch_size)
+    threading.Thread(target=lambda: (stop_event.wait(), worker.stop()), daemon=True).start()
+    worker.run()
+
+
+def setup(tmp: str, jobs: int) -> str:
+
+    db_path = os.path.join(tmp, 'bench.db')
+    os.mkdir(os.path.join(tmp, 'ran'))
+    storage = JobStorage(db_path)
+    storage.insert_jobs([Job(jid=f"job-{i}", command="true") for i in range(jobs)])
+    storage.close()
+    return db_path
+
+
+def throughput(jobs: int, batch_size: int) -> float:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = setup(tmp, jobs)
+        storage = JobStorage(db_path)
+        stop_event = multiprocessing.Event()
+        proc = multiprocessing.Process(target=workerloop, args=(db_path, batch_size, stop_event))
+
+        started = time.perf_counter()
+        proc.start()
+        while storage.get_job_counts()[JobState.COMPLETED.value] < jobs:
+            time.sleep(0.02)
+        elapsed = time.perf_counter() - started
+
+        stop_event.set()
+        proc.join()
+        storage.close()
+
+    return jobs / elapsed
+
+
+def crash(jobs: int, batch_size: int) -> bool:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = setup(tmp, jobs)
+        proc = multiprocessing.Process(target=workerloop, args=(db_path, batch_size, multiprocessing.Event()))
+        proc.start()
+        time.sleep(1.0)
+        os.kill(proc.pid, signal.SIGKILL)
+        proc.join()
+
+        storage = JobStorage(db_path)
+        ran = set(os.listdir(os.path.join(tmp, 'ran')))
+        counts = storage.get_job_counts()
+        completed = {job.jid for job in storage.iter_job_summaries(JobState.COMPLETED)}
+        storage.close()
+
+    total = sum(counts.values())
+    print(f"crash after 1s: {counts} ran={len(ran)}")
+    print(f"  rows kept: {total}/{jobs}, completed without running: {len(completed - ran)}, "
+          f"ran but not recorded (will re-run): {len(ran - completed)}")
+    return total == jobs and not (completed - ran)
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=5000)
+    parser.add_argument('--batches', default='1,16,64')
+    args = parser.parse_args()
+
+    print(f"{'batch':>6} {'jobs/sec':>10}")
+    for batch_size in [int(b) for b in args.batches.split(',')]:
+        print(f"{batch_size:>6} {throughput(args.jobs, batch_size):>10.1f}")
+
+    sys.exit(0 if crash(args.jobs * 10, 64) else 1)
+
+
+if __name__ == '__main__':
+    main()
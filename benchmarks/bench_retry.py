@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# Retry storms: claim load after a shared dependency fails, per jitter mode
+#
+#   python benchmarks/bench_retry.py --jobs 10000 --outage 120
+#
+# Simulation, no database: --jobs jobs all fail at t=0 because a dependency
+# is down for --outage seconds. Every attempt before it recovers fails and
+# is retried after backoff_delay() with the given strategy, base and cap.
+# Reports the busiest second (claims that hit the queue and the dependency
+# at once), total attempts, and when the last job finally succeeded.
+
+import argparse
+import collections
+import heapq
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.retry import JITTERS, RetryPolicy, backoff_delay
+
+
+def simulate(policy: RetryPolicy, jobs: int, outage: float, max_retries: int, seed: int) -> dict:
+
+    rng = random.Random(seed)
+    load = collections.Counter()
+    # (time of attempt, attempts so far, previous delay)
+    due = [(0.0, 0, None) for _ in range(jobs)]
+    heapq.heapify(due)
+
+    attempts = dead = 0
+    finished = 0.0
+    while due:
+        at, tries, previous = heapq.heappop(due)
+        attempts += 1
+        tries += 1
+        load[int(at)] += 1
+
+        if at >= outage:
+            finished = max(finished, at)
+        elif tries >= max_retries:
+            dead += 1
+        else:
+            delay = backoff_delay(policy, tries, previous, rng)
+            heapq.heappush(due, (at + delay, tries, delay))
+
+    after = [load[s] for s in range(int(outage), int(finished) + 1)]
+    return {
+        'peak': max(v for s, v in load.items() if s > 0),
+        'peak_after': max(after) if after else 0,
+        'attempts': attempts,
+        'dead': dead,
+        'finished': finished,
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=10000)
+    parser.add_argument('--outage', type=float, default=120)
+    parser.add_argument('--strategy', default='exponential')
+    parser.add_argument('--base', type=float, default=2)
+    parser.add_argument('--max-delay', type=float, default=60)
+    parser.add_argument('--max-retries', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.jobs} jobs, dependency down for {args.outage:g}s, {args.strategy} base {args.base:g} "
+          f"capped at {args.max_delay:g}s (first attempts at t=0 not counted in peaks)")
+    print(f"{'jitter':>13} {'peak/s':>8} {'peak/s after':>13} {'attempts':>9} {'dead':>6} {'all done at':>12}")
+    for jitter in JITTERS:
+        policy = RetryPolicy(args.strategy, args.base, args.max_delay, jitter, None)
+        r = simulate(policy, args.jobs, args.outage, args.max_retries, args.seed)
+        print(f"{jitter:>13} {r['peak']:>8} {r['peak_after']:>13} {r['attempts']:>9} {r['dead']:>6} "
+              f"{r['finished']:>11.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# Delayed jobs: how late they start, and how often an idle worker polls
+#
+#   python benchmarks/bench_scheduled.py --jobs 50 --spread 10
+#
+# Schedules --jobs no-op jobs at random times over the next --spread seconds
+# and runs one worker until all have run. Compares sleeping until
+# next_due_at (due) with the previous backoff poll capped at
+# worker_poll_interval (poll). Lateness is start time minus run_at.
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.config import Config
+from queuectl.models import Job, JobState
+from queuectl.notify import notify_workers
+from queuectl.storage import JobStorage
+from queuectl.worker import Worker
+
+
+class TimedWorker(Worker):
+
+    def __init__(self, *args, mode='due', claims=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mode = mode
+        self.claims = claims
+
+    def claim(self, n):
+        self.claims.value += 1
+        return super().claim(n)
+
+    def idlesleep(self, idle_wait):
+        if self.mode == 'poll':
+            return idle_wait
+        return super().idlesleep(idle_wait)
+
+    def executecommand(self, job):
+        with open(os.path.join(os.path.dirname(self.db_path), 'ran', job.jid), 'w') as f:
+            f.write(repr(time.time()))
+        return 0, None, None
+
+
+def workerloop(db_path, mode, claims, stop_event):
+
+    sys.stdout = open(os.devnull, 'w')
+    config = Config(os.path.join(os.path.dirname(db_path), 'config.json'))
+    worker = TimedWorker(1, db_path, config, mode=mode, claims=claims)
+    threading.Thread(target=lambda: (stop_event.wait(), worker.stop()), daemon=True).start()
+    worker.run()
+
+
+def run(mode: str, jobs: int, spread: float) -> tuple:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        os.mkdir(os.path.join(tmp, 'ran'))
+        storage = JobStorage(db_path)
+
+        claims = multiprocessing.Value('i', 0)
+        stop_event = multiprocessing.Event()
+        proc = multiprocessing.Process(target=workerloop, args=(db_path, mode, claims, stop_event))
+        proc.start()
+        time.sleep(1)
+
+        now = time.time()
+        due = {f"job-{i}": now + 0.5 + random.random() * spread for i in range(jobs)}
+        storage.insert_jobs([
+            Job(jid=jid, command="true", run_at=datetime.fromtimestamp(at)) for jid, at in due.items()
+        ])
+        # as queuectl enqueue does
+        notify_workers(db_path)
+
+        started = time.perf_counter()
+        while storage.get_job_counts()[JobState.COMPLETED.value] < jobs:
+            time.sleep(0.1)
+        elapsed = time.perf_counter() - started
+
+        stop_event.set()
+        proc.join()
+        storage.close()
+
+        lateness = [
+            (float(open(os.path.join(tmp, 'ran', jid)).read()) - at) * 1000 for jid, at in due.items()
+        ]
+
+    lateness.sort()
+    return statistics.median(lateness), lateness[int(len(lateness) * 0.99) - 1], claims.value / elapsed
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=50)
+    parser.add_argument('--spread', type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{'mode':>6} {'late p50 ms':>12} {'late p99 ms':>12} {'claims/sec':>11}")
+    for mode in ('due', 'poll'):
+        p50, p99, rate = run(mode, args.jobs, args.spread)
+        print(f"{mode:>6} {p50:>12.1f} {p99:>12.1f} {rate:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
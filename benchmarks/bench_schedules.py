@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# Recurring jobs: materialize throughput, and several schedulers on one database
+#
+#   python benchmarks/bench_schedules.py --schedules 10000 --schedulers 4
+#
+# throughput: --schedules every-minute schedules all due, one tick
+# contention: --schedulers processes tick in a loop on a simulated clock
+#             (one minute every --minute-ms); halfway through the leader
+#             dies without releasing its lock. Every tick must be enqueued
+#             exactly once, except ticks coalesced while nobody led.
+# The run is repeated with the lock disabled: the materialize transaction
+# alone still prevents duplicates, but every process then takes a write
+# transaction on every loop instead of only the leader.
+# Cron day matching is checked against Vixie cron first.
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import queuectl.storage
+from queuectl.config import Config
+from queuectl.cron import CronExpr
+from queuectl.models import Schedule, to_micros
+from queuectl.scheduler import Scheduler
+from queuectl.storage import JobStorage
+
+
+# expression: the days of January 2026 (Jan 1 is a Thursday) it runs on
+DAYS = {
+    '0 0 * * *': list(range(1, 32)),
+    '0 0 */2 * *': list(range(1, 32, 2)),
+    '0 0 * * */2': [1, 3, 4, 6, 8, 10, 11, 13, 15, 17, 18, 20, 22, 24, 25, 27, 29, 31],
+    '0 0 1-7 * */2': [1, 3, 4, 6],
+    '0 0 1-7 * mon': [1, 2, 3, 4, 5, 6, 7, 12, 19, 26],
+    '0 0 15 * 5': [2, 9, 15, 16, 23, 30],
+}
+
+
+def daymatching() -> bool:
+
+    ok = True
+    for expr, expected in DAYS.items():
+        cron, t, days = CronExpr(expr), datetime(2025, 12, 31, 12), []
+        while True:
+            t = cron.next_after(t)
+            if t.month != 1:
+                break
+            days.append(t.day)
+        if days != expected:
+            print(f"cron '{expr}': runs on January {days}, expected {expected}")
+            ok = False
+    return ok
+
+
+def addschedules(storage: JobStorage, count: int, start: datetime) -> None:
+
+    for i in range(count):
+        storage.add_schedule(Schedule(name=f"s{i}", cron='* * * * *', template={'command': 'true'},
+                                      next_run_at=start))
+
+
+def throughput(count: int) -> float:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = JobStorage(os.path.join(tmp, 'bench.db'), 'fast')
+        addschedules(storage, count, datetime.now().replace(second=0, microsecond=0))
+
+        config = Config(os.path.join(tmp, 'config.json'))
+        started = time.perf_counter()
+        created = Scheduler(storage, 'bench:0', config).tick()
+        elapsed = time.perf_counter() - started
+        storage.close()
+
+    assert created == count, created
+    return count / elapsed
+
+
+def schedulerloop(db_path, index, base, speed, duration, crash_at, nolock, crashed, stats):
+
+    # simulated clock: `speed` seconds pass per real second
+    t0 = time.time()
+    queuectl.storage.now_micros = lambda: base + int((time.time() - t0) * speed * 1_000_000)
+
+    sys.stdout = open(os.devnull, 'w')
+    storage = JobStorage(db_path)
+    config = Config(os.path.join(os.path.dirname(db_path), 'config.json'))
+    scheduler = Scheduler(storage, f"bench:{index}", config)
+
+    materialize = storage.materialize_schedules
+    transactions = 0
+
+    def counting(*args):
+        nonlocal transactions
+        transactions += 1
+        return materialize(*args)
+    storage.materialize_schedules = counting
+
+    if nolock:
+        storage.acquire_lock = lambda name, owner, ttl: True
+
+    inserted = 0
+    while time.time() - t0 < duration:
+        inserted += scheduler.tick()
+        # the first leader past crash_at dies without releasing the lock
+        if scheduler.leader and crash_at and time.time() - t0 > crash_at:
+            with crashed.get_lock():
+                crash, crashed.value = not crashed.value, 1
+            if crash:
+                stats[index] = (inserted, transactions)
+                os._exit(0)
+        time.sleep(0.005)
+
+    stats[index] = (inserted, transactions)
+
+
+def contention(schedules: int, schedulers: int, minute_ms: float, duration: float, nolock: bool) -> dict:
+
+    speed = 60_000 / minute_ms
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        storage = JobStorage(db_path)
+
+        # a few simulated minutes of lock lease
+        lock_seconds = 3 * 60
+        Config(os.path.join(tmp, 'config.json')).set('scheduler_lock_seconds', lock_seconds)
+
+        base = datetime.now().replace(second=0, microsecond=0) + timedelta(minutes=1)
+        addschedules(storage, schedules, base)
+
+        stats = multiprocessing.Manager().dict()
+        crashed = multiprocessing.Value('i', 0)
+        procs = [
+            multiprocessing.Process(target=schedulerloop, args=(
+                db_path, i, to_micros(base), speed, duration, 0 if nolock else duration / 2, nolock,
+                crashed, stats))
+            for i in range(schedulers)
+        ]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+
+        with storage._get_cursor() as cursor:
+            cursor.execute("SELECT COUNT(*), COUNT(DISTINCT id) FROM jobs")
+            rows, distinct = cursor.fetchone()
+            # consecutive instances of one schedule more than a minute apart
+            cursor.execute("""
+                SELECT COUNT(*) FROM (
+                    SELECT run_at - LAG(run_at) OVER (PARTITION BY substr(id, 1, instr(id, '@'))
+                                         ORDER BY run_at) AS gap FROM jobs
+                ) WHERE gap > 60000000
+            """)
+            gaps = cursor.fetchone()[0]
+        storage.close()
+
+    return {
+        'instances': rows,
+        'duplicates': rows - distinct,
+        'inserted': sum(s[0] for s in stats.values()),
+        'transactions': sum(s[1] for s in stats.values()),
+        'gaps': gaps,
+        'crashed': crashed.value,
+        'ticks': int(duration * speed / 60),
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--schedules', type=int, default=10000)
+    parser.add_argument('--schedulers', type=int, default=4)
+    parser.add_argument('--contended', type=int, default=50, help='schedules in the contention run')
+    parser.add_argument('--minute-ms', type=float, default=100)
+    parser.add_argument('--duration', type=float, default=6)
+    args = parser.parse_args()
+
+    ok = daymatching()
+    print(f"cron day matching: {len(DAYS)} expressions {'ok' if ok else 'WRONG'}")
+    print(f"throughput: {throughput(args.schedules):.0f} schedules/sec materialized")
+
+    for nolock in (False, True):
+        r = contention(args.contended, args.schedulers, args.minute_ms, args.duration, nolock)
+        print(f"{'no lock' if nolock else 'leader lock'}: {r['instances']} instances over ~{r['ticks']} ticks x "
+              f"{args.contended} schedules, {r['duplicates']} duplicates, {r['gaps']} coalesced gaps, "
+              f"{r['crashed']} leader crash(es), {r['transactions']} materialize transactions")
+        ok = ok and r['duplicates'] == 0 and r['inserted'] == r['instances']
+
+    if not ok:
+        print("FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
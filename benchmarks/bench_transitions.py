@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# Write amplification of full-row saves versus targeted transition UPDATEs
+#
+#   python benchmarks/bench_transitions.py --jobs 5000 --output-bytes 4096
+#
+# Moves every job PROCESSING -> COMPLETED once with save_job (INSERT OR
+# REPLACE of the whole row) and once with mark_completed (UPDATE of the
+# result columns), and reports WAL frames written per transition and the
+# time per transition. Automatic checkpoints are disabled so the WAL holds
+# every page each variant wrote.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from queuectl.models import Job, JobState
+from queuectl.storage import JobStorage
+
+OWNER = 'bench:0:1'
+
+
+def setup(db_path: str, jobs: int, output_bytes: int) -> tuple:
+
+    storage = JobStorage(db_path)
+    storage.insert_jobs([
+        Job(jid=f"job-{i}", command="true", output='x' * output_bytes) for i in range(jobs)
+    ])
+
+    claimed = []
+    while len(claimed) < jobs:
+        batch = storage.claim_batch(1000, OWNER)
+        for job in batch:
+            storage.mark_processing(job, OWNER)
+        claimed.extend(batch)
+
+    conn = storage._get_connection()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("PRAGMA wal_autocheckpoint = 0")
+    return storage, claimed
+
+
+def walframes(storage: JobStorage) -> int:
+
+    # PASSIVE checkpoint reports the WAL size in frames without blocking
+    return storage._get_connection().execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()[1]
+
+
+def run(variant: str, jobs: int, output_bytes: int) -> tuple:
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage, claimed = setup(os.path.join(tmp, 'bench.db'), jobs, output_bytes)
+
+        started = time.perf_counter()
+        for job in claimed:
+            job.exit_code = 0
+            if variant == 'save_job':
+                job.state = JobState.COMPLETED
+                storage.save_job(job)
+            else:
+                storage.mark_completed(job, OWNER)
+        elapsed = time.perf_counter() - started
+
+        frames = walframes(storage)
+        storage.close()
+
+    return frames / jobs, elapsed / jobs * 1e6
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=5000)
+    parser.add_argument('--output-bytes', type=int, default=4096)
+    args = parser.parse_args()
+
+    print(f"{'variant':>16} {'WAL frames/op':>14} {'us/op':>10}")
+    for variant in ('save_job', 'mark_completed'):
+        frames, micros = run(variant, args.jobs, args.output_bytes)
+        print(f"{variant:>16} {frames:>14.2f} {micros:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+# Asyncio worker engine: many concurrent jobs per process
+#
+# One claim loop leases jobs with claim_batch and feeds an asyncio.Queue;
+# `concurrency` runner tasks take jobs from it and run them with
+# asyncio.create_subprocess_shell. All SQLite access goes through a single
+# database thread, so the process holds one connection no matter how many
+# jobs are running. Retry, backoff and DLQ handling are Worker.finishjob.
+
+import asyncio
+import os
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from .config import Config
+from .executor import executor_pool
+from .joblog import CHUNK_SIZE, LogSink, log_path
+from .limits import describe_exit, job_limits, launch_argv, signal_group
+from .models import Job
+from .notify import notify_workers
+from .worker import POLL_MIN_INTERVAL, Worker
+
+
+class AsyncWorker(Worker):
+
+
+    def __init__(self, worker_id: int, db_path: str, config: Config,
+                 concurrency: int = 10, prefetch: int = 1, queues: Optional[str] = None):
+
+        super().__init__(worker_id, db_path, config, prefetch, queues)
+
+        self.concurrency = max(1, concurrency)
+        self.inflight = 0
+        self.dbthread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='queuectl-db')
+
+        # Warm executors and python jobs block, so each concurrent job
+        # waits on them in its own thread
+        self.pool = executor_pool(config, self.concurrency)
+        self.callthreads = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='queuectl-call')
+
+    async def dbcall(self, func, *args):
+
+        return await asyncio.get_running_loop().run_in_executor(self.dbthread, func, *args)
+
+    async def executecommand_async(self, job: Job) -> tuple:
+
+        maxbytes = self.config.get('log_max_bytes', 10 * 1024 * 1024)
+        tailbytes = self.config.get('log_tail_bytes', 4096)
+        limits = job_limits(job, self.config)
+
+        if job.kind == 'python':
+            return await asyncio.get_running_loop().run_in_executor(
+                self.callthreads, self.executepython, job, limits)
+
+        outsink = LogSink(log_path(self.db_path, job.jid, 'out'), maxbytes, tailbytes)
+        errsink = LogSink(log_path(self.db_path, job.jid, 'err'), maxbytes, tailbytes)
+
+        argv = self.pool.eligible(job.command, limits) if self.pool else None
+        if argv is not None:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.callthreads, self.executepooled, argv, limits, outsink, errsink)
+
+        launcher = launch_argv(job.command, limits)
+        streams = dict(stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                       start_new_session=True)
+        try:
+            if launcher:
+                proc = await asyncio.create_subprocess_exec(*launcher, **streams)
+            else:
+                proc = await asyncio.create_subprocess_shell(job.command, **streams)
+        except Exception as e:
+            outsink.close()
+            errsink.close()
+            return -1, None, str(e)
+
+        async def drain(stream, sink):
+            while True:
+                chunk = await stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                sink.write(chunk)
+
+        readers = asyncio.gather(drain(proc.stdout, outsink), drain(proc.stderr, errsink))
+
+        timedout = False
+        try:
+            exit_code = await asyncio.wait_for(proc.wait(), timeout=limits.timeout)
+        except asyncio.TimeoutError:
+            await self.killgroup_async(proc)
+            exit_code = -1
+            timedout = True
+
+        try:
+            # a child that left the process group may still hold the pipes open
+            await asyncio.wait_for(readers, timeout=5 if timedout else None)
+        except asyncio.TimeoutError:
+            pass
+
+        if timedout:
+            errsink.write(f"Command timed out after {limits.timeout:g} seconds".encode())
+        elif describe_exit(exit_code, limits):
+            errsink.write(describe_exit(exit_code, limits))
+
+        return exit_code, outsink.close(), errsink.close()
+
+    async def killgroup_async(self, proc) -> None:
+
+        # limits.kill_group without blocking the event loop
+        if not hasattr(os, 'killpg'):
+            proc.kill()
+            await proc.wait()
+            return
+
+        signal_group(proc.pid, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=self.config.get('kill_grace_seconds', 5))
+        except asyncio.TimeoutError:
+            pass
+        signal_group(proc.pid, signal.SIGKILL)
+        await proc.wait()
+
+    async def runner(self, queue: asyncio.Queue, slotfree: asyncio.Event):
+
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+
+            self.inflight += 1
+            try:
+                if await self.dbcall(self.startjob, job):
+                    started = time.perf_counter()
+                    exit_code, output, error = await self.executecommand_async(job)
+                    self.metrics.observe('queuectl_execute_seconds', time.perf_counter() - started)
+                    await self.dbcall(self.finishjob, job, exit_code, output, error)
+            except Exception as e:
+                print(f"[Worker {self.worker_id}] Error: {e}")
+            finally:
+                self.inflight -= 1
+                slotfree.set()
+
+    async def claimloop(self, queue: asyncio.Queue, slotfree: asyncio.Event):
+
+        # The only place that claims: keeps running + queued jobs at
+        # concurrency + prefetch - 1
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        if self.listener.enabled:
+            try:
+                loop.add_reader(self.listener.sock, lambda: (self.listener.wait(0), wakeup.set()))
+            except NotImplementedError:
+                pass
+
+        capacity = self.concurrency + self.prefetch - 1
+        idle_wait = POLL_MIN_INTERVAL
+
+        while self.running:
+            free = capacity - self.inflight - queue.qsize()
+            if free <= 0:
+                slotfree.clear()
+                try:
+                    await asyncio.wait_for(slotfree.wait(), timeout=POLL_MIN_INTERVAL * 10)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                jobs = await self.dbcall(self.claim, free)
+            except Exception as e:
+                print(f"[Worker {self.worker_id}] Error: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            for job in jobs:
+                queue.put_nowait(job)
+
+            if jobs:
+                idle_wait = POLL_MIN_INTERVAL
+                continue
+
+            await self.dbcall(self.idlereap)
+
+            if self.inflight == 0:
+                # Nothing to batch with while idle
+                await self.dbcall(self.results.flush)
+                await self.dbcall(self.idlegc)
+
+            # No jobs available: wait for a wakeup or the next due job
+            wakeup.clear()
+            timeout = await self.dbcall(self.idlesleep, idle_wait)
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=timeout)
+                idle_wait = POLL_MIN_INTERVAL
+            except asyncio.TimeoutError:
+                idle_wait = min(idle_wait * 2, self.config.get('worker_poll_interval', 2))
+
+        if self.listener.enabled:
+            try:
+                loop.remove_reader(self.listener.sock)
+            except NotImplementedError:
+                pass
+
+    async def heartbeatloop_async(self):
+
+        # One lease extension per interval covers every running job
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            await self.dbcall(self.heartbeat)
+
+    async def scheduleloop_async(self):
+
+        while True:
+            try:
+                await self.dbcall(self.scheduler.tick)
+            except Exception as e:
+                print(f"[Scheduler] {e}")
+            await asyncio.sleep(await self.dbcall(self.scheduler.sleeptime))
+
+    async def main(self):
+
+        queue: asyncio.Queue = asyncio.Queue()
+        slotfree = asyncio.Event()
+
+        heartbeats = asyncio.ensure_future(self.heartbeatloop_async())
+        schedules = asyncio.ensure_future(self.scheduleloop_async())
+        runners = [asyncio.ensure_future(self.runner(queue, slotfree)) for _ in range(self.concurrency)]
+        await self.claimloop(queue, slotfree)
+
+        # Hand queued jobs back, then let running ones finish
+        queued = []
+        while not queue.empty():
+            queued.append(queue.get_nowait())
+        released = await self.dbcall(self.storage.release_jobs, [job.jid for job in queued], self.owner)
+        if released:
+            print(f"[Worker {self.worker_id}] Released {released} prefetched job(s)")
+            notify_workers(self.db_path)
+
+        for _ in runners:
+            queue.put_nowait(None)
+        await asyncio.gather(*runners)
+        await self.dbcall(self.results.flush)
+
+        heartbeats.cancel()
+        schedules.cancel()
+        await self.dbcall(self.scheduler.stop)
+
+        await self.dbcall(self.storage.close)
+
+    def run(self):
+
+        print(f"[Worker {self.worker_id}] Started async engine with concurrency {self.concurrency}")
+
+        threading.Thread(target=self.metricsloop, daemon=True).start()
+        asyncio.run(self.main())
+        self.stopped.set()
+        self.dbthread.shutdown()
+        self.listener.close()
+        self.callthreads.shutdown()
+        if self.pool:
+            self.pool.close()
+        self.python.close()
+        self.dumpmetrics()
+
+        print(f"[Worker {self.worker_id}] Stopped gracefully")
+
+        self.storage.close()
@@ -0,0 +1,340 @@
+# Benchmark suite behind `queuectl bench`
+#
+# Every scenario runs against a throwaway database in a temp directory with
+# the storage profile given, so results do not depend on the local queue:
+#   enqueue  bulk insert_jobs in chunks of 1000, then one save_job per job
+#            the way `queuectl enqueue` does
+#   claim    1-64 processes claiming, starting and completing no-op jobs
+#            until the queue is empty; fails on any double claim
+#   latency  one worker running `true` and `sleep` jobs enqueued one at a
+#            time; time from enqueue to completion
+#   queries  status, stats and listing queries on a table of --rows jobs
+# Results are one JSON document. Metrics ending in _per_sec are better
+# higher, those ending in _ms or _bytes better lower; compare() checks a
+# run against a baseline file with those directions.
+
+import json
+import multiprocessing
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Iterator, List, Optional, Tuple
+
+from .config import Config
+from .models import Job, JobState, now_micros
+from .notify import notify_workers
+from .storage import JobStorage
+
+SCENARIOS = ('enqueue', 'claim', 'latency', 'queries')
+
+# Latency changes smaller than this never count as regressions; sub-
+# millisecond timings move more than that between identical runs
+MIN_DELTA_MS = 0.5
+
+OWNER = 'bench'
+
+# Mix of states for the queries table: 10% pending, 10% failed, 10% dead
+FILL_SQL = """
+    INSERT INTO jobs (id, command, state, attempts, max_retries, created_at, updated_at, ready_at,
+                      next_retry_at, queue, priority)
+    WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < ? - 1)
+    SELECT printf('bench-%09d', i), 'true',
+           CASE i % 10 WHEN 0 THEN 'pending' WHEN 1 THEN 'failed' WHEN 2 THEN 'dead' ELSE 'completed' END,
+           i % 4, 3, ? + i * 1000, ? + i * 1000,
+           CASE i % 10 WHEN 0 THEN ? + i * 1000 WHEN 1 THEN ? + i * 1000 + 60000000 END,
+           CASE i % 10 WHEN 1 THEN ? + i * 1000 + 60000000 END,
+           CASE i % 3 WHEN 0 THEN 'default' WHEN 1 THEN 'high' ELSE 'bulk' END, i % 5
+    FROM n
+"""
+
+
+def percentiles(values: List[float]) -> dict:
+
+    # seconds -> p50/p95/p99 in milliseconds
+    if not values:
+        return {'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0}
+    ordered = sorted(values)
+
+    def pick(pct):
+        return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] * 1000, 3)
+
+    return {'p50_ms': pick(50), 'p95_ms': pick(95), 'p99_ms': pick(99)}
+
+
+def dbsize(path: str) -> int:
+
+    # database plus WAL, in bytes
+    return sum(os.path.getsize(p) for p in (path, path + '-wal') if os.path.exists(p))
+
+
+def timed(func, repeat: int) -> List[float]:
+
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def bench_enqueue(tmp: str, jobs: int, profile: str) -> dict:
+
+    path = os.path.join(tmp, 'enqueue.db')
+    storage = JobStorage(path, profile)
+
+    batch = [Job(jid=Job.generate_jid(), command='true') for _ in range(jobs)]
+    started = time.perf_counter()
+    for i in range(0, jobs, 1000):
+        storage.insert_jobs(batch[i:i + 1000], 'error')
+    bulk = time.perf_counter() - started
+
+    single = min(jobs, 2000)
+    times = timed(lambda: storage.save_job(Job(jid=Job.generate_jid(), command='true'), 'error'), single)
+    storage.close()
+
+    return {
+        'bulk_rows_per_sec': round(jobs / bulk),
+        'single_jobs_per_sec': round(single / sum(times)),
+        **percentiles(times),
+        'db_bytes': dbsize(path),
+    }
+
+
+def claimloop(path: str, profile: str, worker: int, start, results) -> None:
+
+    # claim, start and complete one job at a time, as a worker with
+    # prefetch 1 and result batch 1 does, without running anything
+    storage = JobStorage(path, profile)
+    owner = f"{OWNER}:{worker}"
+    claimed, times = [], []
+
+    start.wait()
+    while True:
+        started = time.perf_counter()
+        jobs = storage.claim_batch(1, owner)
+        if not jobs:
+            break
+        job = jobs[0]
+        storage.mark_processing(job, owner)
+        job.exit_code = 0
+        storage.mark_completed(job, owner)
+        times.append(time.perf_counter() - started)
+        claimed.append(job.jid)
+
+    storage.close()
+    results.put((claimed, times))
+
+
+def bench_claim(tmp: str, jobs: int, workers: List[int], profile: str) -> dict:
+
+    result = {}
+    for count in workers:
+        path = os.path.join(tmp, f"claim-{count}.db")
+        storage = JobStorage(path, profile)
+        storage.insert_jobs([Job(jid=Job.generate_jid(), command='true') for _ in range(jobs)])
+        storage.close()
+
+        start = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=claimloop, args=(path, profile, w, start, results))
+                 for w in range(count)]
+        for proc in procs:
+            proc.start()
+
+        started = time.perf_counter()
+        start.set()
+        claimed, times = [], []
+        for _ in procs:
+            ids, durations = results.get()
+            claimed.extend(ids)
+            times.extend(durations)
+        elapsed = time.perf_counter() - started
+        for proc in procs:
+            proc.join()
+
+        doubles = sum(1 for c in Counter(claimed).values() if c > 1)
+        if doubles or len(claimed) != jobs:
+            raise RuntimeError(f"{count} workers: {len(claimed)} claims for {jobs} jobs, {doubles} doubles")
+
+        result[f"workers_{count}"] = {
+            'jobs_per_sec': round(jobs / elapsed),
+            **percentiles(times),
+        }
+    return result
+
+
+def workerloop(path: str, profile: str, stop) -> None:
+
+    from .worker import Worker
+
+    # the worker's storage reads its profile from the config in the cwd
+    sys.stdout = open(os.devnull, 'w')
+    os.chdir(os.path.dirname(path))
+    config = Config()
+    config.set('storage_profile', profile)
+
+    worker = Worker(1, path, config)
+    threading.Thread(target=lambda: (stop.wait(), worker.stop()), daemon=True).start()
+    worker.run()
+
+
+def bench_latency(tmp: str, jobs: int, profile: str) -> dict:
+
+    result = {}
+    for name, command in (('noop', 'true'), ('sleep', 'sleep 0.05')):
+        path = os.path.join(tmp, f"latency-{name}.db")
+        storage = JobStorage(path, profile)
+
+        stop = multiprocessing.Event()
+        proc = multiprocessing.Process(target=workerloop, args=(path, profile, stop))
+        proc.start()
+        time.sleep(0.5)
+
+        # an idle queue each time: gaps longer than the job itself
+        ids = []
+        for _ in range(jobs):
+            job = Job(jid=Job.generate_jid(), command=command)
+            storage.save_job(job, 'error')
+            notify_workers(path)
+            ids.append(job.jid)
+            time.sleep(0.02 if name == 'noop' else 0.07)
+
+        deadline = time.monotonic() + 30 + jobs * 0.1
+        while storage.get_job_counts()[JobState.COMPLETED.value] < jobs and time.monotonic() < deadline:
+            time.sleep(0.05)
+        stop.set()
+        proc.join()
+
+        times = []
+        for jid in ids:
+            job = storage.get_job(jid)
+            if job.state != JobState.COMPLETED:
+                raise RuntimeError(f"job {jid} did not complete ({job.state.value})")
+            times.append((job.updated_at - job.created_at).total_seconds())
+        storage.close()
+
+        result[name] = percentiles(times)
+    return result
+
+
+def bench_queries(tmp: str, rows: int, repeat: int, profile: str) -> dict:
+
+    path = os.path.join(tmp, 'queries.db')
+    storage = JobStorage(path, profile)
+
+    # rows are generated inside SQLite; going through insert_jobs would
+    # make the fill the slowest part of the suite
+    base = now_micros() - rows * 1000 - 60_000_000
+    conn = sqlite3.connect(path)
+    started = time.perf_counter()
+    with conn:
+        conn.execute(FILL_SQL, (rows, base, base, base, base, base))
+    fill = time.perf_counter() - started
+    conn.close()
+
+    middle = storage.get_job(f"bench-{rows // 2:09d}")
+    after = (int(middle.created_at.timestamp() * 1_000_000), middle.jid) if middle else None
+
+    def claim():
+        jobs = storage.claim_batch(10, OWNER)
+        storage.release_jobs([job.jid for job in jobs], OWNER)
+
+    queries = {
+        'status': storage.get_job_counts,
+        'status_exact': lambda: storage.get_job_counts(exact=True),
+        'stats': storage.get_job_stats,
+        'list_first_page': lambda: list(storage.iter_job_summaries(limit=50)),
+        'list_dead_page': lambda: list(storage.iter_job_summaries(JobState.DEAD, limit=50)),
+        'list_deep_page': lambda: list(storage.iter_job_summaries(limit=50, after=after)),
+        'info': lambda: storage.get_job(middle.jid if middle else ''),
+        'claim_release_10': claim,
+        'claim_queues_10': lambda: storage.release_jobs(
+            [job.jid for job in storage.claim_batch(10, OWNER, queues=['high', 'default', 'bulk'])], OWNER),
+    }
+
+    result = {'rows': rows, 'fill_rows_per_sec': round(rows / fill)}
+    for name, func in queries.items():
+        func()
+        result[name] = percentiles(timed(func, repeat))
+    storage.close()
+
+    result['db_bytes'] = dbsize(path)
+    return result
+
+
+def run(scenarios: List[str], jobs: int = 10000, claim_jobs: int = 2000,
+        workers: Optional[List[int]] = None, latency_jobs: int = 100, rows: int = 1_000_000,
+        repeat: int = 20, profile: str = 'balanced', progress=None) -> dict:
+
+    workers = workers or [1, 2, 4, 8, 16, 32, 64]
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'profile': profile,
+            'params': {'jobs': jobs, 'claim_jobs': claim_jobs, 'workers': workers,
+                       'latency_jobs': latency_jobs, 'rows': rows, 'repeat': repeat},
+        },
+        'results': {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in scenarios:
+            if progress:
+                progress(name)
+            started = time.perf_counter()
+            if name == 'enqueue':
+                result = bench_enqueue(tmp, jobs, profile)
+            elif name == 'claim':
+                result = bench_claim(tmp, claim_jobs, workers, profile)
+            elif name == 'latency':
+                result = bench_latency(tmp, latency_jobs, profile)
+            else:
+                result = bench_queries(tmp, rows, repeat, profile)
+            result['seconds'] = round(time.perf_counter() - started, 2)
+            report['results'][name] = result
+
+    return report
+
+
+def metrics(results: dict, prefix: str = '') -> Iterator[Tuple[str, float]]:
+
+    # ('claim.workers_8.jobs_per_sec', 1234), ... for every comparable value
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from metrics(value, name + '.')
+        elif isinstance(value, (int, float)) and key.endswith(('_per_sec', '_ms', '_bytes')):
+            yield name, value
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[dict]:
+
+    # One entry per metric present in both runs; regressed when the value
+    # is worse than the baseline by more than tolerance (0.2 = 20%)
+    old = dict(metrics(baseline.get('results', {})))
+    rows = []
+    for name, value in metrics(report['results']):
+        if name not in old or not old[name]:
+            continue
+        change = (value - old[name]) / old[name]
+        worse = -change if name.endswith('_per_sec') else change
+        regressed = worse > tolerance
+        if name.endswith('_ms') and value - old[name] < MIN_DELTA_MS:
+            regressed = False
+        rows.append({'metric': name, 'baseline': old[name], 'value': value,
+                     'change': round(change, 4), 'regressed': regressed})
+    return rows
+
+
+def load(path: str) -> dict:
+
+    with open(path) as f:
+        return json.load(f)
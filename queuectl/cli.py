@@ -3,13 +3,26 @@
 
 import click
 import json
+import os
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 from tabulate import tabulate
-from .storage import JobStorage
-from .models import Job, JobState
+from .storage import CONFLICT_MODES, JobStorage, STORAGE_PROFILES
+from .cron import CronExpr
+from .models import TEMPLATE_FIELDS, Job, JobState, Schedule, from_micros, from_now, parse_depends_on, to_micros
 from .config import Config
+from . import bench as bench_suite
+from .executor import parse_preload
+from .joblog import CHUNK_SIZE, log_path, remove_logs
+from .metrics import prune_snapshots, render, serve, write_textfile
+from .notify import notify_workers
+from .queues import DEFAULT_QUEUE, MAX_PRIORITY, QUEUE_NAME, parse_queues
+from .retention import archive_path, collect
+from .retry import JITTERS, STRATEGIES, parse_exit_codes, parse_policy
+from .worker import parse_call
 from .worker_manager import WorkerManager
 
 
@@ -20,13 +33,219 @@ def cli():
     pass
 
 
+def parserunat(value) -> datetime:
+    # ISO-8601 time to a naive local datetime; offsets (and Z) are honoured
+
+    if not isinstance(value, str):
+        raise ValueError("'run_at' must be an ISO-8601 string")
+
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    runat = datetime.fromisoformat(value)
+    if runat.tzinfo is not None:
+        # through the epoch, so a time in a repeated DST hour keeps its fold
+        runat = from_micros(to_micros(runat))
+    return runat
+
+
+def buildjob(jdata: dict, config: Config, run_at: Optional[str] = None, delay: Optional[float] = None) -> Job:
+    # turn one parsed JSON object into a pending Job; run_at/delay apply
+    # to jobs that do not schedule themselves
+
+    if not isinstance(jdata, dict):
+        raise ValueError("job must be a JSON object")
+
+    # python jobs call target ("pkg.mod:func") instead of running a command
+    kind = jdata.get('type', 'shell')
+    args = kwargs = None
+    if kind == 'python':
+        command, args, kwargs = parse_call(jdata)
+    elif kind == 'shell':
+        # check required fields
+        if 'command' not in jdata:
+            raise ValueError("'command' field is required in JSON")
+
+        if not isinstance(jdata['command'], str):
+            raise ValueError("'command' must be a string")
+        command = jdata['command']
+    else:
+        raise ValueError("'type' must be 'shell' or 'python'")
+
+    # optional resource limits; 0 disables a limit
+    limits = {}
+    for key in ('timeout_seconds', 'max_memory_mb', 'max_cpu_seconds', 'nice'):
+        if jdata.get(key) is None:
+            continue
+        value = jdata[key]
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f"'{key}' must be an integer")
+        if key == 'nice' and not -20 <= value <= 19:
+            raise ValueError("'nice' must be between -20 and 19")
+        if key == 'nice' and value < 0 and hasattr(os, 'geteuid') and os.geteuid() != 0:
+            raise ValueError("a negative 'nice' needs root")
+        if key != 'nice' and value < 0:
+            raise ValueError(f"'{key}' must not be negative")
+        limits[key] = value
+
+    queue = jdata.get('queue') or DEFAULT_QUEUE
+    if not isinstance(queue, str) or not QUEUE_NAME.match(queue):
+        raise ValueError("'queue' must be 1-64 letters, digits, '.', '_' or '-'")
+
+    priority = jdata.get('priority', 0)
+    if isinstance(priority, bool) or not isinstance(priority, int) or abs(priority) > MAX_PRIORITY:
+        raise ValueError(f"'priority' must be an integer between -{MAX_PRIORITY} and {MAX_PRIORITY}")
+
+    policy = parse_policy(jdata['retry_policy']) if jdata.get('retry_policy') is not None else None
+
+    # ids of jobs that must complete first
+    depends_on = parse_depends_on(jdata.get('depends_on'))
+
+    # enqueues with the same key within the window are duplicates
+    key = jdata.get('idempotency_key')
+    if key is not None and (not isinstance(key, str) or not 0 < len(key) <= 255):
+        raise ValueError("'idempotency_key' must be a string of 1-255 characters")
+
+    window = jdata.get('dedupe_window', config.get('dedupe_window_seconds', 0))
+    if isinstance(window, bool) or not isinstance(window, (int, float)) or window < 0:
+        raise ValueError("'dedupe_window' must be a non-negative number of seconds")
+    dedupe_until = from_now(window) if key and window else None
+
+    # scheduling: an absolute run_at or a delay_seconds from now
+    if 'run_at' in jdata or 'delay_seconds' in jdata:
+        run_at, delay = jdata.get('run_at'), jdata.get('delay_seconds')
+        if run_at is not None and delay is not None:
+            raise ValueError("give either 'run_at' or 'delay_seconds', not both")
+
+    runat = None
+    if run_at is not None:
+        runat = parserunat(run_at)
+    elif delay is not None:
+        if isinstance(delay, bool) or not isinstance(delay, (int, float)) or delay < 0:
+            raise ValueError("'delay_seconds' must be a non-negative number")
+        runat = from_now(delay)
+
+    return Job(
+        jid=jdata.get('id') or Job.generate_jid(),  # Use jid parameter, read from 'id' key in JSON
+        command=command,
+        state=JobState.PENDING,
+        attempts=jdata.get('attempts', 0),
+
+        max_retries=jdata.get('max_retries', config.get('max_retries', 3)),
+
+        created_at=datetime.now() if 'created_at' not in jdata else datetime.fromisoformat(jdata['created_at']),
+        updated_at=datetime.now() if 'updated_at' not in jdata else datetime.fromisoformat(jdata['updated_at']),
+        queue=queue,
+        priority=priority,
+        run_at=runat,
+        retry_policy=policy,
+        kind=kind,
+        args=args,
+        kwargs=kwargs,
+        depends_on=depends_on,
+        idempotency_key=key,
+        dedupe_until=dedupe_until,
+        **limits
+    )
+
+
+def enqueuefile(jobfile, db: str, chunk_size: int, run_at: Optional[str] = None,
+                delay: Optional[float] = None, on_conflict: str = 'error') -> None:
+    # stream NDJSON and insert one chunk per transaction
+
+    storage = JobStorage(db)
+    config = Config()
+
+    inserted = 0
+    skipped = 0
+    errors = 0
+    chunk = []
+    started = time.perf_counter()
+
+    def insert(chunk) -> int:
+        # a chunk with a bad depends_on or a conflict in error mode is
+        # retried line by line, so only the offending jobs are rejected
+        nonlocal errors, skipped
+        try:
+            count = storage.insert_jobs([job for _, job in chunk], on_conflict)
+            skipped += len(chunk) - count
+            return count
+        except ValueError:
+            pass
+
+        count = 0
+        for lineno, job in chunk:
+            try:
+                written = storage.insert_jobs([job], on_conflict)
+            except ValueError as e:
+                errors += 1
+                click.echo(f"Line {lineno}: {e}", err=True)
+                continue
+            count += written
+            skipped += 1 - written
+        return count
+
+    for lineno, line in enumerate(jobfile, start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            chunk.append((lineno, buildjob(json.loads(line), config, run_at, delay)))
+        except (ValueError, TypeError) as e:
+            # JSONDecodeError is a ValueError
+            errors += 1
+            click.echo(f"Line {lineno}: {e}", err=True)
+            continue
+
+        if len(chunk) >= chunk_size:
+            inserted += insert(chunk)
+            chunk = []
+
+    inserted += insert(chunk)
+    elapsed = time.perf_counter() - started
+
+    if inserted:
+        notify_workers(db)
+
+    rate = inserted / elapsed if elapsed > 0 else 0.0
+    click.echo(f" Enqueued {inserted} job(s) in {elapsed:.2f}s ({rate:.0f} rows/sec), "
+               f"{skipped} duplicate(s) skipped, {errors} error(s)")
+
+    if errors:
+        sys.exit(1)
+
+
 @cli.command()
-@click.argument('jsonjob')
+@click.argument('jsonjob', required=False)
+@click.option('--file', 'jobfile', type=click.File('r'), help='NDJSON file with one job per line, - for stdin')
+@click.option('--chunk-size', default=1000, type=click.IntRange(min=1), help='Jobs per insert transaction with --file')
+@click.option('--run-at', default=None, help='Run no earlier than this ISO-8601 time')
+@click.option('--delay', default=None, type=click.FloatRange(min=0), help='Run no earlier than this many seconds from now')
+@click.option('--on-conflict', type=click.Choice(CONFLICT_MODES), default=None,
+              help='When the id or idempotency key is taken (default: enqueue-conflict config)')
 @click.option('--db', default='queuectl.db', help='Database path')
-def enqueue(jsonjob, db):
+def enqueue(jsonjob, jobfile, chunk_size, run_at, delay, on_conflict, db):
     
         #queuectl enqueue '{"id":"job1","command":"sleep 2"}'
+        #queuectl enqueue --file jobs.jsonl
+        #queuectl enqueue --delay 60 '{"command":"make report"}'
    
+    if run_at is not None and delay is not None:
+        click.echo("Error: use either --run-at or --delay", err=True)
+        sys.exit(1)
+
+    if on_conflict is None:
+        on_conflict = Config().get('enqueue_conflict', 'error')
+
+    if jobfile is not None:
+        enqueuefile(jobfile, db, chunk_size, run_at, delay, on_conflict)
+        return
+
+    if jsonjob is None:
+        click.echo("Error: pass a JSON job or --file", err=True)
+        click.echo("Example: queuectl enqueue '{\"id\":\"job1\",\"command\":\"sleep 2\"}'", err=True)
+        sys.exit(1)
+
     try:
         # Parse JSON input
         cleanedjson = jsonjob.strip()
@@ -42,7 +261,7 @@ def enqueue(jsonjob, db):
         jdata = json.loads(cleanedjson)
         
         # check required fields
-        if 'command' not in jdata:
+        if 'command' not in jdata and jdata.get('type', 'shell') == 'shell':
 
 
 
@@ -51,30 +270,23 @@ def enqueue(jsonjob, db):
             click.echo("Example: queuectl enqueue '{\"id\":\"job1\",\"command\":\"sleep 2\"}'", err=True)
             sys.exit(1)
         
-        # unique job id generatgion
-        if 'id' not in jdata:
-            jdata['id'] = Job.generate_jid()
-        
         # default jobs generation
         storage = JobStorage(db)
 
-        config = Config()
+        job = buildjob(jdata, Config(), run_at, delay)
         
-        job = Job(
-            jid=jdata['id'],  # Use jid parameter, read from 'id' key in JSON
-            command=jdata['command'],
-            state=JobState.PENDING,
-            attempts=jdata.get('attempts', 0),
-
-            max_retries=jdata.get('max_retries', config.get('max_retries', 3)),
-
-            created_at=datetime.utcnow() if 'created_at' not in jdata else datetime.fromisoformat(jdata['created_at']),
-            updated_at=datetime.utcnow() if 'updated_at' not in jdata else datetime.fromisoformat(jdata['updated_at'])
-
-        )
-        
-        storage.save_job(job)
-        click.echo(f" Job {job.jid} enqueued successfully")  # Use job.jid
+        outcome = storage.save_job(job, on_conflict)
+        if outcome == 'skipped':
+            click.echo(f" Duplicate of job {job.jid}, skipped")
+            return
+
+        notify_workers(db)
+        if outcome == 'replaced':
+            click.echo(f" Job {job.jid} replaced")
+        elif job.run_at:
+            click.echo(f" Job {job.jid} scheduled for {job.run_at.isoformat(sep=' ', timespec='seconds')}")
+        else:
+            click.echo(f" Job {job.jid} enqueued successfully")  # Use job.jid
     
     except json.JSONDecodeError as e:
         click.echo(f"Error: Invalid JSON format - {e}", err=True)
@@ -100,15 +312,26 @@ def worker():
 @click.option('--db', default='queuectl.db', help='Database path')
 
 @click.option('--background/--foreground', default=True, help='Run in background (default) or foreground')
-def start(count, db, background):
+@click.option('--prefetch', default=1, type=click.IntRange(min=1), help='Jobs each worker leases per claim')
+@click.option('--engine', default='process', type=click.Choice(['process', 'async']), help='One job at a time per worker (process) or many via asyncio (async)')
+@click.option('--concurrency', default=10, type=click.IntRange(min=1), help='Concurrent jobs per worker with --engine async')
+@click.option('--queues', default=None, help='Queues to serve, e.g. high,default (strict) or high:5,default:1 (weighted)')
+def start(count, db, background, prefetch, engine, concurrency, queues):
     # start process
+    if queues is not None:
+        try:
+            parse_queues(queues)
+        except ValueError as e:
+            click.echo(f"Error: --queues: {e}", err=True)
+            sys.exit(1)
+
     manager = WorkerManager(db)
     
     if background:
         
         click.echo(f"Starting {count} worker(s) in background...")
 
-        manager.start_workers_background(count)
+        manager.startworkbackground(count, prefetch, engine, concurrency, queues)
         click.echo(f" Started {count} worker(s)")
 
 
@@ -121,7 +344,7 @@ def start(count, db, background):
         click.echo(f"Starting {count} worker(s) in foreground (Press Ctrl+C to stop)...")
 
 
-        manager.start_workers(count)
+        manager.start_workers(count, prefetch, engine, concurrency, queues)
 
 
 @worker.command()
@@ -158,17 +381,23 @@ def status(db):
 
 
 @cli.command()
+@click.option('--exact', is_flag=True, help='Recount jobs by state and correct the cached counters')
 @click.option('--db', default='queuectl.db', help='Database path')
-def status(db):
+def status(exact, db):
     # summary of wokrs
 
 
 
-    storage = JobStorage(db)
+    # --exact rewrites the counters; a plain status only reads
+    storage = JobStorage(db, readonly=not exact)
     manager = WorkerManager(db)
     
-    # Get counts
-    counts = storage.get_job_counts()
+    # Get counts; kept by triggers, --exact recounts the table
+    if exact:
+        counts, drift = storage.reconcile_job_counts()
+    else:
+        counts = storage.get_job_counts()
+    stats = storage.get_job_stats()
     
     # worker status
     workstats = manager.workerstatus()
@@ -191,17 +420,81 @@ def status(db):
         tabledata.append([state.value.upper(), count])
     
     click.echo(tabulate(tabledata, headers=['State', 'Count'], tablefmt='grid'))
+
+    if exact:
+        if drift:
+            fixes = ', '.join(f"{state} {change:+d}" for state, change in sorted(drift.items()))
+            click.echo(f"Counters corrected: {fixes}")
+        else:
+            click.echo("Counters verified")
+
+    click.echo(f"\n{'THROUGHPUT':-^50}")
+    tabledata = []
+    for window, row in stats['windows'].items():
+        runtime = row['mean_runtime']
+        tabledata.append([
+            f"{window} min",
+            f"{row['completed'] * 60 / row['seconds']:.1f}",
+            row['failed'],
+            row['dead'],
+            f"{runtime:.3f}s" if runtime is not None else '-',
+        ])
+    click.echo(tabulate(tabledata, headers=['Window', 'Completed/min', 'Failed', 'Dead', 'Mean Runtime'],
+                        tablefmt='grid', disable_numparse=True))
+
+    oldest = stats['oldest_ready_at']
+    if oldest:
+        click.echo(f"Oldest waiting job: ready {(datetime.now() - oldest).total_seconds():.1f}s ago")
+    else:
+        click.echo("Oldest waiting job: none")
     click.echo()
+    storage.close()
+
+
+def clip(text, width: int) -> str:
+
+    if not text:
+        return '-'
+    text = ' '.join(text.split())
+    return text[:width - 3] + '...' if len(text) > width else text
+
+
+def streamrows(rows, headers, widths) -> int:
+    # print fixed-width rows as they arrive; returns how many were printed
+
+    line = lambda cells: ' | '.join(str(c).ljust(w) for c, w in zip(cells, widths)).rstrip()
+    count = 0
+
+    for row in rows:
+        if count == 0:
+            click.echo(line(headers))
+            click.echo('-+-'.join('-' * w for w in widths))
+        click.echo(line(row))
+        count += 1
+
+    return count
+
+
+def parseafter(value: str):
+    # '<created_at>,<id>' as printed by the previous page
+
+    created, _, jid = value.partition(',')
+    try:
+        return to_micros(datetime.fromisoformat(created)), jid
+    except ValueError:
+        raise click.BadParameter("expected '<created_at>,<id>', e.g. the 'Next page' hint of the last listing")
 
 
 @cli.command()
 @click.option('--state', help='Filter by job state (pending, processing, completed, failed, dead)')
+@click.option('--limit', type=click.IntRange(min=1), help='Show at most this many jobs')
+@click.option('--after', help='Continue after <created_at,id> from the previous page')
 
 
 @click.option('--db', default='queuectl.db', help='Database path')
-def list(state, db):
+def list(state, limit, after, db):
     """List jobs, optionally filtered by state"""
-    storage = JobStorage(db)
+    storage = JobStorage(db, readonly=True)
     
     if state:
         # chekc state
@@ -210,43 +503,41 @@ def list(state, db):
             click.echo(f"Error: Invalid state. Must be one of: {', '.join(validstates)}", err=True)
             sys.exit(1)
 
-        jobs = storage.list_jobs(JobState(state)) 
-
-
         title = f"JOBS - {state.upper()}"
     else:
-        jobs = storage.list_jobs() 
-
-
         title = "ALL JOBS"
-    
-    if not jobs:
-        click.echo(f"\nNo jobs found{' with state ' + state if state else ''}")
-        return
+
+    summaries = storage.iter_job_summaries(JobState(state) if state else None, limit,
+                                           parseafter(after) if after else None)
     
     click.echo(f"\n{title:-^80}")
-    
-    tabledata = []
-    for job in jobs:
-        tabledata.append([
-            job.jid[:12] + '...' if len(job.jid) > 12 else job.jid,
-
 
-            job.command[:30] + '...' if len(job.command) > 30 else job.command,
-            job.state.value,
-            f"{job.attempts}/{job.max_retries}",
+    last = None
+
+    def rows():
+        nonlocal last
+        for job in summaries:
+            last = job
+            yield [
+                clip(job.jid, 36),
+                clip(job.command, 33),
+                job.state.value,
+                f"{job.attempts}/{job.max_retries}",
+                str(job.created_at)[:19] if job.created_at else '-',
+                clip(job.error, 33)
+            ]
 
-
-            str(job.created_at)[:19] if job.created_at else '-',
-            (job.error[:30] + '...' if job.error and len(job.error) > 30 
-             else job.error or '-')
-        ])
-    
     headers = ['Job ID', 'Command', 'State', 'Attempts', 'Created', 'Error']
+    total = streamrows(rows(), headers, [36, 33, 10, 8, 19, 33])
 
+    if not total:
+        click.echo(f"\nNo jobs found{' with state ' + state if state else ''}")
+        return
 
-    click.echo(tabulate(tabledata, headers=headers, tablefmt='grid'))
-    click.echo(f"\nTotal: {len(jobs)} job(s)\n")
+    click.echo(f"\nTotal: {total} job(s)")
+    if limit and total == limit:
+        click.echo(f"Next page: --after '{last.created_at.isoformat()},{last.jid}'")
+    click.echo()
 
 
 @cli.group()
@@ -259,36 +550,30 @@ def dlq():
 @click.option('--db', default='queuectl.db', help='Database path')
 def list(db):
     
-    storage = JobStorage(db)
-
-
-    jobs = storage.list_jobs(JobState.DEAD)  
-    
-    if not jobs:
-        click.echo("\nNo jobs in Dead Letter Queue")
+    storage = JobStorage(db, readonly=True)
 
-        return
-    
     click.echo(f"\n{'DEAD LETTER QUEUE':-^80}")
-    
-    tabledata = []
-    for job in jobs:
-
 
-        tabledata.append([
-            job.jid[:12] + '...' if len(job.jid) > 12 else job.jid,
-            job.command[:30] + '...' if len(job.command) > 30 else job.command,
+    rows = (
+        [
+            clip(job.jid, 36),
+            clip(job.command, 33),
             job.attempts,
-
             str(job.created_at)[:19] if job.created_at else '-',
-            (job.error[:40] + '...' if job.error and len(job.error) > 40 
-             else job.error or '-')
-        ])
+            clip(job.error, 43)
+        ]
+        for job in storage.iter_job_summaries(JobState.DEAD)
+    )
     
     headers = ['Job ID', 'Command', 'Attempts', 'Created', 'Last Error']
+    total = streamrows(rows, headers, [36, 33, 8, 19, 43])
+
+    if not total:
+        click.echo("\nNo jobs in Dead Letter Queue")
+
+        return
 
-    click.echo(tabulate(tabledata, headers=headers, tablefmt='grid'))
-    click.echo(f"\nTotal: {len(jobs)} job(s) in DLQ\n")
+    click.echo(f"\nTotal: {total} job(s) in DLQ\n")
 
 
 @dlq.command()
@@ -311,13 +596,11 @@ def retry(jid, db):
         sys.exit(1)
     
     # reset
-    job.state = JobState.PENDING 
-    job.attempts = 0
-    job.error = None  
-    job.next_retry_at = None
-    job.updated_at = datetime.utcnow()
-    
-    storage.save_job(job)  #
+    if not storage.requeue_dead(jid):
+        click.echo(f"Error: Job {jid} left the DLQ before it could be retried", err=True)
+        sys.exit(1)
+
+    notify_workers(db)
 
     click.echo(f" Job {jid} moved from DLQ to pending queue")
 
@@ -343,9 +626,96 @@ def remove(jid, db):
         sys.exit(1)
     
     storage.delete_job(jid)
+    remove_logs(db, jid)
     click.echo(f" Job {jid} removed from DLQ")
 
 
+@cli.group()
+def schedule():
+    # Recurring jobs
+    pass
+
+
+@schedule.command()
+@click.argument('name')
+@click.argument('cron')
+@click.argument('jobjson')
+@click.option('--db', default='queuectl.db', help='Database path')
+def add(name, cron, jobjson, db):
+    # NAME runs JOBJSON at every tick of CRON, e.g. '*/15 * * * *' or @daily
+
+    if not QUEUE_NAME.match(name):
+        click.echo("Error: Schedule name must be 1-64 letters, digits, '.', '_' or '-'", err=True)
+        sys.exit(1)
+
+    try:
+        expr = CronExpr(cron)
+        jdata = json.loads(jobjson)
+        if isinstance(jdata, dict):
+            for key in ('id', 'run_at', 'delay_seconds'):
+                if key in jdata:
+                    raise ValueError(f"'{key}' is set by the schedule")
+            for key in ('depends_on', 'idempotency_key', 'dedupe_window'):
+                if key in jdata:
+                    raise ValueError(f"recurring jobs cannot have '{key}'")
+        job = buildjob(jdata, Config())
+    except (ValueError, TypeError) as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+    now = datetime.now()
+    entry = Schedule(name=name, cron=expr.expr, template={f: getattr(job, f) for f in TEMPLATE_FIELDS},
+                     next_run_at=expr.next_after(now), created_at=now)
+
+    storage = JobStorage(db)
+    if not storage.add_schedule(entry):
+        click.echo(f"Error: Schedule {name} already exists", err=True)
+        sys.exit(1)
+
+    click.echo(f" Schedule {name} added, next run at {entry.next_run_at.isoformat(sep=' ')}")
+
+
+@schedule.command('list')
+@click.option('--db', default='queuectl.db', help='Database path')
+def listschedules(db):
+
+    storage = JobStorage(db, readonly=True)
+    schedules = storage.list_schedules()
+
+    if not schedules:
+        click.echo("\nNo schedules")
+        return
+
+    tabledata = [
+        [
+            clip(entry.name, 20),
+            entry.cron,
+            clip(entry.template['command'], 33),
+            entry.template['queue'],
+            str(entry.next_run_at)[:19],
+            str(entry.last_run_at)[:19] if entry.last_run_at else '-'
+        ]
+        for entry in schedules
+    ]
+    click.echo(tabulate(tabledata, headers=['Name', 'Cron', 'Command', 'Queue', 'Next Run', 'Last Run'],
+                        tablefmt='grid'))
+    click.echo(f"\nTotal: {len(schedules)} schedule(s)\n")
+
+
+@schedule.command('remove')
+@click.argument('name')
+@click.option('--db', default='queuectl.db', help='Database path')
+def removeschedule(name, db):
+    # jobs already enqueued by the schedule are left alone
+
+    storage = JobStorage(db)
+    if not storage.remove_schedule(name):
+        click.echo(f"Error: Schedule {name} not found", err=True)
+        sys.exit(1)
+
+    click.echo(f" Schedule {name} removed")
+
+
 @cli.group()
 def config():
 
@@ -365,15 +735,86 @@ def set(key, value, db):
     kmap = {
         'max-retries': 'max_retries',
         'backoff-base': 'backoff_base',
-        'worker-poll-interval': 'worker_poll_interval'
+        'backoff-strategy': 'backoff_strategy',
+        'backoff-max-seconds': 'backoff_max_seconds',
+        'backoff-jitter': 'backoff_jitter',
+        'retry-exit-codes': 'retry_exit_codes',
+        'enqueue-conflict': 'enqueue_conflict',
+        'dedupe-window-seconds': 'dedupe_window_seconds',
+        'worker-poll-interval': 'worker_poll_interval',
+        'lease-seconds': 'lease_seconds',
+        'heartbeat-interval': 'heartbeat_interval',
+        'job-timeout-seconds': 'job_timeout_seconds',
+        'job-max-memory-mb': 'job_max_memory_mb',
+        'job-max-cpu-seconds': 'job_max_cpu_seconds',
+        'job-nice': 'job_nice',
+        'kill-grace-seconds': 'kill_grace_seconds',
+        'python-processes': 'python_processes',
+        'executor': 'executor',
+        'executor-preload': 'executor_preload',
+        'executor-max-jobs': 'executor_max_jobs',
+        'executor-max-rss-mb': 'executor_max_rss_mb',
+        'queues': 'queues',
+        'queue-starvation-seconds': 'queue_starvation_seconds',
+        'scheduler-lock-seconds': 'scheduler_lock_seconds',
+        'storage-profile': 'storage_profile',
+        'retention-completed-days': 'retention_completed_days',
+        'retention-max-completed': 'retention_max_completed',
+        'retention-dead-days': 'retention_dead_days',
+        'gc-interval': 'gc_interval',
+        'result-batch-size': 'result_batch_size',
+        'result-flush-ms': 'result_flush_ms',
+        'metrics-interval': 'metrics_interval'
+    }
+
+    # keys that take a name instead of an integer
+    choices = {
+        'storage_profile': tuple(STORAGE_PROFILES),
+        'backoff_strategy': STRATEGIES,
+        'backoff_jitter': JITTERS,
+        'executor': ('spawn', 'pool'),
+        'enqueue_conflict': CONFLICT_MODES
+    }
+
+    # keys that take a spec checked by a parser
+    parsers = {
+        'queues': parse_queues,
+        'retry_exit_codes': parse_exit_codes,
+        'executor_preload': parse_preload
     }
     
     if key not in kmap:
         click.echo(f"Error: Invalid config key. check: {', '.join(kmap.keys())}", err=True)
         sys.exit(1)
+
+    if kmap[key] in parsers:
+        try:
+            parsers[kmap[key]](value)
+        except ValueError as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
+
+        config.set(kmap[key], value)
+        click.echo(f" Configuration updated: {key} = {value}")
+        return
+
+    if kmap[key] in choices:
+        if value not in choices[kmap[key]]:
+            click.echo(f"Error: Value must be one of: {', '.join(choices[kmap[key]])}", err=True)
+            sys.exit(1)
+
+        config.set(kmap[key], value)
+        click.echo(f" Configuration updated: {key} = {value}")
+        return
     
     try:
         value = int(value)
+        if kmap[key] == 'backoff_max_seconds' and value < 1:
+            click.echo("Error: backoff-max-seconds must be at least 1", err=True)
+            sys.exit(1)
+        if kmap[key] == 'metrics_interval' and value < 0:
+            click.echo("Error: metrics-interval must be 0 (off) or more seconds", err=True)
+            sys.exit(1)
         config.set(kmap[key], value)  
 
         click.echo(f" Configuration updated: {key} = {value}")
@@ -393,45 +834,263 @@ def show(db):
     tabledata = [
         ['max-retries', config.get('max_retries')],
         ['backoff-base', config.get('backoff_base')],
+        ['backoff-strategy', config.get('backoff_strategy')],
+        ['backoff-max-seconds', config.get('backoff_max_seconds')],
+        ['backoff-jitter', config.get('backoff_jitter')],
+        ['retry-exit-codes', config.get('retry_exit_codes') or 'any'],
+        ['enqueue-conflict', config.get('enqueue_conflict')],
+        ['dedupe-window-seconds', config.get('dedupe_window_seconds') or 'forever'],
+        ['worker-poll-interval', config.get('worker_poll_interval')],
+        ['lease-seconds', config.get('lease_seconds')],
+        ['heartbeat-interval', config.get('heartbeat_interval')],
+        ['job-timeout-seconds', config.get('job_timeout_seconds')],
+        ['job-max-memory-mb', config.get('job_max_memory_mb')],
+        ['job-max-cpu-seconds', config.get('job_max_cpu_seconds')],
+        ['job-nice', config.get('job_nice')],
+        ['kill-grace-seconds', config.get('kill_grace_seconds')],
+        ['python-processes', config.get('python_processes')],
+        ['executor', config.get('executor')],
+        ['executor-preload', config.get('executor_preload') or '-'],
+        ['executor-max-jobs', config.get('executor_max_jobs')],
+        ['executor-max-rss-mb', config.get('executor_max_rss_mb')],
+        ['queues', config.get('queues')],
+        ['queue-starvation-seconds', config.get('queue_starvation_seconds')],
+        ['scheduler-lock-seconds', config.get('scheduler_lock_seconds')],
+        ['storage-profile', config.get('storage_profile')],
+        ['retention-completed-days', config.get('retention_completed_days')],
+        ['retention-max-completed', config.get('retention_max_completed')],
+        ['retention-dead-days', config.get('retention_dead_days')],
+        ['gc-interval', config.get('gc_interval')],
+        ['result-batch-size', config.get('result_batch_size')],
+        ['result-flush-ms', config.get('result_flush_ms')],
+        ['metrics-interval', config.get('metrics_interval') or 'off'],
         ['db-path', config.get('db_path')]
     ]
     click.echo(tabulate(tabledata, headers=['Key', 'Value'], tablefmt='grid'))
     click.echo()
 
 
+@cli.command()
+@click.option('--completed-days', type=click.IntRange(min=0), help='Override retention-completed-days for this run')
+@click.option('--max-completed', type=click.IntRange(min=0), help='Override retention-max-completed for this run')
+@click.option('--dead-days', type=click.IntRange(min=0), help='Override retention-dead-days for this run')
+@click.option('--vacuum-full', is_flag=True, help='Run a full VACUUM afterwards')
+@click.option('--db', default='queuectl.db', help='Database path')
+def gc(completed_days, max_completed, dead_days, vacuum_full, db):
+    # archive expired jobs and shrink the database
+    storage = JobStorage(db)
+    config = Config()
+
+    overrides = {
+        'retention_completed_days': completed_days,
+        'retention_max_completed': max_completed,
+        'retention_dead_days': dead_days
+    }
+    for key, value in overrides.items():
+        if value is not None:
+            config.config[key] = value  # this run only, not saved
+
+    result = collect(storage, config)
+    if vacuum_full:
+        result['vacuumed_pages'] += storage.incremental_vacuum(full=True)
+
+    archived = sum(v for k, v in result.items() if k != 'vacuumed_pages')
+
+    click.echo(f" Archived {archived} job(s) to {archive_path(db)}")
+    for key in ('completed_age', 'completed_rows', 'dead_age'):
+        if key in result:
+            click.echo(f"  {key}: {result[key]}")
+    click.echo(f"  Released {result['vacuumed_pages']} page(s)")
+
+
 @cli.command()
 @click.argument('jid')
 @click.option('--db', default='queuectl.db', help='Database path')
 def info(jid, db):
     # show info
-    storage = JobStorage(db)
+    storage = JobStorage(db, readonly=True)
     job = storage.get_job(jid)
     
     if not job:
         click.echo(f"Error: Job {jid} not found", err=True)
         sys.exit(1)
+
+    waiting = storage.get_dependencies(jid) if job.depends_on else []
     
     click.echo(f"\n{'JOB DETAILS':-^80}")
     details = [
         ['ID', job.jid],
-        ['Command', job.command],
+        ['Command' if job.kind == 'shell' else 'Target', job.command],
+        *([['Arguments', json.dumps({'args': job.args or [], 'kwargs': job.kwargs or {}})]] if job.kind == 'python' else []),
 
         ['State', job.state.value],  # Use .value for enum
+        ['Queue', f"{job.queue} (priority {job.priority})"],
         ['Attempts', f"{job.attempts}/{job.max_retries}"],
 
         ['Created At', job.created_at.isoformat() if hasattr(job.created_at, 'isoformat') else job.created_at],
         
         ['Updated At', job.updated_at.isoformat() if hasattr(job.updated_at, 'isoformat') else job.updated_at],
         ['Exit Code', job.exit_code if job.exit_code is not None else '-'],
+        *([['Result', job.result or '-']] if job.kind == 'python' else []),
 
 
+        ['Run At', job.run_at.isoformat() if job.run_at else '-'],
         ['Next Retry At', job.next_retry_at.isoformat() if job.next_retry_at and hasattr(job.next_retry_at, 'isoformat') else (job.next_retry_at or '-')],
+        ['Limits', ', '.join(f"{k}={v}" for k, v in [
+            ('timeout_seconds', job.timeout_seconds), ('max_memory_mb', job.max_memory_mb),
+            ('max_cpu_seconds', job.max_cpu_seconds), ('nice', job.nice)] if v is not None) or 'config defaults'],
+        ['Retry Policy', ', '.join(f"{k}={v}" for k, v in (job.retry_policy or {}).items()) or 'config defaults'],
+        *([['Idempotency Key', job.idempotency_key + (
+            f" (until {job.dedupe_until.isoformat(sep=' ', timespec='seconds')})" if job.dedupe_until else '')]]
+          if job.idempotency_key else []),
+        *([['Depends On', f"{', '.join(job.depends_on)} (waiting for: {', '.join(waiting) or 'none'})"]]
+          if job.depends_on else []),
         ['Error', job.error or '-']  # Use 'error' field
     ]
     click.echo(tabulate(details, tablefmt='grid'))
     click.echo()
 
 
+def copylog(path: Path, position: int, out) -> int:
+    # copy a log file from position to out in chunks; returns the new position
+
+    if not path.exists():
+        return 0
+
+    if path.stat().st_size < position:
+        # a new attempt started and rewrote the file
+        position = 0
+
+    with open(path, 'rb') as f:
+        f.seek(position)
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            out.write(chunk)
+        out.flush()
+        return f.tell()
+
+
+@cli.command()
+@click.argument('jid')
+@click.option('--stderr', 'stream', flag_value='err', help='Show stderr instead of stdout')
+@click.option('--stdout', 'stream', flag_value='out', default=True, help='Show stdout (default)')
+@click.option('--follow', '-f', is_flag=True, help='Keep printing new output until the job completes or dies')
+@click.option('--db', default='queuectl.db', help='Database path')
+def logs(jid, stream, follow, db):
+    # stream a job's output log without loading it into memory
+    storage = JobStorage(db, readonly=True)
+    job = storage.get_job(jid)
+
+    if not job:
+        click.echo(f"Error: Job {jid} not found", err=True)
+        sys.exit(1)
+
+    path = log_path(db, jid, stream)
+    out = sys.stdout.buffer
+
+    if not path.exists() and not follow:
+        # jobs that ran before log files existed only have the tail in the row
+        text = job.output if stream == 'out' else job.error
+        if text:
+            click.echo(text)
+        return
+
+    position = copylog(path, 0, out)
+
+    while follow and job and job.state not in (JobState.COMPLETED, JobState.DEAD):
+        time.sleep(0.5)
+        job = storage.get_job(jid)
+        position = copylog(path, position, out)
+
+
+@cli.command()
+@click.option('--scenarios', default=','.join(bench_suite.SCENARIOS),
+              help=f"Comma-separated scenarios to run ({', '.join(bench_suite.SCENARIOS)})")
+@click.option('--jobs', default=10000, type=click.IntRange(min=1), help='Jobs for the enqueue scenario')
+@click.option('--claim-jobs', default=2000, type=click.IntRange(min=1), help='Jobs per claim run')
+@click.option('--workers', default='1,2,4,8,16,32,64', help='Worker process counts for the claim scenario')
+@click.option('--latency-jobs', default=100, type=click.IntRange(min=1), help='Jobs per latency run')
+@click.option('--rows', default=1_000_000, type=click.IntRange(min=1), help='Table size for the queries scenario')
+@click.option('--repeat', default=20, type=click.IntRange(min=1), help='Runs of each query')
+@click.option('--profile', type=click.Choice(tuple(STORAGE_PROFILES)), default='balanced', help='Storage profile')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write the JSON report here instead of stdout')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Compare against this JSON report')
+@click.option('--tolerance', default=0.2, type=click.FloatRange(min=0), help='Allowed regression, 0.2 = 20%')
+def bench(scenarios, jobs, claim_jobs, workers, latency_jobs, rows, repeat, profile, output, baseline, tolerance):
+    # queuectl bench --output before.json
+    # queuectl bench --scenarios claim,queries --baseline before.json
+
+    names = [name.strip() for name in scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in bench_suite.SCENARIOS]
+    if unknown or not names:
+        click.echo(f"Error: Scenarios must be among: {', '.join(bench_suite.SCENARIOS)}", err=True)
+        sys.exit(1)
+    try:
+        counts = [int(w) for w in workers.split(',')]
+    except ValueError:
+        counts = []
+    if not counts or min(counts) < 1:
+        click.echo("Error: --workers must be comma-separated positive integers", err=True)
+        sys.exit(1)
+
+    report = bench_suite.run(names, jobs, claim_jobs, counts, latency_jobs, rows, repeat, profile,
+                             progress=lambda name: click.echo(f" Running {name}...", err=True))
+
+    failed = False
+    if baseline:
+        previous = bench_suite.load(baseline)
+        if previous.get('meta', {}).get('params') != report['meta']['params'] or \
+                previous.get('meta', {}).get('profile') != profile:
+            click.echo(" Warning: the baseline was run with different parameters", err=True)
+
+        compared = bench_suite.compare(report, previous, tolerance)
+        report['comparison'] = {'baseline': baseline, 'tolerance': tolerance, 'metrics': compared}
+
+        table = [[r['metric'], r['baseline'], r['value'], f"{r['change']:+.1%}", 'REGRESSED' if r['regressed'] else '']
+                 for r in compared]
+        click.echo(tabulate(table, headers=['Metric', 'Baseline', 'Now', 'Change', ''], tablefmt='simple',
+                            disable_numparse=True), err=True)
+        failed = any(r['regressed'] for r in compared)
+
+    text = json.dumps(report, indent=2)
+    if output:
+        Path(output).write_text(text + '\n')
+        click.echo(f" Report written to {output}", err=True)
+    else:
+        click.echo(text)
+
+    if failed:
+        click.echo(f"Error: regressions beyond {tolerance:.0%} of the baseline", err=True)
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--serve', 'port', type=click.IntRange(0, 65535), default=None, help='Serve /metrics over HTTP on this port')
+@click.option('--host', default='127.0.0.1', help='Address to bind with --serve')
+@click.option('--textfile', type=click.Path(dir_okay=False), help='Write to this file for the node_exporter textfile collector')
+@click.option('--prune', is_flag=True, help='Drop snapshots of workers that are no longer running')
+@click.option('--db', default='queuectl.db', help='Database path')
+def metrics(port, host, textfile, prune, db):
+
+    # Worker metrics summed over all workers, plus queue depth by state
+    if prune:
+        click.echo(f"Pruned {prune_snapshots(db)} stopped worker snapshot(s)", err=True)
+
+    def collect():
+        # read-only: a scrape never waits on the workers' write lock
+        storage = JobStorage(db, readonly=True)
+        try:
+            return render(db, storage.get_job_counts())
+        finally:
+            storage.close()
+
+    if port is not None:
+        serve(db, host, port, collect)
+    elif textfile:
+        write_textfile(textfile, collect())
+    else:
+        click.echo(collect(), nl=False)
+
+
 def main():
     
     cli()
@@ -11,7 +11,40 @@ class Config:
     dconfig = {
         'max_retries': 3,
         'backoff_base': 2,
+        'backoff_strategy': 'exponential',
+        'backoff_max_seconds': 3600,
+        'backoff_jitter': 'none',
+        'retry_exit_codes': '',
+        'enqueue_conflict': 'error',
+        'dedupe_window_seconds': 0,
         'db_path': 'queuectl.db',
+        'lease_seconds': 300,
+        'heartbeat_interval': 30,
+        'job_timeout_seconds': 300,
+        'job_max_memory_mb': 0,
+        'job_max_cpu_seconds': 0,
+        'job_nice': 0,
+        'kill_grace_seconds': 5,
+        'executor': 'spawn',
+        'executor_preload': '',
+        'executor_max_jobs': 1000,
+        'executor_max_rss_mb': 512,
+        'python_processes': 0,
+        'queues': 'default',
+        'queue_starvation_seconds': 300,
+        'scheduler_lock_seconds': 30,
+        'worker_poll_interval': 2,
+        'storage_profile': 'balanced',
+        'log_max_bytes': 10 * 1024 * 1024,
+        'log_tail_bytes': 4096,
+        'retention_completed_days': 0,
+        'retention_max_completed': 0,
+        'retention_dead_days': 0,
+        'gc_batch_size': 500,
+        'gc_interval': 0,
+        'result_batch_size': 1,
+        'result_flush_ms': 50,
+        'metrics_interval': 10,
         'configpath': 'queuectl_config.json'
     }
     
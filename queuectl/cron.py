@@ -0,0 +1,120 @@
+# Five-field cron expressions: minute hour day-of-month month day-of-week
+#
+# Supports *, lists (1,15), ranges (1-5), steps (*/10, 0-30/5), month and
+# weekday names (jan, mon) and the @hourly, @daily, @weekly, @monthly and
+# @yearly shortcuts. As in Vixie cron, when both day fields are restricted
+# a day matches if either does; when either starts with * (including steps
+# like */2) both must match. Times are naive local datetimes.
+
+from datetime import datetime, timedelta
+from typing import Set
+
+MACROS = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *',
+}
+
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+WEEKDAYS = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat']
+
+# (low, high, names) per field
+FIELDS = [
+    (0, 59, None),
+    (0, 23, None),
+    (1, 31, None),
+    (1, 12, MONTHS),
+    (0, 7, WEEKDAYS),
+]
+
+# Give up looking for a match this many years ahead (e.g. "0 0 30 2 *")
+SEARCH_YEARS = 5
+
+
+def _value(text: str, low: int, names) -> int:
+
+    if names and text.lower() in names:
+        return names.index(text.lower()) + (1 if low == 1 else 0)
+    if not text.isdigit():
+        raise ValueError(f"invalid value '{text}'")
+    return int(text)
+
+
+def parse_field(text: str, low: int, high: int, names=None) -> Set[int]:
+
+    values = set()
+    for part in text.split(','):
+        rangepart, _, step = part.partition('/')
+        if step and not (step.isdigit() and int(step) > 0):
+            raise ValueError(f"invalid step in '{part}'")
+
+        if rangepart == '*':
+            start, end = low, high
+        elif '-' in rangepart:
+            first, _, last = rangepart.partition('-')
+            start, end = _value(first, low, names), _value(last, low, names)
+        else:
+            start = end = _value(rangepart, low, names)
+            if step:
+                end = high
+
+        if not (low <= start <= high and low <= end <= high) or start > end:
+            raise ValueError(f"'{part}' is outside {low}-{high}")
+
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return values
+
+
+class CronExpr:
+
+
+    def __init__(self, expr: str):
+
+        self.expr = expr.strip()
+        fields = MACROS.get(self.expr.lower(), self.expr).split()
+        if len(fields) != 5:
+            raise ValueError("cron expression needs 5 fields: minute hour day month weekday")
+
+        parsed = [parse_field(text, low, high, names) for text, (low, high, names) in zip(fields, FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+
+        # 7 is Sunday too
+        self.weekdays = {day % 7 for day in weekdays}
+        self.anyday = fields[2].startswith('*')
+        self.anyweekday = fields[4].startswith('*')
+
+        # fail now rather than at the first run
+        self.next_after(datetime.now())
+
+    def daymatches(self, dt: datetime) -> bool:
+
+        dom = dt.day in self.days
+        dow = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.anyday or self.anyweekday:
+            return dom and dow
+        return dom or dow
+
+    def next_after(self, dt: datetime) -> datetime:
+
+        # First matching minute strictly after dt; jumps a whole month, day
+        # or hour at a time when that field does not match
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt.year + SEARCH_YEARS
+
+        while t.year <= limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self.daymatches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+
+        raise ValueError(f"'{self.expr}' never matches")
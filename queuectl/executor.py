@@ -0,0 +1,365 @@
+# Warm Python executors: run Python jobs without spawning an interpreter
+#
+# With executor = pool a worker keeps long-lived Python processes (one per
+# concurrent job) that have already imported executor_preload. Jobs whose
+# command is a plain `python -c CODE`, `python -m MODULE` or
+# `python script.py` invocation, with no shell syntax and no memory, CPU or
+# nice limits, are sent to an idle executor instead of going through
+# `sh -c` and a fresh interpreter. Everything else is spawned as before.
+#
+# Each request goes over a Unix socket together with the write ends of two
+# fresh pipes (SCM_RIGHTS); the executor points fds 1 and 2 at them while
+# the job runs, so output reaches the usual LogSinks. Jobs share the
+# interpreter: imported modules and other global state carry over, which is
+# the point, but a leaky job leaks into the next one. Executors are
+# therefore replaced after executor_max_jobs jobs or once their peak RSS
+# passes executor_max_rss_mb, and killed with their process group on
+# timeout. Needs Unix sockets; elsewhere every job is spawned.
+
+import builtins
+import json
+import os
+import queue
+import re
+import runpy
+import shlex
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import traceback
+import types
+from typing import List, Optional
+
+from .config import Config
+from .limits import Limits, kill_group
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+PYTHON_NAMES = ('python', 'python3', f'python3.{sys.version_info.minor}')
+
+# Outside quotes any of these means the command needs a real shell; inside
+# double quotes $ and ` still do
+SHELL_CHARS = set('|&;<>()$`*?[]~{}#\n')
+
+# Request frames: 4-byte length, then JSON
+HEADER = struct.Struct('!I')
+
+MODULE_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$')
+
+# argv: package root, socket fd, preload. Imports queuectl from the root the
+# worker used, then drops it again so jobs see the sys.path and PYTHONPATH
+# a spawned interpreter would.
+BOOT = """\
+import sys
+sys.path.insert(0, sys.argv[1])
+from queuectl.executor import serve
+del sys.path[0]
+serve(int(sys.argv[2]), sys.argv[3])
+"""
+
+
+def parse_preload(spec: str) -> List[str]:
+
+    # "numpy, app.tasks" -> ['numpy', 'app.tasks']
+    names = [name.strip() for name in spec.split(',') if name.strip()]
+    for name in names:
+        if not MODULE_NAME.match(name):
+            raise ValueError(f"invalid module name '{name}'")
+    return names
+
+
+def needs_shell(command: str) -> bool:
+
+    quote = None
+    escaped = False
+    for ch in command:
+        if escaped:
+            escaped = False
+        elif quote == "'":
+            quote = None if ch == "'" else quote
+        elif ch == '\\':
+            escaped = True
+        elif quote == '"':
+            if ch == '"':
+                quote = None
+            elif ch in '$`':
+                return True
+        elif ch in '\'"':
+            quote = ch
+        elif ch in SHELL_CHARS:
+            return True
+    return False
+
+
+def python_argv(command: str) -> Optional[List[str]]:
+
+    # "python -c 'print(1)' x" -> ['-c', 'print(1)', 'x']; None if the
+    # command is not a plain Python invocation
+    if needs_shell(command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+
+    if len(argv) < 2 or not same_interpreter(argv[0]):
+        return None
+    if argv[1] in ('-c', '-m'):
+        return argv[1:] if len(argv) >= 3 else None
+    if argv[1].endswith('.py') and not argv[1].startswith('-'):
+        return argv[1:]
+    return None
+
+
+def same_interpreter(program: str) -> bool:
+
+    # Whether program, looked up on PATH as the shell would, is the
+    # interpreter running this worker; any other python is spawned
+    if os.path.basename(program) not in PYTHON_NAMES and program != sys.executable:
+        return False
+    path = shutil.which(program)
+    return path is not None and os.path.realpath(path) == os.path.realpath(sys.executable)
+
+
+def peak_rss_mb() -> float:
+
+    if resource is None:
+        return 0.0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def runjob(argv: List[str]) -> int:
+
+    # Run one job in this interpreter the way `python ARGV` would
+    mode, target, rest = argv[0], argv[1] if len(argv) > 1 else None, argv[2:]
+    saved = sys.argv[:], sys.path[:], os.getcwd(), sys.modules['__main__']
+
+    try:
+        if mode == '-c':
+            sys.argv = ['-c'] + rest
+            sys.path.insert(0, '')
+            # a fresh __main__, as runpy gives scripts and modules
+            main = types.ModuleType('__main__')
+            main.__builtins__ = builtins
+            sys.modules['__main__'] = main
+            exec(compile(target, '<string>', 'exec'), main.__dict__)
+        elif mode == '-m':
+            sys.argv = [target] + rest
+            sys.path.insert(0, os.getcwd())
+            runpy.run_module(target, run_name='__main__', alter_sys=True)
+        else:
+            sys.argv = [mode] + argv[1:]
+            sys.path.insert(0, os.path.dirname(os.path.abspath(mode)))
+            runpy.run_path(mode, run_name='__main__')
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException as e:
+        # drop the frames of this module and runpy, as python itself would
+        tb = e.__traceback__
+        while tb and tb.tb_frame.f_code.co_filename in (__file__, runpy.__file__):
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb)
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        sys.argv, sys.path[:] = saved[0], saved[1]
+        os.chdir(saved[2])
+        sys.modules['__main__'] = saved[3]
+
+
+def recv_frame(sock: socket.socket) -> tuple:
+
+    # (payload, fds); the pipe fds arrive with the first bytes. payload is
+    # None once the worker has gone away
+    data, fds, _, _ = socket.recv_fds(sock, 1 << 16, 2)
+    while data:
+        if len(data) >= HEADER.size and len(data) >= HEADER.size + HEADER.unpack_from(data)[0]:
+            return data[HEADER.size:], fds
+        more = sock.recv(1 << 16)
+        if not more:
+            break
+        data += more
+    return None, fds
+
+
+def serve(fd: int, preload: str) -> None:
+
+    # Executor main loop: one request at a time, answered with a line
+    # holding the exit code and peak RSS
+    for name in parse_preload(preload):
+        __import__(name)
+
+    sock = socket.socket(fileno=fd)
+    stdout, stderr = os.dup(1), os.dup(2)
+
+    while True:
+        payload, fds = recv_frame(sock)
+        if payload is None or len(fds) != 2:
+            return
+        request = json.loads(payload)
+
+        os.dup2(fds[0], 1)
+        os.dup2(fds[1], 2)
+        for pipefd in fds:
+            os.close(pipefd)
+
+        code = runjob(request['argv'])
+
+        # the worker's readers see EOF once these are gone
+        os.dup2(stdout, 1)
+        os.dup2(stderr, 2)
+        sock.sendall(json.dumps({'exit': code, 'rss_mb': peak_rss_mb()}).encode() + b'\n')
+
+
+class Executor:
+
+
+    def __init__(self, preload: str):
+
+        self.sock, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        # make sure the executor can import queuectl however the worker did
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.proc = subprocess.Popen(
+            [sys.executable, '-c', BOOT, root, str(theirs.fileno()), preload],
+            stdin=subprocess.DEVNULL,
+            pass_fds=(theirs.fileno(),),
+            start_new_session=True
+        )
+        theirs.close()
+        self.reader = self.sock.makefile('rb')
+        self.jobs = 0
+        self.rss_mb = 0.0
+
+    def run(self, argv: List[str], outfd: int, errfd: int, timeout: Optional[float], grace: float) -> tuple:
+
+        # (exit code, timed out); the executor is dead afterwards if the
+        # job timed out or took the interpreter down with it. The caller
+        # keeps and closes its own copies of the pipe fds.
+        self.jobs += 1
+        payload = json.dumps({'argv': argv}).encode()
+        socket.send_fds(self.sock, [HEADER.pack(len(payload)) + payload], [outfd, errfd])
+
+        self.sock.settimeout(timeout)
+        try:
+            reply = self.reader.readline()
+        except socket.timeout:
+            # an alias of TimeoutError only from 3.10 on
+            self.kill(grace)
+            return -1, True
+        self.sock.settimeout(None)
+
+        if not reply:
+            # os._exit, a crash or a signal; report it like a spawned job would
+            self.disconnect()
+            return self.proc.wait(), False
+
+        result = json.loads(reply)
+        self.rss_mb = result['rss_mb']
+        return result['exit'], False
+
+    def alive(self) -> bool:
+
+        return self.proc.poll() is None and self.sock.fileno() != -1
+
+    def disconnect(self) -> None:
+
+        # the fd stays open until the makefile reader is closed too
+        self.reader.close()
+        self.sock.close()
+
+    def kill(self, grace: float = 0) -> None:
+
+        self.disconnect()
+        kill_group(self.proc, grace)
+
+    def close(self) -> None:
+
+        # EOF on the socket ends the serve loop
+        self.disconnect()
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.kill()
+
+
+def executor_pool(config: Config, size: int) -> Optional['ExecutorPool']:
+
+    # None unless the executor config key asks for a pool and the platform has one
+    if config.get('executor', 'spawn') != 'pool' or not ExecutorPool.available():
+        return None
+    return ExecutorPool(size, config.get('executor_preload', ''), config.get('executor_max_jobs', 1000),
+                        config.get('executor_max_rss_mb', 512))
+
+
+class ExecutorPool:
+
+
+    def __init__(self, size: int, preload: str = '', max_jobs: int = 1000, max_rss_mb: float = 512):
+
+        self.preload = preload
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.idle = queue.LifoQueue()
+        for _ in range(max(1, size)):
+            self.idle.put(None)
+        self.recycled = 0
+
+    @staticmethod
+    def available() -> bool:
+
+        return hasattr(socket, 'send_fds') and hasattr(socket, 'AF_UNIX')
+
+    def eligible(self, command: str, limits: Limits) -> Optional[List[str]]:
+
+        # rlimits and nice apply to a whole process, so those jobs are spawned
+        if limits.memory_mb or limits.cpu_seconds or limits.nice:
+            return None
+        return python_argv(command)
+
+    def run(self, argv: List[str], outfd: int, errfd: int, timeout: Optional[float], grace: float) -> tuple:
+
+        executor = self.idle.get()
+        try:
+            if executor is None or not executor.alive():
+                executor = Executor(self.preload)
+            result = executor.run(argv, outfd, errfd, timeout, grace)
+
+            if not executor.alive() or executor.jobs >= self.max_jobs or (
+                    self.max_rss_mb and executor.rss_mb > self.max_rss_mb):
+                # replaced lazily by the next job
+                if executor.alive():
+                    executor.close()
+                self.recycled += 1
+                executor = None
+            return result
+        except Exception:
+            if executor is not None:
+                executor.kill()
+            executor = None
+            raise
+        finally:
+            self.idle.put(executor)
+
+    def close(self) -> None:
+
+        while not self.idle.empty():
+            executor = self.idle.get_nowait()
+            if executor is not None:
+                executor.close()
+
+
+if __name__ == '__main__':
+    serve(int(sys.argv[1]), sys.argv[2] if len(sys.argv) > 2 else '')
@@ -0,0 +1,93 @@
+# Per-job stdout/stderr log files
+#
+# Job output is streamed from the child's pipes straight into
+# <db>.logs/<jid>.out and <jid>.err in fixed-size chunks, so a chatty job
+# never sits in worker memory. Each file is capped at log_max_bytes and the
+# last log_tail_bytes are kept for the output/error columns of the job row.
+
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+CHUNK_SIZE = 64 * 1024
+
+TRUNCATED_MARKER = b"\n[queuectl: output truncated at log_max_bytes]\n"
+
+
+def log_dir(db_path: str) -> Path:
+
+    return Path(os.path.abspath(db_path) + '.logs')
+
+
+def log_path(db_path: str, jid: str, stream: str = 'out') -> Path:
+
+    # Job ids come from user JSON; keep them from escaping the log directory
+    safe = re.sub(r'[^A-Za-z0-9._-]', '_', jid)
+    return log_dir(db_path) / f"{safe}.{stream}"
+
+
+def remove_logs(db_path: str, jid: str) -> None:
+
+    for stream in ('out', 'err'):
+        try:
+            log_path(db_path, jid, stream).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class LogSink:
+
+
+    def __init__(self, path: Path, max_bytes: int, tail_bytes: int):
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.file = open(path, 'wb')
+        self.max_bytes = max_bytes
+        self.tail_bytes = tail_bytes
+        self.written = 0
+        self.truncated = False
+        self.tail = bytearray()
+
+    def write(self, chunk: bytes) -> None:
+
+        # Past the cap the chunk is dropped, but the caller keeps draining
+        # the pipe so the child never blocks on a full pipe
+        if self.tail_bytes:
+            self.tail += chunk
+            if len(self.tail) > self.tail_bytes:
+                del self.tail[:len(self.tail) - self.tail_bytes]
+
+        if self.truncated:
+            return
+
+        room = self.max_bytes - self.written
+        if len(chunk) > room:
+            chunk = chunk[:room]
+            self.truncated = True
+
+        self.file.write(chunk)
+        self.file.flush()
+        self.written += len(chunk)
+
+        if self.truncated:
+            self.file.write(TRUNCATED_MARKER)
+            self.file.flush()
+
+    def drain(self, pipe) -> None:
+
+        # Copy a binary pipe into the log until EOF; os.read returns as soon
+        # as any output is available, so `queuectl logs --follow` sees it live
+        fd = pipe.fileno()
+        for chunk in iter(lambda: os.read(fd, CHUNK_SIZE), b''):
+            self.write(chunk)
+        pipe.close()
+
+    def close(self) -> Optional[str]:
+
+        # Returns the tail to store in the job row, None if nothing was written
+        self.file.close()
+        if not self.tail:
+            return None
+        return self.tail.decode('utf-8', errors='replace')
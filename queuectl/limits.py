@@ -0,0 +1,121 @@
+# Per-job timeouts and resource limits
+#
+# Each job may set timeout_seconds, max_memory_mb, max_cpu_seconds and nice;
+# unset values fall back to the job_* keys in Config, and 0 means no limit.
+# Commands run in their own session so the whole process tree can be
+# signalled at once: SIGTERM on timeout, then SIGKILL to whatever is left
+# once the job's main process exits or kill_grace_seconds pass. Memory and
+# CPU limits are RLIMIT_AS and RLIMIT_CPU, inherited by everything the job
+# starts. They are set by a small python launcher that execs the shell, not
+# by a preexec_fn: forking a worker that runs heartbeat, flush and metrics
+# threads and then running python code in the child can deadlock on a lock
+# one of those threads held.
+
+import os
+import signal
+import subprocess
+import sys
+from typing import List, NamedTuple, Optional
+
+from .config import Config
+from .models import Job
+
+try:
+    import resource
+except ImportError:
+    # Windows: timeouts still apply, rlimits and nice do not
+    resource = None
+
+# Between RLIMIT_CPU's soft limit (SIGXCPU) and hard limit (SIGKILL)
+CPU_HARD_MARGIN = 5
+
+# argv: nice, RLIMIT_AS bytes, RLIMIT_CPU soft and hard seconds, then the
+# program to exec; a 0 leaves that limit alone. A negative nice needs root
+# (CAP_SYS_NICE); without it the job fails with a one-line error.
+LAUNCHER = """\
+import os, resource, sys
+nice, memory, cpu, hard = map(int, sys.argv[1:5])
+if nice:
+    try:
+        os.nice(nice)
+    except OSError as e:
+        sys.exit(f"queuectl: cannot set nice {nice}: {e.strerror} (a negative nice needs root)")
+if memory:
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+if cpu:
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, hard))
+os.execv(sys.argv[5], sys.argv[5:])
+"""
+
+SHELL = '/bin/sh'
+
+
+class Limits(NamedTuple):
+    timeout: Optional[float]
+    memory_mb: int
+    cpu_seconds: int
+    nice: int
+
+
+def job_limits(job: Job, config: Config) -> Limits:
+
+    def pick(value, key, default):
+        return value if value is not None else config.get(key, default)
+
+    timeout = pick(job.timeout_seconds, 'job_timeout_seconds', 300)
+    return Limits(
+        timeout or None,
+        pick(job.max_memory_mb, 'job_max_memory_mb', 0),
+        pick(job.max_cpu_seconds, 'job_max_cpu_seconds', 0),
+        pick(job.nice, 'job_nice', 0)
+    )
+
+
+def launch_argv(command: str, limits: Limits) -> Optional[List[str]]:
+
+    # argv running the shell command under the job's rlimits and nice, or
+    # None when there is nothing to set and the command can run as is. The
+    # launcher execs the shell, so the job keeps its pid and process group.
+    # Costs one interpreter start (-I -S: no site, no environment).
+    if resource is None or not (limits.memory_mb or limits.cpu_seconds or limits.nice):
+        return None
+
+    cpu = limits.cpu_seconds
+    values = (limits.nice, limits.memory_mb * 1024 * 1024, cpu, cpu + CPU_HARD_MARGIN if cpu else 0)
+    return [sys.executable, '-I', '-S', '-c', LAUNCHER, *map(str, values), SHELL, '-c', command]
+
+
+def signal_group(pid: int, sig: int) -> bool:
+
+    # Signal the job's whole process group; False once it is gone
+    try:
+        os.killpg(pid, sig)
+        return True
+    except (ProcessLookupError, PermissionError):
+        return False
+
+
+def kill_group(proc: subprocess.Popen, grace: float) -> None:
+
+    if not hasattr(os, 'killpg'):
+        proc.kill()
+        proc.wait()
+        return
+
+    # The leader's exit is the only reliable signal: orphaned children
+    # can linger as zombies and keep the group visible to killpg
+    signal_group(proc.pid, signal.SIGTERM)
+    try:
+        proc.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        pass
+    signal_group(proc.pid, signal.SIGKILL)
+    proc.wait()
+
+
+def describe_exit(exit_code: int, limits: Limits) -> Optional[bytes]:
+
+    # Note for stderr when the exit came from a resource limit
+    if limits.cpu_seconds and hasattr(signal, 'SIGXCPU') and exit_code in (-signal.SIGXCPU, 128 + signal.SIGXCPU):
+        return f"CPU time limit of {limits.cpu_seconds} seconds exceeded".encode()
+    return None
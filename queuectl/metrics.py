@@ -0,0 +1,259 @@
+# Worker metrics in the Prometheus text format
+#
+# Each worker process counts claims, job phases and outcomes in memory, a
+# few dict and list updates per job with no I/O, and every metrics_interval
+# seconds writes a JSON snapshot to <db>.metrics/. `queuectl metrics` sums
+# the snapshots of all workers, adds queue depth by state from the database
+# and renders the result for a Prometheus scrape (--serve) or the
+# node_exporter textfile collector (--textfile).
+#
+# Snapshots of stopped workers are kept so that summed counters never go
+# backwards, the way per-process files work in multiprocess Prometheus
+# clients; `queuectl metrics --prune` drops them.
+
+import json
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+
+# Histogram bucket bounds in seconds; one set covers claims of a fraction
+# of a millisecond up to hour-long jobs
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+# name: (type, help)
+METRICS = {
+    'queuectl_claim_seconds': ('histogram', 'Time per claim_batch round-trip, including empty claims'),
+    'queuectl_jobs_claimed_total': ('counter', 'Jobs leased by claims'),
+    'queuectl_queue_wait_seconds': ('histogram', 'Time from a job becoming ready to its start'),
+    'queuectl_jobs_started_total': ('counter', 'Jobs marked processing'),
+    'queuectl_jobs_lost_total': ('counter', 'Claimed jobs whose lease was taken over before they started'),
+    'queuectl_execute_seconds': ('histogram', 'Time running the job command or callable'),
+    'queuectl_persist_seconds': ('histogram', 'Time writing job transitions, by operation'),
+    'queuectl_jobs_finished_total': ('counter', 'Job outcomes decided by workers, by resulting state'),
+    'queuectl_results_discarded_total': ('counter', 'Results dropped because the job changed while running'),
+    'queuectl_leases_reaped_total': ('counter', 'Expired leases recovered by workers, by outcome'),
+    'queuectl_db_lock_wait_seconds': ('histogram', 'Time waiting for the SQLite write lock, per worker write transaction'),
+    'queuectl_jobs': ('gauge', 'Jobs in the database by state'),
+    'queuectl_workers': ('gauge', 'Running workers with a metrics snapshot'),
+}
+
+
+def metrics_dir(db_path: str) -> Path:
+
+    return Path(os.path.abspath(db_path) + '.metrics')
+
+
+class Metrics:
+    # Counters and histograms of one worker process
+    #
+    # Series are keyed by (name, labels) where labels is the rendered label
+    # list, e.g. 'state="dead"'. Histograms keep one count per bucket plus
+    # +Inf, followed by the sum; buckets are made cumulative on render.
+
+    def __init__(self):
+
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def inc(self, name: str, labels: str = '', value: int = 1) -> None:
+
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, labels: str = '') -> None:
+
+        key = (name, labels)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+            hist[bisect_left(BUCKETS, seconds)] += 1
+            hist[-1] += seconds
+
+    def snapshot(self) -> dict:
+
+        with self.lock:
+            return {
+                'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, labels, hist[:]] for (name, labels), hist in self.histograms.items()],
+            }
+
+    def dump(self, path: Path, **meta) -> None:
+
+        # Written to a temp file and renamed, so readers never see half a file
+        data = {'pid': os.getpid(), 'host': socket.gethostname(), 'updated': time.time(), **meta,
+                **self.snapshot()}
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+
+class NullMetrics(Metrics):
+    # Records nothing; workers use it when metrics_interval is 0
+
+    def inc(self, name: str, labels: str = '', value: int = 1) -> None:
+
+        pass
+
+    def observe(self, name: str, seconds: float, labels: str = '') -> None:
+
+        pass
+
+
+def load_snapshots(db_path: str) -> List[dict]:
+
+    snapshots = []
+    directory = metrics_dir(db_path)
+    if not directory.is_dir():
+        return snapshots
+
+    for path in sorted(directory.glob('*.json')):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        data['path'] = path
+        snapshots.append(data)
+    return snapshots
+
+
+def running(snapshot: dict) -> bool:
+
+    import psutil
+
+    # Only processes on this host can be checked; others count as running
+    if snapshot.get('host') != socket.gethostname():
+        return True
+    return psutil.pid_exists(snapshot.get('pid', 0))
+
+
+def prune_snapshots(db_path: str) -> int:
+
+    # Drop snapshots of workers that are gone; their counts leave the totals
+    pruned = 0
+    for snapshot in load_snapshots(db_path):
+        if running(snapshot):
+            continue
+        try:
+            snapshot['path'].unlink()
+            pruned += 1
+        except OSError:
+            pass
+    return pruned
+
+
+def merge(snapshots: List[dict]) -> Metrics:
+
+    total = Metrics()
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get('counters', []):
+            total.counters[(name, labels)] = total.counters.get((name, labels), 0) + value
+
+        for name, labels, hist in snapshot.get('histograms', []):
+            if len(hist) != len(BUCKETS) + 2:
+                # written with other bucket bounds
+                continue
+            current = total.histograms.setdefault((name, labels), [0] * (len(BUCKETS) + 1) + [0.0])
+            for i, value in enumerate(hist):
+                current[i] += value
+    return total
+
+
+def series(name: str, labels: str, value) -> str:
+
+    if isinstance(value, float):
+        value = repr(round(value, 6))
+    return f"{name}{{{labels}}} {value}" if labels else f"{name} {value}"
+
+
+def render(db_path: str, counts: Optional[dict] = None) -> str:
+
+    # Prometheus text exposition of every worker snapshot for db_path plus
+    # queue depth from counts (get_job_counts)
+    snapshots = load_snapshots(db_path)
+    total = merge(snapshots)
+
+    samples = {}
+    for (name, labels), value in sorted(total.counters.items()):
+        samples.setdefault(name, []).append(series(name, labels, value))
+
+    for (name, labels), hist in sorted(total.histograms.items()):
+        lines = samples.setdefault(name, [])
+        prefix = labels + ',' if labels else ''
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), hist):
+            cumulative += count
+            lines.append(series(f"{name}_bucket", f'{prefix}le="{bound}"', cumulative))
+        lines.append(series(f"{name}_sum", labels, hist[-1]))
+        lines.append(series(f"{name}_count", labels, cumulative))
+
+    if counts is not None:
+        samples['queuectl_jobs'] = [series('queuectl_jobs', f'state="{state}"', count)
+                                    for state, count in counts.items()]
+    samples['queuectl_workers'] = [series('queuectl_workers', '', sum(1 for s in snapshots if running(s)))]
+
+    out = []
+    for name, (kind, text) in METRICS.items():
+        if name not in samples:
+            continue
+        out.append(f"# HELP {name} {text}")
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(samples[name])
+    return '\n'.join(out) + '\n'
+
+
+def write_textfile(path: str, text: str) -> None:
+
+    # The textfile collector may read at any moment; rename is atomic
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def serve(db_path: str, host: str, port: int, collect) -> None:
+
+    # GET /metrics renders collect() on every scrape
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+
+            try:
+                body = collect().encode()
+            except Exception as e:
+                self.send_error(500, str(e))
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"Serving metrics for {db_path} on http://{host}:{server.server_port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
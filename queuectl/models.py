@@ -2,12 +2,56 @@
 
 from dataclasses import dataclass, field
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import Optional
+from typing import NamedTuple, Optional
+import os
+import time
 import uuid
 
 
+def to_micros(dt: Optional[datetime]) -> Optional[int]:
+    # datetime -> integer microseconds since the Unix epoch; naive values are
+    # local time, with fold picking the second pass of a repeated DST hour
+    if dt is None:
+        return None
+    if dt.tzinfo is not None:
+        return (dt - datetime(1970, 1, 1, tzinfo=timezone.utc)) // timedelta(microseconds=1)
+    return int(dt.replace(microsecond=0).timestamp()) * 1_000_000 + dt.microsecond
+
+
+def from_micros(us: Optional[int]) -> Optional[datetime]:
+    # integer microseconds since the Unix epoch -> naive local datetime
+    if us is None:
+        return None
+    return datetime.fromtimestamp(us // 1_000_000).replace(microsecond=us % 1_000_000)
+
+
+def now_micros() -> int:
+    
+    return time.time_ns() // 1000
+
+
+def from_now(seconds: float) -> datetime:
+    # now + seconds as a naive local datetime; datetime.now() + timedelta
+    # would drop fold and land an hour early after a DST change
+    return from_micros(now_micros() + int(seconds * 1_000_000))
+
+
+def uuid7() -> str:
+    # RFC 9562 UUIDv7: 48-bit Unix milliseconds, then 12 bits of
+    # sub-millisecond time and 62 random bits. Sorts by creation time, so
+    # new ids land at the right edge of the primary key index.
+    ns = time.time_ns()
+    ms, sub = divmod(ns, 1_000_000)
+    value = (ms & (1 << 48) - 1) << 80
+    value |= 0x7 << 76
+    value |= (sub * 4096 // 1_000_000) << 64
+    value |= 0b10 << 62
+    value |= int.from_bytes(os.urandom(8), 'big') & (1 << 62) - 1
+    return str(uuid.UUID(int=value))
+
+
 class JobState(Enum):
     
     PENDING = "pending"
@@ -18,6 +62,17 @@ class JobState(Enum):
     DEAD = "dead"
 
 
+class JobSummary(NamedTuple):
+    # the columns `queuectl list` shows, without output/error blobs
+    jid: str
+    command: str
+    state: JobState
+    attempts: int
+    max_retries: int
+    created_at: datetime
+    error: Optional[str]
+
+
 @dataclass
 class Job:
     # job structure
@@ -35,6 +90,38 @@ class Job:
     error: Optional[str] = None
     exit_code: Optional[int] = None
     next_retry_at: Optional[datetime] = None
+    locked_by: Optional[str] = None
+    locked_at: Optional[datetime] = None
+    lease_expires_at: Optional[datetime] = None
+    # bumped by every state transition, used as an optimistic lock
+    version: int = 0
+    # resource limits; None falls back to the job_* defaults in Config
+    timeout_seconds: Optional[int] = None
+    max_memory_mb: Optional[int] = None
+    max_cpu_seconds: Optional[int] = None
+    nice: Optional[int] = None
+    # claimed from its queue by priority, higher first
+    queue: str = 'default'
+    priority: int = 0
+    # not claimable before this time; None runs as soon as possible
+    run_at: Optional[datetime] = None
+    # backoff/retry overrides (see retry.py) and the last backoff in seconds
+    retry_policy: Optional[dict] = None
+    retry_delay: Optional[float] = None
+    # 'shell' runs command; 'python' calls command ("pkg.mod:func") with
+    # args/kwargs and stores its JSON return value in result
+    kind: str = 'shell'
+    args: Optional[list] = None
+    kwargs: Optional[dict] = None
+    result: Optional[str] = None
+    # ids of the jobs this one waits for, and how many of them have not
+    # completed yet; claimable only once pending_deps is 0
+    depends_on: Optional[list] = None
+    pending_deps: int = 0
+    # enqueues with the same key are deduplicated until dedupe_until
+    # (forever if None) while this job exists
+    idempotency_key: Optional[str] = None
+    dedupe_until: Optional[datetime] = None
     
     @classmethod
     def from_dict(cls, data: dict) -> 'Job':
@@ -54,7 +141,28 @@ class Job:
             error=data.get('error'),
 
             exit_code=data.get('exit_code'),
-            next_retry_at=datetime.fromisoformat(data['next_retry_at']) if data.get('next_retry_at') and isinstance(data['next_retry_at'], str) else data.get('next_retry_at')
+            next_retry_at=datetime.fromisoformat(data['next_retry_at']) if data.get('next_retry_at') and isinstance(data['next_retry_at'], str) else data.get('next_retry_at'),
+            locked_by=data.get('locked_by'),
+            locked_at=datetime.fromisoformat(data['locked_at']) if data.get('locked_at') and isinstance(data['locked_at'], str) else data.get('locked_at'),
+            lease_expires_at=datetime.fromisoformat(data['lease_expires_at']) if data.get('lease_expires_at') and isinstance(data['lease_expires_at'], str) else data.get('lease_expires_at'),
+            version=data.get('version') or 0,
+            timeout_seconds=data.get('timeout_seconds'),
+            max_memory_mb=data.get('max_memory_mb'),
+            max_cpu_seconds=data.get('max_cpu_seconds'),
+            nice=data.get('nice'),
+            queue=data.get('queue') or 'default',
+            priority=data.get('priority') or 0,
+            run_at=datetime.fromisoformat(data['run_at']) if data.get('run_at') and isinstance(data['run_at'], str) else data.get('run_at'),
+            retry_policy=data.get('retry_policy'),
+            retry_delay=data.get('retry_delay'),
+            kind=data.get('kind') or 'shell',
+            args=data.get('args'),
+            kwargs=data.get('kwargs'),
+            result=data.get('result'),
+            depends_on=data.get('depends_on'),
+            pending_deps=data.get('pending_deps') or 0,
+            idempotency_key=data.get('idempotency_key'),
+            dedupe_until=datetime.fromisoformat(data['dedupe_until']) if data.get('dedupe_until') and isinstance(data['dedupe_until'], str) else data.get('dedupe_until')
         )
     
     def to_dict(self) -> dict:
@@ -74,10 +182,67 @@ class Job:
             'error': self.error,
             'exit_code': self.exit_code,
 
-            'next_retry_at': self.next_retry_at.isoformat() if self.next_retry_at else None
+            'next_retry_at': self.next_retry_at.isoformat() if self.next_retry_at else None,
+            'locked_by': self.locked_by,
+            'locked_at': self.locked_at.isoformat() if self.locked_at else None,
+            'lease_expires_at': self.lease_expires_at.isoformat() if self.lease_expires_at else None,
+            'version': self.version,
+            'timeout_seconds': self.timeout_seconds,
+            'max_memory_mb': self.max_memory_mb,
+            'max_cpu_seconds': self.max_cpu_seconds,
+            'nice': self.nice,
+            'queue': self.queue,
+            'priority': self.priority,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'retry_policy': self.retry_policy,
+            'retry_delay': self.retry_delay,
+            'kind': self.kind,
+            'args': self.args,
+            'kwargs': self.kwargs,
+            'result': self.result,
+            'depends_on': self.depends_on,
+            'pending_deps': self.pending_deps,
+            'idempotency_key': self.idempotency_key,
+            'dedupe_until': self.dedupe_until.isoformat() if self.dedupe_until else None
         }
     
     @staticmethod
     def generate_jid() -> str:
         
-        return str(uuid.uuid4())[:8]
+        return uuid7()
+
+
+def parse_depends_on(value) -> Optional[list]:
+    # "a" or ["a", "b"] -> list of job ids; None or [] -> None
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, (list, tuple)) or not all(isinstance(v, str) and v for v in value):
+        raise ValueError("'depends_on' must be a job id or a list of job ids")
+    return list(dict.fromkeys(value)) or None
+
+
+# Job fields a schedule copies into every instance
+TEMPLATE_FIELDS = ('command', 'max_retries', 'queue', 'priority',
+                   'timeout_seconds', 'max_memory_mb', 'max_cpu_seconds', 'nice', 'retry_policy',
+                   'kind', 'args', 'kwargs')
+
+
+@dataclass
+class Schedule:
+    # recurring job definition, materialized as one job per cron tick
+    name: str
+    cron: str
+    template: dict
+    next_run_at: datetime
+    last_run_at: Optional[datetime] = None
+    created_at: datetime = field(default_factory=datetime.now)
+
+    def instance(self, fire: datetime) -> Job:
+
+        # The id is derived from the tick, so the same tick can never be
+        # enqueued twice. It is the tick in UTC: both passes of a repeated
+        # DST hour share a local time but not an instant.
+        tick = datetime.fromtimestamp(to_micros(fire) // 1_000_000, timezone.utc)
+        return Job(jid=f"{self.name}@{tick:%Y%m%dT%H%MZ}", run_at=fire, **self.template)
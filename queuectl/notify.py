@@ -0,0 +1,124 @@
+# Local wakeup channel between enqueue and idle workers
+#
+# Every idle worker binds a Unix datagram socket in a directory next to the
+# database. Enqueueing a job sends one byte to each socket, which wakes the
+# worker immediately instead of waiting for its next poll. Platforms without
+# AF_UNIX datagram sockets fall back to plain polling.
+
+import os
+import select
+import socket
+import time
+from pathlib import Path
+from typing import Optional
+
+
+def notify_dir(db_path: str) -> Path:
+
+    return Path(os.path.abspath(db_path) + '.notify')
+
+
+class WakeupListener:
+
+
+    def __init__(self, db_path: str, name: str):
+
+        self.path: Optional[Path] = None
+        self.sock: Optional[socket.socket] = None
+
+        if not hasattr(socket, 'AF_UNIX'):
+            return
+
+        path = notify_dir(db_path) / f"{name}.sock"
+        try:
+            path.parent.mkdir(exist_ok=True)
+            if path.exists():
+                path.unlink()
+
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(str(path))
+            sock.setblocking(False)
+        except OSError:
+            # e.g. path too long for sun_path or unsupported socket type
+            return
+
+        self.path = path
+        self.sock = sock
+
+    @property
+    def enabled(self) -> bool:
+
+        return self.sock is not None
+
+    def wait(self, timeout: float) -> bool:
+
+        # Block until woken or the timeout passes; True if woken
+        if not self.sock:
+            time.sleep(timeout)
+            return False
+
+        ready, _, _ = select.select([self.sock], [], [], timeout)
+        if not ready:
+            return False
+
+        # Drain everything queued so one wakeup is handled once
+        try:
+            while self.sock.recv(64):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        return True
+
+    def wake(self) -> None:
+
+        # Interrupt our own wait, e.g. from a signal handler
+        if not self.sock:
+            return
+        try:
+            self.sock.sendto(b'1', str(self.path))
+        except OSError:
+            pass
+
+    def close(self):
+
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+        if self.path and self.path.exists():
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+def notify_workers(db_path: str) -> int:
+
+    # Wake every idle worker listening on this database; returns how many
+    # were reached. Sockets left behind by dead workers are removed.
+    directory = notify_dir(db_path)
+    if not hasattr(socket, 'AF_UNIX') or not directory.is_dir():
+        return 0
+
+    woken = 0
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    except OSError:
+        return 0
+
+    sock.setblocking(False)
+    with sock:
+        for path in directory.glob('*.sock'):
+            try:
+                sock.sendto(b'1', str(path))
+                woken += 1
+            except BlockingIOError:
+                # Receive buffer full, the worker already has a wakeup pending
+                woken += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            except OSError:
+                pass
+    return woken
@@ -0,0 +1,73 @@
+# Named queues and the order a worker claims from them
+#
+# A worker serves the queues given with --queues (config key `queues`):
+#   high,default,bulk          strict: always drain earlier queues first
+#   high:5,default:3,bulk:1    weighted: smooth weighted round-robin picks
+#                              which queue each claim starts with
+# Within a queue jobs are claimed by priority (higher first), then by the
+# time they became ready. Jobs waiting longer than queue_starvation_seconds
+# are claimed first, whatever their queue or priority.
+
+import re
+from typing import List, Tuple
+
+DEFAULT_QUEUE = 'default'
+
+QUEUE_NAME = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+# Job priorities range from -MAX_PRIORITY to MAX_PRIORITY
+MAX_PRIORITY = 1_000_000
+
+
+def parse_queues(spec: str) -> List[Tuple[str, int]]:
+
+    # "high:5,default" -> [('high', 5), ('default', 1)]
+    queues = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+
+        name, _, weight = part.partition(':')
+        if not QUEUE_NAME.match(name):
+            raise ValueError(f"invalid queue name '{name}'")
+        if weight and not (weight.isdigit() and int(weight) > 0):
+            raise ValueError(f"weight of queue '{name}' must be a positive integer")
+        if name in [q for q, _ in queues]:
+            raise ValueError(f"queue '{name}' listed twice")
+
+        queues.append((name, int(weight) if weight else 1))
+
+    if not queues:
+        raise ValueError("no queues given")
+    return queues
+
+
+class QueueSelector:
+
+
+    def __init__(self, spec: str):
+
+        self.queues = parse_queues(spec)
+        self.weighted = ':' in spec
+        self.current = {name: 0 for name, _ in self.queues}
+        self.total = sum(weight for _, weight in self.queues)
+
+    def names(self) -> List[str]:
+
+        return [name for name, _ in self.queues]
+
+    def order(self) -> List[str]:
+
+        # Queues to claim from, in order, for the next claim
+        if not self.weighted or len(self.queues) == 1:
+            return self.names()
+
+        for name, weight in self.queues:
+            self.current[name] += weight
+        first = max(self.names(), key=lambda name: self.current[name])
+        self.current[first] -= self.total
+
+        # the rest only fill a batch the first queue could not
+        rest = sorted((q for q in self.queues if q[0] != first), key=lambda q: -q[1])
+        return [first] + [name for name, _ in rest]
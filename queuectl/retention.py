@@ -0,0 +1,67 @@
+# Retention policy: move old completed and dead jobs to the archive database
+#
+# Policy keys in Config (0 disables a rule):
+#   retention_completed_days  archive completed jobs that finished more than N days ago
+#   retention_max_completed   keep at most N completed jobs in the main table, the
+#                             most recently finished
+#   retention_dead_days       archive dead jobs that died more than N days ago
+# Age counts from the last update (updated_at), not from enqueue, so a job
+# that was delayed or queued for long is not archived as soon as it ends.
+# Archived rows go to <db>.archive, a separate SQLite file with the same
+# jobs table, and their log files are deleted.
+
+import os
+from typing import Optional
+
+from .config import Config
+from .joblog import remove_logs
+from .models import JobState, now_micros
+from .storage import JobStorage
+
+DAY_MICROS = 24 * 60 * 60 * 1_000_000
+
+
+def archive_path(db_path: str) -> str:
+
+    return os.path.abspath(db_path) + '.archive'
+
+
+def collect(storage: JobStorage, config: Config, max_batches: Optional[int] = None) -> dict:
+
+    # Apply the retention policy in batches; returns archived counts per rule
+    # plus the pages released by incremental vacuum. max_batches bounds the
+    # work of each rule per call so idle workers can run it a little at a
+    # time without a large completed backlog starving the dead_age rule.
+    batch_size = config.get('gc_batch_size', 500)
+    target = archive_path(storage.db_path)
+    now = now_micros()
+
+    rules = []
+    if config.get('retention_completed_days', 0):
+        cutoff = now - config.get('retention_completed_days') * DAY_MICROS
+        rules.append(('completed_age', JobState.COMPLETED, {'older_than': cutoff}))
+    if config.get('retention_max_completed', 0):
+        rules.append(('completed_rows', JobState.COMPLETED, {'keep': config.get('retention_max_completed')}))
+    if config.get('retention_dead_days', 0):
+        cutoff = now - config.get('retention_dead_days') * DAY_MICROS
+        rules.append(('dead_age', JobState.DEAD, {'older_than': cutoff}))
+
+    result = {name: 0 for name, _, _ in rules}
+
+    for name, state, kwargs in rules:
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            ids = storage.archive_jobs(state, target, batch_size=batch_size, **kwargs)
+            batches += 1
+            if not ids:
+                break
+
+            for jid in ids:
+                remove_logs(storage.db_path, jid)
+            result[name] += len(ids)
+
+            if len(ids) < batch_size:
+                break
+
+    result['vacuumed_pages'] = storage.incremental_vacuum() if any(result.values()) else 0
+    return result
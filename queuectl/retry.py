@@ -0,0 +1,131 @@
+# Retry policies: how long a failed job waits, and whether it retries at all
+#
+# A job may carry a retry_policy object with any of:
+#   strategy   exponential (base ** attempts), linear (base * attempts) or fixed (base)
+#   base       seconds; also the floor of decorrelated jitter
+#   max_delay  cap on a single wait, in seconds
+#   jitter     none, full (uniform between 0 and the delay) or decorrelated
+#              (uniform between base and 3x the previous wait, capped)
+#   retry_on   exit codes worth retrying; any other failure goes straight
+#              to the DLQ. Timeouts and commands that fail to start exit -1.
+# Missing keys fall back to the backoff_* and retry_exit_codes keys in Config.
+# Jitter spreads jobs that failed together so their retries do not all hit
+# the claim query and the failing dependency at the same moment.
+
+import random
+from typing import FrozenSet, NamedTuple, Optional
+
+from .config import Config
+from .models import Job
+
+STRATEGIES = ('exponential', 'linear', 'fixed')
+JITTERS = ('none', 'full', 'decorrelated')
+
+
+class RetryPolicy(NamedTuple):
+    strategy: str
+    base: float
+    max_delay: float
+    jitter: str
+    retry_on: Optional[FrozenSet[int]]
+
+
+def parse_exit_codes(value) -> Optional[FrozenSet[int]]:
+
+    # "1,75" or [1, 75] -> frozenset; "" or None -> None (retry every failure)
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, (list, tuple)):
+        raise ValueError("'retry_on' must be a list of exit codes")
+
+    codes = set()
+    for code in value:
+        if isinstance(code, str) and code.strip().lstrip('-').isdigit():
+            code = int(code)
+        if isinstance(code, bool) or not isinstance(code, int):
+            raise ValueError(f"invalid exit code '{code}'")
+        codes.add(code)
+    return frozenset(codes)
+
+
+def parse_policy(data) -> dict:
+
+    # Validate a job's retry_policy object; returns only the keys it sets
+    if not isinstance(data, dict):
+        raise ValueError("'retry_policy' must be a JSON object")
+
+    unknown = set(data) - set(RetryPolicy._fields)
+    if unknown:
+        raise ValueError(f"unknown retry_policy key(s): {', '.join(sorted(unknown))}")
+
+    policy = {}
+    if 'strategy' in data:
+        if data['strategy'] not in STRATEGIES:
+            raise ValueError(f"'strategy' must be one of: {', '.join(STRATEGIES)}")
+        policy['strategy'] = data['strategy']
+    if 'jitter' in data:
+        if data['jitter'] not in JITTERS:
+            raise ValueError(f"'jitter' must be one of: {', '.join(JITTERS)}")
+        policy['jitter'] = data['jitter']
+
+    for key in ('base', 'max_delay'):
+        if key not in data:
+            continue
+        value = data[key]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"'{key}' must be a non-negative number")
+        policy[key] = value
+    if policy.get('max_delay') == 0:
+        raise ValueError("'max_delay' must be positive")
+
+    if 'retry_on' in data:
+        codes = parse_exit_codes(data['retry_on'])
+        policy['retry_on'] = sorted(codes) if codes is not None else None
+
+    return policy
+
+
+def retry_policy(job: Job, config: Config) -> RetryPolicy:
+
+    own = job.retry_policy or {}
+
+    def pick(key, configkey, default):
+        return own[key] if key in own else config.get(configkey, default)
+
+    return RetryPolicy(
+        pick('strategy', 'backoff_strategy', 'exponential'),
+        pick('base', 'backoff_base', 2),
+        pick('max_delay', 'backoff_max_seconds', 3600),
+        pick('jitter', 'backoff_jitter', 'none'),
+        parse_exit_codes(pick('retry_on', 'retry_exit_codes', ''))
+    )
+
+
+def retryable(policy: RetryPolicy, exit_code: int) -> bool:
+
+    return policy.retry_on is None or exit_code in policy.retry_on
+
+
+def backoff_delay(policy: RetryPolicy, attempts: int, previous: Optional[float] = None,
+                  rng: random.Random = random) -> float:
+
+    # Seconds to wait before the next attempt; previous is the last wait,
+    # which decorrelated jitter grows from
+    if policy.strategy == 'fixed':
+        delay = policy.base
+    elif policy.strategy == 'linear':
+        delay = policy.base * attempts
+    else:
+        try:
+            delay = float(policy.base) ** attempts
+        except OverflowError:
+            delay = policy.max_delay
+    delay = min(delay, policy.max_delay)
+
+    if policy.jitter == 'full':
+        return rng.uniform(0, delay)
+    if policy.jitter == 'decorrelated':
+        return min(policy.max_delay, rng.uniform(policy.base, max(previous or policy.base, policy.base) * 3))
+    return delay
@@ -0,0 +1,92 @@
+# Recurring jobs: turns due schedules into ordinary jobs
+#
+# Every worker runs a Scheduler, but only the holder of the `scheduler` row
+# in the locks table materializes anything; the others retry when that
+# lease runs out, so a crashed leader is replaced within
+# scheduler_lock_seconds. Each instance's id is the schedule name plus its
+# tick in UTC (nightly@20260101T0300Z) and is inserted with OR IGNORE in the
+# same transaction that moves the schedule on, so neither two schedulers nor
+# a restart can enqueue the same tick twice. Ticks missed while no scheduler
+# was running are coalesced into one instance for the latest of them.
+
+import threading
+from datetime import datetime
+from typing import List, Tuple
+
+from .config import Config
+from .cron import CronExpr
+from .models import Job, Schedule
+from .notify import notify_workers
+from .storage import JobStorage
+
+LOCK_NAME = 'scheduler'
+
+# Schedules materialized per transaction
+SCHEDULE_BATCH = 100
+
+
+class Scheduler:
+
+
+    def __init__(self, storage: JobStorage, owner: str, config: Config):
+
+        self.storage = storage
+        self.owner = owner
+        self.lock_seconds = config.get('scheduler_lock_seconds', 30)
+        self.leader = False
+
+    def expand(self, schedule: Schedule, now: datetime) -> Tuple[List[Job], datetime]:
+
+        # One instance for the latest tick at or before now, and the tick after it
+        cron = CronExpr(schedule.cron)
+        fire, after = schedule.next_run_at, cron.next_after(schedule.next_run_at)
+        while after <= now:
+            fire, after = after, cron.next_after(after)
+
+        return [schedule.instance(fire)], after
+
+    def tick(self) -> int:
+
+        # Materialize everything due if this process is the leader
+        self.leader = self.storage.acquire_lock(LOCK_NAME, self.owner, self.lock_seconds)
+        if not self.leader:
+            return 0
+
+        created = 0
+        while True:
+            schedules, inserted = self.storage.materialize_schedules(self.expand, SCHEDULE_BATCH)
+            created += inserted
+            if schedules < SCHEDULE_BATCH:
+                break
+
+        if created:
+            notify_workers(self.storage.db_path)
+        return created
+
+    def sleeptime(self) -> float:
+
+        # Renew the lock (or retry for it) well before it expires
+        wait = self.lock_seconds / 3
+        if self.leader:
+            due = self.storage.next_schedule_at()
+            if due is not None:
+                wait = min(wait, max(0.0, (due - datetime.now()).total_seconds()))
+        return wait
+
+    def run(self, stopped: threading.Event) -> None:
+
+        while not stopped.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"[Scheduler] {e}")
+            stopped.wait(self.sleeptime())
+
+        self.stop()
+
+    def stop(self) -> None:
+
+        # let another process take over at once
+        if self.leader:
+            self.storage.release_lock(LOCK_NAME, self.owner)
+            self.leader = False
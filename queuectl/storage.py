@@ -1,34 +1,385 @@
 
 
+import json
+import os
 import sqlite3
 import threading
+import time
 from contextlib import contextmanager
 
 from datetime import datetime
 
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
 
-from .models import Job, JobState
+from .config import Config
+from .models import Job, JobState, JobSummary, Schedule, from_micros, now_micros, to_micros
+
+
+# Connection pragmas per storage profile, selected with
+# `queuectl config set storage-profile <name>`
+STORAGE_PROFILES = {
+    # fsync on every commit: nothing committed is lost, even on power failure
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'busy_timeout': 30000,
+        'cache_size': -8000,
+        'mmap_size': 0,
+    },
+    # WAL with fsync at checkpoints: survives process crashes, a power
+    # failure may roll back the last few commits
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 10000,
+        'cache_size': -32000,
+        'mmap_size': 128 * 1024 * 1024,
+    },
+    # no fsync at all: an OS crash or power failure can corrupt the database
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'busy_timeout': 10000,
+        'cache_size': -128000,
+        'mmap_size': 256 * 1024 * 1024,
+    },
+}
+
+DEFAULT_PROFILE = 'balanced'
+
+
+# PRAGMA user_version of the current schema. Version 2 stores timestamps as
+# integer epoch-microseconds and keeps a ready_at column for the claim query;
+# version 3 has incremental auto_vacuum; versions 4 and up have the columns,
+# tables and indexes of _create_schema. Bump it with every change there.
+SCHEMA_VERSION = 5
+
+TIMESTAMP_COLUMNS = ('created_at', 'updated_at', 'next_retry_at', 'locked_at', 'lease_expires_at', 'run_at',
+                     'dedupe_until')
+
+# Stored as JSON text
+JSON_COLUMNS = ('retry_policy', 'args', 'kwargs', 'depends_on')
+
+JOBS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id TEXT PRIMARY KEY,
+        command TEXT NOT NULL,
+        state TEXT NOT NULL,
+        attempts INTEGER DEFAULT 0,
+        max_retries INTEGER DEFAULT 3,
+        created_at INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL,
+        output TEXT,
+        error TEXT,
+        exit_code INTEGER,
+        next_retry_at INTEGER,
+        locked_by TEXT,
+        locked_at INTEGER,
+        lease_expires_at INTEGER,
+        ready_at INTEGER,
+        version INTEGER NOT NULL DEFAULT 0,
+        timeout_seconds INTEGER,
+        max_memory_mb INTEGER,
+        max_cpu_seconds INTEGER,
+        nice INTEGER,
+        queue TEXT NOT NULL DEFAULT 'default',
+        priority INTEGER NOT NULL DEFAULT 0,
+        run_at INTEGER,
+        retry_policy TEXT,
+        retry_delay REAL,
+        kind TEXT NOT NULL DEFAULT 'shell',
+        args TEXT,
+        kwargs TEXT,
+        result TEXT,
+        depends_on TEXT,
+        pending_deps INTEGER NOT NULL DEFAULT 0,
+        idempotency_key TEXT,
+        dedupe_until INTEGER
+    )
+"""
+
+# Recurring job definitions; template is the JSON of the instance fields
+SCHEDULES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schedules (
+        name TEXT PRIMARY KEY,
+        cron TEXT NOT NULL,
+        template TEXT NOT NULL,
+        next_run_at INTEGER NOT NULL,
+        last_run_at INTEGER,
+        created_at INTEGER NOT NULL
+    )
+"""
+
+# Unresolved dependency edges: child waits for parent. An edge is deleted
+# when its parent completes, so the primary key finds the dependents of a
+# finished job with one seek and the table only holds open edges.
+DEPS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS job_deps (
+        parent TEXT NOT NULL,
+        child TEXT NOT NULL,
+        PRIMARY KEY (parent, child)
+    ) WITHOUT ROWID
+"""
+
+# Named leases for work only one process may do at a time
+LOCKS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS locks (
+        name TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        expires_at INTEGER NOT NULL
+    )
+"""
+
+# Jobs per state, kept current by the triggers below in the same
+# transaction as every insert, delete and state change, so `status` reads
+# a handful of rows instead of grouping the whole table
+COUNTS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS job_counts (
+        state TEXT PRIMARY KEY,
+        count INTEGER NOT NULL
+    ) WITHOUT ROWID
+"""
+
+# Finished jobs per minute. Each minute maps to one of STATS_MINUTES slots
+# that is reset when the next lap reaches it, so the table never grows;
+# runtime_micros sums the run time of the completed jobs.
+STATS_MINUTES = 60
+
+STATS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS job_stats (
+        slot INTEGER PRIMARY KEY,
+        minute INTEGER NOT NULL,
+        completed INTEGER NOT NULL,
+        failed INTEGER NOT NULL,
+        dead INTEGER NOT NULL,
+        runtime_micros INTEGER NOT NULL
+    )
+"""
+
+COUNT_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_insert AFTER INSERT ON jobs
+    BEGIN
+        INSERT INTO job_counts (state, count) VALUES (NEW.state, 1)
+        ON CONFLICT(state) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_delete AFTER DELETE ON jobs
+    BEGIN
+        UPDATE job_counts SET count = count - 1 WHERE state = OLD.state;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_state AFTER UPDATE OF state ON jobs
+    WHEN OLD.state IS NOT NEW.state
+    BEGIN
+        UPDATE job_counts SET count = count - 1 WHERE state = OLD.state;
+        INSERT INTO job_counts (state, count) VALUES (NEW.state, 1)
+        ON CONFLICT(state) DO UPDATE SET count = count + 1;
+    END
+    """,
+    # updated_at of a processing row is its start time
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_finished AFTER UPDATE OF state ON jobs
+    WHEN OLD.state = 'processing' AND NEW.state IN ('completed', 'failed', 'dead')
+    BEGIN
+        INSERT INTO job_stats (slot, minute, completed, failed, dead, runtime_micros)
+        VALUES (NEW.updated_at / 60000000 % {STATS_MINUTES}, NEW.updated_at / 60000000,
+                NEW.state = 'completed', NEW.state = 'failed', NEW.state = 'dead',
+                CASE WHEN NEW.state = 'completed' THEN NEW.updated_at - OLD.updated_at ELSE 0 END)
+        ON CONFLICT(slot) DO UPDATE SET
+            completed = CASE WHEN minute = excluded.minute THEN completed ELSE 0 END + excluded.completed,
+            failed = CASE WHEN minute = excluded.minute THEN failed ELSE 0 END + excluded.failed,
+            dead = CASE WHEN minute = excluded.minute THEN dead ELSE 0 END + excluded.dead,
+            runtime_micros = CASE WHEN minute = excluded.minute THEN runtime_micros ELSE 0 END
+                             + excluded.runtime_micros,
+            minute = excluded.minute;
+    END
+    """,
+]
+
+# Lease given to PROCESSING rows written before leases covered running jobs
+LEGACY_LEASE_MICROS = 300 * 1_000_000
+
+# Columns added after schema 2, created by _create_schema
+ADDED_COLUMNS = [
+    ('version', 'INTEGER NOT NULL DEFAULT 0'),
+    ('timeout_seconds', 'INTEGER'),
+    ('max_memory_mb', 'INTEGER'),
+    ('max_cpu_seconds', 'INTEGER'),
+    ('nice', 'INTEGER'),
+    ('queue', "TEXT NOT NULL DEFAULT 'default'"),
+    ('priority', 'INTEGER NOT NULL DEFAULT 0'),
+    ('run_at', 'INTEGER'),
+    ('retry_policy', 'TEXT'),
+    ('retry_delay', 'REAL'),
+    ('kind', "TEXT NOT NULL DEFAULT 'shell'"),
+    ('args', 'TEXT'),
+    ('kwargs', 'TEXT'),
+    ('result', 'TEXT'),
+    ('depends_on', 'TEXT'),
+    ('pending_deps', 'INTEGER NOT NULL DEFAULT 0'),
+    ('idempotency_key', 'TEXT'),
+    ('dedupe_until', 'INTEGER'),
+]
+
+# What an enqueue does when the job's id or live idempotency key is taken:
+#   error               reject the job
+#   skip                keep the existing job, write nothing
+#   replace_if_pending  overwrite the existing job, keeping its id, while it
+#                       is pending and not leased; otherwise skip
+CONFLICT_MODES = ('error', 'skip', 'replace_if_pending')
+
+# ready_at is the time a job may next be claimed: created_at for pending jobs,
+# next_retry_at for failed ones and the lease expiry while a worker holds it
+# in its prefetch buffer. It is NULL in every other state and while a job
+# waits for dependencies, so the partial index below only ever contains
+# claimable jobs.
+READY_AT_SQL = """
+    CASE
+        WHEN state = 'pending' AND pending_deps = 0 THEN COALESCE(lease_expires_at, run_at, created_at)
+        WHEN state = 'failed' THEN COALESCE(lease_expires_at, next_retry_at, updated_at)
+    END
+"""
+
+# Parameters: now, limit
+CLAIM_SQL = """
+    SELECT id FROM jobs
+    WHERE ready_at <= ?
+    ORDER BY ready_at ASC
+    LIMIT ?
+"""
+
+# Per-queue claims walk the priority levels of a queue from the top, one
+# index seek per level, so the cost does not depend on how many jobs wait.
+# Parameters: queue, priority bound
+QUEUE_LEVEL_SQL = """
+    SELECT priority FROM jobs
+    WHERE queue = ? AND priority < ? AND ready_at IS NOT NULL
+    ORDER BY priority DESC
+    LIMIT 1
+"""
+
+# Parameters: queue, priority, cutoff, limit
+QUEUE_CLAIM_SQL = """
+    SELECT id, ready_at FROM jobs
+    WHERE queue = ? AND priority = ? AND ready_at <= ?
+    ORDER BY ready_at ASC
+    LIMIT ?
+"""
+
+# The starvation pass ignores priority: one seek on idx_queue_oldest per
+# queue, however many priority levels it holds.
+# Parameters: queue, cutoff, limit
+QUEUE_OLDEST_SQL = """
+    SELECT id FROM jobs
+    WHERE queue = ? AND ready_at <= ?
+    ORDER BY ready_at ASC
+    LIMIT ?
+"""
+
+# Parameters: queue
+QUEUE_DUE_SQL = """
+    SELECT MIN(ready_at) FROM jobs
+    WHERE queue = ? AND ready_at IS NOT NULL
+"""
+
+# Above any priority a job can be enqueued with
+PRIORITY_CEILING = 2 ** 62
+
+# Ids per IN (...) list
+ID_CHUNK = 500
+
+
+def _chunks(ids: List[str], size: int = ID_CHUNK) -> Iterator[List[str]]:
+
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _iso_to_micros(value):
+
+    if value is None or isinstance(value, int):
+        return value
+    return to_micros(datetime.fromisoformat(value))
 
 
 class JobStorage:
     
     
-    def __init__(self, db_path: str = "queuectl.db"):
+    def __init__(self, db_path: str = "queuectl.db", profile: Optional[str] = None, readonly: bool = False):
         
+        # readonly opens the file with mode=ro and never writes, so status
+        # and metrics polls cannot wait on the write lock. Only a current
+        # schema can be read as is; anything else is opened read-write and
+        # migrated as usual.
         self.db_path = db_path
+        self.readonly = readonly
+
+        if profile is None:
+            profile = Config().get('storage_profile', DEFAULT_PROFILE)
+        if profile not in STORAGE_PROFILES:
+            raise ValueError(f"Unknown storage profile '{profile}'. Must be one of: {', '.join(STORAGE_PROFILES)}")
+        self.profile = profile
         self._local = threading.local()
 
+        # Called with the seconds each BEGIN IMMEDIATE waited for the lock;
+        # every write a worker makes (claims, transitions, heartbeats and
+        # releases) goes through _write_transaction, so all its waits count
+        self.lockwait: Optional[Callable[[float], None]] = None
+
+        if readonly:
+            try:
+                version = self._get_connection().execute("PRAGMA user_version").fetchone()[0]
+            except sqlite3.OperationalError:
+                # no database yet
+                version = None
+            if version == SCHEMA_VERSION:
+                return
+            self.close()
+            self._local = threading.local()
+            self.readonly = False
+
         self._init_db()
     
     def _get_connection(self):
         
         if not hasattr(self._local, 'connection'):
 
-            self._local.connection = sqlite3.connect(self.db_path, check_same_thread=False)
-            
-            self._local.connection.row_factory = sqlite3.Row
+            pragmas = STORAGE_PROFILES[self.profile]
+
+            if self.readonly:
+                conn = sqlite3.connect(f"file:{quote(os.path.abspath(self.db_path))}?mode=ro", uri=True,
+                                       check_same_thread=False, timeout=pragmas['busy_timeout'] / 1000)
+            else:
+                conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                       timeout=pragmas['busy_timeout'] / 1000)
+            conn.row_factory = sqlite3.Row
+
+            # Free on a brand new file, before journal_mode writes its
+            # header; lets `queuectl gc` return free pages. Setting it on
+            # an existing file needs the write lock, and a VACUUM to take
+            # effect, so older files are switched once by _migrate.
+            if not self.readonly and conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+            for name, value in pragmas.items():
+                # the journal mode is the writers' business
+                if not (self.readonly and name == 'journal_mode'):
+                    conn.execute(f"PRAGMA {name} = {value}")
+
+            # INSERT OR REPLACE then fires the delete trigger for the row
+            # it replaces, which keeps job_counts exact
+            conn.execute("PRAGMA recursive_triggers = ON")
+
+            # Statements that fire triggers keep a statement journal; in a
+            # temp file that cost more than the triggers themselves
+            conn.execute("PRAGMA temp_store = MEMORY")
+
+            self._local.connection = conn
         return self._local.connection
     
     @contextmanager
@@ -49,54 +400,427 @@ class JobStorage:
     def _init_db(self):
         
         with self._get_cursor() as cursor:
+            cursor.execute("PRAGMA user_version")
+            version = cursor.fetchone()[0]
 
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS jobs (
-                    id TEXT PRIMARY KEY,
-                    command TEXT NOT NULL,
-                    state TEXT NOT NULL,
-                    attempts INTEGER DEFAULT 0,
-                    max_retries INTEGER DEFAULT 3,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-                    output TEXT,
-                    error TEXT,
-                    exit_code INTEGER,
-                    next_retry_at TEXT
-                )
-            """)
-            
-            # Create indexes for common queries
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_state ON jobs(state)")
-            
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_next_retry ON jobs(next_retry_at)")
+        # A current database opens without writing anything, so opening
+        # one never waits for the write lock
+        if version < SCHEMA_VERSION:
+            self._migrate()
+
+    def _init_counters(self) -> None:
+
+        # job_counts starts from one GROUP BY when it is created; from then
+        # on the triggers keep it current
+        marker = "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_jobs_finished'"
+        with self._get_cursor() as cursor:
+            cursor.execute(marker)
+            if cursor.fetchone():
+                return
+
+        with self._write_transaction() as cursor:
+            # Another process may have set them up while we waited
+            cursor.execute(marker)
+            if cursor.fetchone():
+                return
+
+            cursor.execute(COUNTS_TABLE_SQL)
+            cursor.execute(STATS_TABLE_SQL)
+            for sql in COUNT_TRIGGERS_SQL:
+                cursor.execute(sql)
+
+            cursor.execute("DELETE FROM job_counts")
+            cursor.execute("INSERT INTO job_counts (state, count) SELECT state, COUNT(*) FROM jobs GROUP BY state")
     
-    def save_job(self, job: Job) -> None:
+    def _add_column(self, cursor, name: str, decl: str) -> None:
         
-        job.updated_at = datetime.now()
+        cursor.execute("PRAGMA table_info(jobs)")
+        if name not in [row['name'] for row in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE jobs ADD COLUMN {name} {decl}")
+    
+    def _create_schema(self, cursor) -> None:
         
-        with self._get_cursor() as cursor:
-            cursor.execute("""
-                INSERT OR REPLACE INTO jobs 
-                (id, command, state, attempts, max_retries, created_at, updated_at, 
-                 output, error, exit_code, next_retry_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                           
-            """, (
-                job.jid,
-                job.command,
-                job.state.value,
-                job.attempts,
-                job.max_retries,
-
-                job.created_at.isoformat(),
-                job.updated_at.isoformat(),
-
-                job.output,
-                job.error,
-                job.exit_code,
-                job.next_retry_at.isoformat() if job.next_retry_at else None
-            ))
+        # Schema 3 -> 4: columns, tables and indexes added since schema 2,
+        # all idempotent, and leases for jobs left running by old versions
+        for name, decl in ADDED_COLUMNS:
+            self._add_column(cursor, name, decl)
+        
+        # Create indexes for common queries
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_state ON jobs(state)")
+
+        # Keyset pagination for listings, newest first
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_state_created ON jobs(state, created_at, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_created ON jobs(created_at, id)")
+
+        # Retention ages finished jobs by when they finished; partial,
+        # so transitions of live jobs do not maintain it. Spelled as an
+        # OR: the planner does not see that state = 'dead' implies an IN
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_finished ON jobs(state, updated_at, id)
+            WHERE state = 'completed' OR state = 'dead'
+        """)
+
+        # Covering partial index for the claim query: holds only
+        # claimable rows, already in claim order
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_ready ON jobs(ready_at, id)
+            WHERE ready_at IS NOT NULL
+        """)
+
+        # Per-queue claims by priority, then readiness
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_queue_ready ON jobs(queue, priority, ready_at, id)
+            WHERE ready_at IS NOT NULL
+        """)
+
+        # Per-queue readiness across priorities, for the starvation pass
+        # and the next due time
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_queue_oldest ON jobs(queue, ready_at, id)
+            WHERE ready_at IS NOT NULL
+        """)
+
+        # Running jobs by lease expiry, for heartbeats and the reaper
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_lease ON jobs(lease_expires_at)
+            WHERE state = 'processing'
+        """)
+
+        # One live job per idempotency key; keys whose dedupe window
+        # has passed are cleared by the next enqueue that wants them
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_idempotency ON jobs(idempotency_key)
+            WHERE idempotency_key IS NOT NULL
+        """)
+
+        # Dependents of a job come from the primary key; this one
+        # serves `info` and cleanup by child
+        cursor.execute(DEPS_TABLE_SQL)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_deps_child ON job_deps(child)")
+
+        cursor.execute(SCHEDULES_TABLE_SQL)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_schedules_next ON schedules(next_run_at)")
+        cursor.execute(LOCKS_TABLE_SQL)
+
+        # Jobs left running by older versions have no lease; give them
+        # one from their last update so the reaper can recover them
+        cursor.execute("""
+            UPDATE jobs SET lease_expires_at = updated_at + ?
+            WHERE state = 'processing' AND lease_expires_at IS NULL
+        """, (LEGACY_LEASE_MICROS,))
+    
+    def _migrate(self):
+        
+        # Run the schema steps this database has not had yet, once
+        conn = self._get_connection()
+        conn.create_function('iso_to_micros', 1, _iso_to_micros)
+
+        with self._write_transaction() as cursor:
+            # Another process may have migrated while we waited for the lock
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] < 2:
+                self._migrate_v2(cursor)
+                cursor.execute("PRAGMA user_version = 2")
+
+        # Schema 2 -> 3: VACUUM cannot run in a transaction, so it runs
+        # before the version moves on; a failed one is retried next open
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            self.incremental_vacuum(full=True)
+
+        with self._write_transaction() as cursor:
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] < SCHEMA_VERSION:
+                self._create_schema(cursor)
+                cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+        self._init_counters()
+    
+    def _migrate_v2(self, cursor) -> None:
+        
+        # Schema 1 -> 2: rebuild the table with integer timestamps and ready_at
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'jobs'")
+        if not cursor.fetchone():
+            cursor.execute(JOBS_TABLE_SQL.format(name='jobs'))
+            return
+
+        cursor.execute("PRAGMA table_info(jobs)")
+        existing = {row['name'] for row in cursor.fetchall()}
+
+        cursor.execute(JOBS_TABLE_SQL.format(name='jobs_v2'))
+        cursor.execute("PRAGMA table_info(jobs_v2)")
+        columns = [row['name'] for row in cursor.fetchall() if row['name'] in existing]
+
+        select = []
+        for column in columns:
+            if column in TIMESTAMP_COLUMNS:
+                select.append(f"iso_to_micros({column})")
+            else:
+                select.append(column)
+
+        cursor.execute(f"""
+            INSERT INTO jobs_v2 ({', '.join(columns)})
+            SELECT {', '.join(select)} FROM jobs
+        """)
+        cursor.execute(f"UPDATE jobs_v2 SET ready_at = {READY_AT_SQL}")
+
+        cursor.execute("DROP TABLE jobs")
+        cursor.execute("ALTER TABLE jobs_v2 RENAME TO jobs")
+    
+    @contextmanager
+    def _write_transaction(self):
+        
+        # BEGIN IMMEDIATE takes the write lock up front, so a SELECT followed
+        # by an UPDATE inside the block cannot race with another process
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        started = time.perf_counter()
+        cursor.execute("BEGIN IMMEDIATE")
+        if self.lockwait:
+            self.lockwait(time.perf_counter() - started)
+        try:
+            yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    def _job_row(self, job: Job) -> dict:
+        
+        # Job.to_dict keys match the table; timestamps are stored as integers
+        row = job.to_dict()
+        for column in TIMESTAMP_COLUMNS:
+            row[column] = to_micros(getattr(job, column))
+        for column in JSON_COLUMNS:
+            if row[column] is not None:
+                row[column] = json.dumps(row[column])
+
+        if job.state == JobState.PENDING and not job.pending_deps:
+            row['ready_at'] = row['lease_expires_at'] or row['run_at'] or row['created_at']
+        elif job.state == JobState.FAILED:
+            row['ready_at'] = row['lease_expires_at'] or row['next_retry_at'] or row['updated_at']
+        else:
+            row['ready_at'] = None
+        return row
+    
+    def _row_job(self, row) -> Job:
+        
+        data = dict(row)
+        for column in TIMESTAMP_COLUMNS:
+            data[column] = from_micros(data.get(column))
+        for column in JSON_COLUMNS:
+            if data.get(column):
+                data[column] = json.loads(data[column])
+        return Job.from_dict(data)
+    
+    def _insert_sql(self, row: dict, conflict: str = 'REPLACE') -> str:
+        
+        columns = list(row.keys())
+        return (f"INSERT OR {conflict} INTO jobs ({', '.join(columns)}) "
+                f"VALUES ({', '.join(':' + c for c in columns)})")
+    
+    def save_job(self, job: Job, on_conflict: Optional[str] = None) -> str:
+        
+        # Returns 'inserted', 'replaced' or 'skipped'; on the last two
+        # job.jid is the id of the existing job
+        outcomes = []
+        self.save_jobs([job], on_conflict, outcomes)
+        return outcomes[0]
+    
+    def insert_jobs(self, jobs: List[Job], on_conflict: Optional[str] = None) -> int:
+        
+        # Insert many jobs with one executemany inside a single transaction
+        return self.save_jobs(jobs, on_conflict)
+    
+    def save_jobs(self, jobs: List[Job], on_conflict: Optional[str] = None,
+                  outcomes: Optional[List[str]] = None) -> int:
+        
+        # save_job for many jobs in one transaction; returns the jobs written.
+        # on_conflict is one of CONFLICT_MODES; None overwrites by id without
+        # looking. outcomes, if given, receives one entry per job.
+        if not jobs:
+            return 0
+
+        now = datetime.now()
+        for job in jobs:
+            job.updated_at = now
+
+        with self._write_transaction() as cursor:
+            if on_conflict is None:
+                writes = jobs
+                if outcomes is not None:
+                    outcomes.extend(['inserted'] * len(jobs))
+            else:
+                writes = self._resolve_conflicts(cursor, jobs, on_conflict, outcomes)
+                if not writes:
+                    return 0
+
+            edges = self._link_dependencies(cursor, writes)
+
+            rows = [self._job_row(job) for job in writes]
+            cursor.executemany(self._insert_sql(rows[0]), rows)
+            if edges:
+                cursor.executemany("INSERT OR IGNORE INTO job_deps (parent, child) VALUES (?, ?)", edges)
+
+        return len(writes)
+    
+    def _resolve_conflicts(self, cursor, jobs: List[Job], on_conflict: str,
+                           outcomes: Optional[List[str]] = None) -> List[Job]:
+        
+        # The jobs to write after applying on_conflict to ids and live
+        # idempotency keys that already exist, in the table or earlier in
+        # the batch. A job that loses to an existing one takes its id, and
+        # later jobs in the batch that depend on it follow. Raises
+        # ValueError in error mode, before anything is written.
+        if on_conflict not in CONFLICT_MODES:
+            raise ValueError(f"on_conflict must be one of: {', '.join(CONFLICT_MODES)}")
+
+        now = now_micros()
+        byid, bykey = {}, {}
+        ids = [job.jid for job in jobs]
+        keys = [job.idempotency_key for job in jobs if job.idempotency_key]
+
+        for column, values in (('id', ids), ('idempotency_key', keys)):
+            for chunk in _chunks(sorted(set(values))):
+                cursor.execute(f"""
+                    SELECT id, state, locked_by, idempotency_key, dedupe_until FROM jobs
+                    WHERE {column} IN ({','.join('?' * len(chunk))})
+                """, chunk)
+                for row in cursor.fetchall():
+                    byid[row['id']] = row
+                    if row['idempotency_key'] is not None:
+                        bykey[row['idempotency_key']] = row
+
+        writes = {}
+        aliases = {}
+        expired, replaced = [], []
+        for job in jobs:
+            if job.depends_on and aliases:
+                job.depends_on = list(dict.fromkeys(aliases.get(p, p) for p in job.depends_on))
+
+            key = job.idempotency_key
+            holder = bykey.get(key) if key else None
+            if holder is not None and holder['dedupe_until'] is not None and holder['dedupe_until'] <= now:
+                # window passed: the key is free once the old job lets go of it
+                expired.append(holder['id'])
+                holder = None
+            if holder is None:
+                holder = byid.get(job.jid)
+
+            if holder is None:
+                outcome = 'inserted'
+            elif on_conflict == 'error':
+                if key and holder['idempotency_key'] == key:
+                    raise ValueError(f"Idempotency key '{key}' is taken by job {holder['id']}")
+                raise ValueError(f"Job {job.jid} already exists")
+            elif (on_conflict == 'replace_if_pending' and holder['state'] == JobState.PENDING.value
+                  and holder['locked_by'] is None):
+                outcome = 'replaced'
+            else:
+                outcome = 'skipped'
+
+            if outcome != 'inserted' and holder['id'] != job.jid:
+                aliases[job.jid] = holder['id']
+                job.jid = holder['id']
+            if outcomes is not None:
+                outcomes.append(outcome)
+            if outcome == 'skipped':
+                continue
+            if outcome == 'replaced':
+                replaced.append(job.jid)
+
+            # later jobs in the batch conflict with this one; a replacement
+            # keeps the batch position of the job it replaces
+            writes[job.jid] = job
+            row = {'id': job.jid, 'state': job.state.value, 'locked_by': None,
+                   'idempotency_key': key, 'dedupe_until': to_micros(job.dedupe_until)}
+            byid[job.jid] = row
+            if key:
+                bykey[key] = row
+
+        for chunk in _chunks(expired):
+            cursor.execute(f"UPDATE jobs SET idempotency_key = NULL WHERE id IN ({','.join('?' * len(chunk))})",
+                           chunk)
+
+        # a replaced job is linked to its new dependencies from scratch
+        for chunk in _chunks(replaced):
+            cursor.execute(f"DELETE FROM job_deps WHERE child IN ({','.join('?' * len(chunk))})", chunk)
+
+        return list(writes.values())
+    
+    def _link_dependencies(self, cursor, jobs: List[Job]) -> List[Tuple[str, str]]:
+        
+        # Count each job's unfinished dependencies into pending_deps and
+        # return the (parent, child) edges to insert. A dependency must
+        # already exist or come earlier in the same batch; one that is dead
+        # sends the job straight to the DLQ. Raises ValueError, before
+        # anything is written, for unknown ids and cycles.
+        seen = {}
+        external = set()
+        for job in jobs:
+            external.update(p for p in job.depends_on or () if p not in seen)
+            seen[job.jid] = job
+
+        states = {}
+        for chunk in _chunks(sorted(external)):
+            cursor.execute(f"SELECT id, state FROM jobs WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+            states.update((row['id'], row['state']) for row in cursor.fetchall())
+
+        # Only a job that others already wait on can close a cycle: a
+        # replacement, or an existing job an earlier line of the batch
+        # depends on
+        waited = set()
+        for chunk in _chunks(sorted(seen)):
+            cursor.execute(f"SELECT DISTINCT parent FROM job_deps WHERE parent IN ({','.join('?' * len(chunk))})",
+                           chunk)
+            waited.update(row['parent'] for row in cursor.fetchall())
+
+        edges = []
+        batch = {}
+        parents = {}
+        for job in jobs:
+            job.pending_deps = 0
+            for parent in dict.fromkeys(job.depends_on or ()):
+                if parent == job.jid:
+                    raise ValueError(f"Job {job.jid} depends on itself")
+
+                state = batch[parent].state.value if parent in batch else states.get(parent)
+                if state is None:
+                    raise ValueError(f"Job {job.jid} depends on unknown job {parent}")
+                if state == JobState.COMPLETED.value:
+                    continue
+                if job.jid in waited and self._depends_on(cursor, parent, job.jid, parents):
+                    raise ValueError(f"Job {job.jid} depends on {parent}, which depends on it")
+
+                edges.append((parent, job.jid))
+                parents.setdefault(job.jid, []).append(parent)
+                waited.add(parent)
+                job.pending_deps += 1
+                if state == JobState.DEAD.value and job.state == JobState.PENDING:
+                    job.state = JobState.DEAD
+                    job.error = f"Dependency {parent} is dead"
+            batch[job.jid] = job
+
+        return edges
+    
+    def _depends_on(self, cursor, child: str, ancestor: str, batch: Dict[str, List[str]]) -> bool:
+        
+        # Whether child waits on ancestor, directly or transitively, through
+        # open edges in the table or the batch edges not yet written
+        seen = set()
+        frontier = {child}
+        while frontier:
+            if ancestor in frontier:
+                return True
+            seen |= frontier
+            found = set()
+            for chunk in _chunks(sorted(frontier)):
+                cursor.execute(f"SELECT parent FROM job_deps WHERE child IN ({','.join('?' * len(chunk))})",
+                               chunk)
+                found.update(row['parent'] for row in cursor.fetchall())
+            for job_id in frontier:
+                found.update(batch.get(job_id, ()))
+            frontier = found - seen
+        return False
     
     def get_job(self, job_id: str) -> Optional[Job]:
         
@@ -108,7 +832,7 @@ class JobStorage:
             
             if row:
 
-                return Job.from_dict(dict(row))
+                return self._row_job(row)
             return None
     
     def list_jobs(self, state: Optional[JobState] = None) -> List[Job]:
@@ -124,40 +848,524 @@ class JobStorage:
             else:
                 cursor.execute("SELECT * FROM jobs ORDER BY created_at DESC")
             
-            return [Job.from_dict(dict(row)) for row in cursor.fetchall()]
+            return [self._row_job(row) for row in cursor.fetchall()]
     
-    def get_pending_job(self) -> Optional[Job]:
+    def iter_job_summaries(self, state: Optional[JobState] = None, limit: Optional[int] = None,
+                           after: Optional[Tuple[int, str]] = None,
+                           width: int = 64) -> Iterator[JobSummary]:
         
+        # Newest first. Only summary columns are read, with command and error
+        # cut to `width` characters, and rows are yielded as they are fetched.
+        # `after` is the (created_at micros, id) of the last row of the
+        # previous page.
+        where = []
+        params: list = [width, width]
+
+        if state:
+            where.append("state = ?")
+            params.append(state.value)
+        if after:
+            where.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend([after[0], after[0], after[1]])
+
+        sql = f"""
+            SELECT id, substr(command, 1, ?) AS command, state, attempts, max_retries,
+                   created_at, substr(error, 1, ?) AS error
+            FROM jobs
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            ORDER BY created_at DESC, id DESC
+        """
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
         with self._get_cursor() as cursor:
+            cursor.execute(sql, params)
+
+            while True:
+                rows = cursor.fetchmany(500)
+                if not rows:
+                    break
+                for row in rows:
+                    yield JobSummary(row['id'], row['command'], JobState(row['state']),
+                                     row['attempts'], row['max_retries'],
+                                     from_micros(row['created_at']), row['error'])
+    
+    def get_pending_job(self, worker_id: Optional[str] = None, lease_seconds: float = 300) -> Optional[Job]:
+        
+        # Select and mark the job inside one write transaction so that two
+        # workers can never claim the same row
+        now = now_micros()
+        expires = now + int(lease_seconds * 1_000_000)
+
+        with self._write_transaction() as cursor:
             
-            cursor.execute("""
-                           
-                SELECT * FROM jobs 
-                WHERE (state = ? OR (state = ? AND next_retry_at <= ?))
-                ORDER BY created_at ASC
-                LIMIT 1
-            """, (JobState.PENDING.value, JobState.FAILED.value, datetime.now().isoformat()))
+            cursor.execute(CLAIM_SQL, (now, 1))
             
             row = cursor.fetchone()
-            if row:
-                job = Job.from_dict(dict(row))
-              
+            if not row:
+                return None
+
+            cursor.execute("""
+                UPDATE jobs SET state = ?, locked_by = ?, locked_at = ?, updated_at = ?,
+                                lease_expires_at = ?, ready_at = NULL, version = version + 1
+                WHERE id = ?
+            """, (JobState.PROCESSING.value, worker_id, now, now, expires, row['id']))
 
-                job.state = JobState.PROCESSING
-                self.save_job(job)
+            cursor.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],))
 
-                return job
+            return self._row_job(cursor.fetchone())
+    
+    def _queue_ready(self, cursor, queue: str, cutoff: int, n: int, oldest_first: bool = False) -> List[str]:
+        
+        # Up to n ids of jobs in queue that were ready by cutoff: highest
+        # priority first, or oldest first across all priorities
+        if oldest_first:
+            cursor.execute(QUEUE_OLDEST_SQL, (queue, cutoff, n))
+            return [row['id'] for row in cursor.fetchall()]
+
+        rows = []
+        level = PRIORITY_CEILING
+        while len(rows) < n:
+            cursor.execute(QUEUE_LEVEL_SQL, (queue, level))
+            row = cursor.fetchone()
+            if row is None:
+                break
+
+            level = row['priority']
+            cursor.execute(QUEUE_CLAIM_SQL, (queue, level, cutoff, n - len(rows)))
+            rows.extend(cursor.fetchall())
+
+        return [row['id'] for row in rows]
+    
+    def claim_batch(self, n: int, worker_id: str, lease_seconds: float = 300,
+                    queues: Optional[List[str]] = None, starve_after: float = 0) -> List[Job]:
+        
+        # Lease up to n ready jobs in one write transaction. Leased jobs keep
+        # their state and move their ready_at to the lease expiry, so they
+        # become claimable again if the worker dies before running them.
+        # With queues, jobs come from those queues in the order given, by
+        # priority; jobs ready for more than starve_after seconds go first.
+        now = now_micros()
+        expires = now + int(lease_seconds * 1_000_000)
+
+        with self._write_transaction() as cursor:
             
-            return None
+            if queues is None:
+                cursor.execute(CLAIM_SQL, (now, n))
+                ids = [row['id'] for row in cursor.fetchall()]
+            else:
+                ids = []
+                passes = [(now - int(starve_after * 1_000_000), True)] if starve_after else []
+                for cutoff, oldest_first in passes + [(now, False)]:
+                    for queue in queues:
+                        if len(ids) >= n:
+                            break
+                        # ask for extra rows to skip the ones the first pass took
+                        found = self._queue_ready(cursor, queue, cutoff, n, oldest_first)
+                        ids.extend(jid for jid in found if jid not in ids)
+                ids = ids[:n]
+
+            if not ids:
+                return []
+
+            marks = ','.join('?' * len(ids))
+            cursor.execute(f"""
+                UPDATE jobs SET locked_by = ?, locked_at = ?, lease_expires_at = ?, ready_at = ?,
+                                version = version + 1
+                WHERE id IN ({marks})
+            """, (worker_id, now, expires, expires, *ids))
+
+            cursor.execute(f"SELECT * FROM jobs WHERE id IN ({marks})", ids)
+
+            # in claim order
+            jobs = {row['id']: self._row_job(row) for row in cursor.fetchall()}
+            return [jobs[jid] for jid in ids]
+    
+    def mark_processing(self, job: Job, worker_id: str, lease_seconds: float = 300) -> bool:
+        
+        # Only succeeds while the worker still owns the job at the version it
+        # claimed, so a job whose lease expired and was claimed elsewhere is
+        # not run twice. The running job keeps a lease that heartbeat extends.
+        now = now_micros()
+        expires = now + int(lease_seconds * 1_000_000)
+
+        with self._write_transaction() as cursor:
+            cursor.execute("""
+                UPDATE jobs SET state = ?, attempts = attempts + 1, lease_expires_at = ?,
+                                ready_at = NULL, updated_at = ?, version = version + 1
+                WHERE id = ? AND locked_by = ? AND version = ? AND state IN (?, ?, ?)
+            """, (JobState.PROCESSING.value, expires, now, job.jid, worker_id, job.version,
+                  JobState.PENDING.value, JobState.FAILED.value, JobState.PROCESSING.value))
+
+            if cursor.rowcount != 1:
+                return False
+
+        job.state = JobState.PROCESSING
+        job.attempts += 1
+        job.lease_expires_at = from_micros(expires)
+        job.updated_at = from_micros(now)
+        job.version += 1
+        return True
+    
+    def _finish(self, cursor, job: Job, worker_id: str, state: JobState) -> bool:
+        
+        # Move a PROCESSING job owned by worker_id to its result state,
+        # writing only the result columns. Fails if anyone else changed
+        # the row since this worker started it.
+        now = now_micros()
+        next_retry_at = to_micros(job.next_retry_at) if state == JobState.FAILED else None
+
+        cursor.execute("""
+            UPDATE jobs SET state = ?, exit_code = ?, output = ?, error = ?, lease_expires_at = NULL,
+                            next_retry_at = ?, ready_at = ?, retry_delay = ?, result = ?, updated_at = ?,
+                            version = version + 1
+            WHERE id = ? AND state = ? AND locked_by = ? AND version = ?
+        """, (state.value, job.exit_code, job.output, job.error,
+              next_retry_at, next_retry_at, job.retry_delay, job.result, now,
+              job.jid, JobState.PROCESSING.value, worker_id, job.version))
+
+        if cursor.rowcount != 1:
+            return False
+
+        job.state = state
+        job.lease_expires_at = None
+        job.updated_at = from_micros(now)
+        job.version += 1
+        return True
+    
+    def _release_dependents(self, cursor, parents: List[str]) -> int:
+        
+        # One decrement per open edge of each completed parent, then drop
+        # those edges; a pending child whose count reaches 0 becomes ready
+        # now, or at its run_at. Touches only the parents' edges and their
+        # children, never the rest of the queue. Returns the dependents
+        # updated.
+        if not parents:
+            return 0
+
+        now = now_micros()
+        cursor.executemany("""
+            UPDATE jobs SET pending_deps = pending_deps - 1,
+                            ready_at = CASE WHEN pending_deps = 1 AND state = ?
+                                            THEN MAX(COALESCE(run_at, 0), ?) END
+            WHERE id IN (SELECT child FROM job_deps WHERE parent = ?) AND pending_deps > 0
+        """, [(JobState.PENDING.value, now, parent) for parent in parents])
+        released = cursor.rowcount
+
+        cursor.executemany("DELETE FROM job_deps WHERE parent = ?", [(parent,) for parent in parents])
+        return released
     
-    def get_job_counts(self) -> dict:
+    def _cascade_dead(self, cursor, parents: List[str]) -> int:
         
+        # Send every pending job that (transitively) waits for a dead job to
+        # the DLQ. Edges stay, so a dependent retried from the DLQ waits
+        # until its dependency has been retried and completed. Returns the
+        # jobs moved.
+        now = now_micros()
+        moved = 0
+        frontier = list(parents)
+
+        while frontier:
+            children = {}
+            for chunk in _chunks(frontier):
+                # CROSS JOIN keeps job_deps outermost; otherwise the planner
+                # may walk every pending job instead of the parents' edges
+                cursor.execute(f"""
+                    SELECT d.parent, d.child FROM job_deps d CROSS JOIN jobs j ON j.id = d.child
+                    WHERE d.parent IN ({','.join('?' * len(chunk))}) AND j.state = ?
+                """, (*chunk, JobState.PENDING.value))
+                for row in cursor.fetchall():
+                    children.setdefault(row['child'], row['parent'])
+
+            cursor.executemany("""
+                UPDATE jobs SET state = ?, error = ?, ready_at = NULL, updated_at = ?, version = version + 1
+                WHERE id = ? AND state = ?
+            """, [(JobState.DEAD.value, f"Dependency {parent} is dead", now, child, JobState.PENDING.value)
+                  for child, parent in children.items()])
+
+            moved += len(children)
+            frontier = list(children)
+
+        return moved
+    
+    def _drop_dependencies(self, cursor, ids: List[str]) -> None:
+        
+        # Jobs leaving the table: their dependents stop waiting for them,
+        # and their own open edges go
+        self._release_dependents(cursor, ids)
+        for chunk in _chunks(ids):
+            cursor.execute(f"DELETE FROM job_deps WHERE child IN ({','.join('?' * len(chunk))})", chunk)
+    
+    def get_dependencies(self, job_id: str) -> List[str]:
+        
+        # The dependencies job_id is still waiting for
         with self._get_cursor() as cursor:
+            cursor.execute("SELECT parent FROM job_deps WHERE child = ? ORDER BY parent", (job_id,))
+
+            return [row['parent'] for row in cursor.fetchall()]
+    
+    def mark_completed(self, job: Job, worker_id: str) -> bool:
+        
+        with self._write_transaction() as cursor:
+            if not self._finish(cursor, job, worker_id, JobState.COMPLETED):
+                return False
+            self._release_dependents(cursor, [job.jid])
+            return True
+    
+    def mark_failed(self, job: Job, worker_id: str, next_retry_at: datetime) -> bool:
+        
+        job.next_retry_at = next_retry_at
+        with self._write_transaction() as cursor:
+            return self._finish(cursor, job, worker_id, JobState.FAILED)
+    
+    def mark_dead(self, job: Job, worker_id: str) -> bool:
+        
+        with self._write_transaction() as cursor:
+            if not self._finish(cursor, job, worker_id, JobState.DEAD):
+                return False
+            self._cascade_dead(cursor, [job.jid])
+            return True
+    
+    def finish_jobs(self, jobs: List[Job], worker_id: str) -> Tuple[List[Job], int]:
+        
+        # Apply many result transitions in one transaction; job.state holds
+        # the target state. Dependents of completed jobs are released and
+        # those of dead jobs follow them to the DLQ in the same transaction.
+        # Returns the jobs whose guard failed and the dependents released.
+        stale = []
+        completed, dead = [], []
+        with self._write_transaction() as cursor:
+            for job in jobs:
+                state = job.state
+                if not self._finish(cursor, job, worker_id, state):
+                    stale.append(job)
+                elif state == JobState.COMPLETED:
+                    completed.append(job.jid)
+                elif state == JobState.DEAD:
+                    dead.append(job.jid)
+
+            released = self._release_dependents(cursor, completed)
+            self._cascade_dead(cursor, dead)
+        return stale, released
+    
+    def requeue_dead(self, job_id: str) -> bool:
+        
+        # DLQ retry: back to pending with a fresh attempt count
+        now = now_micros()
+        with self._get_cursor() as cursor:
+            cursor.execute("""
+                UPDATE jobs SET state = ?, attempts = 0, error = NULL, next_retry_at = NULL, retry_delay = NULL,
+                                locked_by = NULL, locked_at = NULL, lease_expires_at = NULL,
+                                ready_at = CASE WHEN pending_deps = 0 THEN COALESCE(run_at, created_at) END,
+                                updated_at = ?, version = version + 1
+                WHERE id = ? AND state = ?
+            """, (JobState.PENDING.value, now, job_id, JobState.DEAD.value))
+
+            return cursor.rowcount == 1
+    
+    def heartbeat(self, worker_id: str, lease_seconds: float = 300) -> int:
+        
+        # Extend the leases of every job worker_id is running with one
+        # statement, however many that is. The version is left alone so
+        # pending results still apply.
+        expires = now_micros() + int(lease_seconds * 1_000_000)
+
+        with self._write_transaction() as cursor:
+            cursor.execute("""
+                UPDATE jobs SET lease_expires_at = ?
+                WHERE state = ? AND locked_by = ?
+            """, (expires, JobState.PROCESSING.value, worker_id))
+
+            return cursor.rowcount
+    
+    def reap_expired(self) -> Tuple[int, int]:
+        
+        # Recover jobs whose worker stopped heartbeating: back to the ready
+        # queue, or to the DLQ if that run used the last attempt. Returns
+        # (requeued, dead).
+        now = now_micros()
+
+        with self._write_transaction() as cursor:
             cursor.execute("""
-                SELECT state, COUNT(*) as count 
-                FROM jobs 
-                GROUP BY state
-            """)
+                SELECT id FROM jobs
+                WHERE state = ? AND lease_expires_at <= ? AND attempts >= max_retries
+            """, (JobState.PROCESSING.value, now))
+            expired = [row['id'] for row in cursor.fetchall()]
+
+            for chunk in _chunks(expired):
+                cursor.execute(f"""
+                    UPDATE jobs SET state = ?, error = ?, locked_by = NULL, locked_at = NULL,
+                                    lease_expires_at = NULL, ready_at = NULL,
+                                    updated_at = ?, version = version + 1
+                    WHERE id IN ({','.join('?' * len(chunk))})
+                """, (JobState.DEAD.value, 'Lease expired after the last attempt', now, *chunk))
+            dead = len(expired)
+            self._cascade_dead(cursor, expired)
+
+            cursor.execute("""
+                UPDATE jobs SET state = ?, error = ?, locked_by = NULL, locked_at = NULL,
+                                lease_expires_at = NULL, ready_at = ?,
+                                updated_at = ?, version = version + 1
+                WHERE state = ? AND lease_expires_at <= ?
+            """, (JobState.PENDING.value, 'Lease expired, requeued', now, now,
+                  JobState.PROCESSING.value, now))
+
+            return cursor.rowcount, dead
+    
+    def release_jobs(self, job_ids: List[str], worker_id: str) -> int:
+        
+        # Give back leased jobs that were never started
+        if not job_ids:
+            return 0
+
+        # +state keeps the lookup on the primary key; with ten or more ids
+        # the planner otherwise walks idx_state_created for every pending job
+        marks = ','.join('?' * len(job_ids))
+        with self._write_transaction() as cursor:
+            cursor.execute(f"""
+                UPDATE jobs SET locked_by = NULL, locked_at = NULL, lease_expires_at = NULL,
+                                version = version + 1,
+                                ready_at = CASE WHEN state = ? THEN COALESCE(next_retry_at, updated_at)
+                                                ELSE COALESCE(run_at, created_at) END
+                WHERE id IN ({marks}) AND locked_by = ? AND +state IN (?, ?)
+            """, (JobState.FAILED.value, *job_ids, worker_id,
+                  JobState.PENDING.value, JobState.FAILED.value))
+
+            return cursor.rowcount
+    
+    def next_due_at(self, queues: Optional[List[str]] = None) -> Optional[datetime]:
+        
+        # When the next job in these queues (all queues if None) becomes
+        # claimable: a scheduled run, a retry, or a prefetch lease running
+        # out. Already ready jobs give a time in the past.
+        with self._get_cursor() as cursor:
+            if queues is None:
+                cursor.execute("SELECT MIN(ready_at) FROM jobs WHERE ready_at IS NOT NULL")
+                return from_micros(cursor.fetchone()[0])
+
+            due = None
+            for queue in queues:
+                cursor.execute(QUEUE_DUE_SQL, (queue,))
+                first = cursor.fetchone()[0]
+                if first is not None and (due is None or first < due):
+                    due = first
+
+            return from_micros(due)
+    
+    def claim_query_plan(self, queue: Optional[str] = None) -> List[str]:
+        
+        # EXPLAIN QUERY PLAN of the claim query, one detail string per step;
+        # with a queue, of the per-queue claim and starvation queries
+        with self._get_cursor() as cursor:
+            if queue is None:
+                cursor.execute("EXPLAIN QUERY PLAN " + CLAIM_SQL, (now_micros(), 1))
+                return [row['detail'] for row in cursor.fetchall()]
+
+            cursor.execute("EXPLAIN QUERY PLAN " + QUEUE_LEVEL_SQL, (queue, PRIORITY_CEILING))
+            plan = [row['detail'] for row in cursor.fetchall()]
+            cursor.execute("EXPLAIN QUERY PLAN " + QUEUE_CLAIM_SQL, (queue, 0, now_micros(), 1))
+            plan += [row['detail'] for row in cursor.fetchall()]
+            cursor.execute("EXPLAIN QUERY PLAN " + QUEUE_OLDEST_SQL, (queue, now_micros(), 1))
+            return plan + [row['detail'] for row in cursor.fetchall()]
+    
+    def archive_jobs(self, state: JobState, archive_path: str, older_than: Optional[int] = None,
+                     keep: Optional[int] = None, batch_size: int = 500) -> List[str]:
+        
+        # Move one batch of `state` (completed or dead) jobs into the archive
+        # database and return their ids. Selects jobs that finished before
+        # `older_than` (micros), or the ones beyond the `keep` most recently
+        # finished. Rows are copied with INSERT OR REPLACE before they are
+        # deleted, so an interrupted batch is safe to repeat.
+        self._attach_archive(archive_path)
+
+        # the state is spelled out so the planner can use idx_finished
+        with self._write_transaction() as cursor:
+            if keep is not None:
+                cursor.execute(f"""
+                    SELECT id FROM jobs WHERE state = '{state.value}'
+                    ORDER BY updated_at DESC, id DESC LIMIT ? OFFSET ?
+                """, (batch_size, keep))
+            else:
+                cursor.execute(f"""
+                    SELECT id FROM jobs WHERE state = '{state.value}' AND updated_at < ?
+                    ORDER BY updated_at ASC LIMIT ?
+                """, (older_than, batch_size))
+
+            ids = [row['id'] for row in cursor.fetchall()]
+            if not ids:
+                return []
+
+            cursor.execute("PRAGMA main.table_info(jobs)")
+            columns = ', '.join(row['name'] for row in cursor.fetchall())
+            marks = ','.join('?' * len(ids))
+
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO archive.jobs ({columns})
+                SELECT {columns} FROM main.jobs WHERE id IN ({marks})
+            """, ids)
+            cursor.execute(f"DELETE FROM main.jobs WHERE id IN ({marks})", ids)
+            self._drop_dependencies(cursor, ids)
+
+        return ids
+    
+    def _attach_archive(self, archive_path: str) -> None:
+        
+        conn = self._get_connection()
+        attached = getattr(self._local, 'archive', None)
+        if attached == archive_path:
+            return
+        if attached:
+            conn.execute("DETACH DATABASE archive")
+
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        self._local.archive = archive_path
+
+        with self._get_cursor() as cursor:
+            cursor.execute(JOBS_TABLE_SQL.format(name='archive.jobs'))
+
+            # Keep the archive in step with columns added to the main table
+            cursor.execute("PRAGMA archive.table_info(jobs)")
+            archived = {row['name'] for row in cursor.fetchall()}
+            cursor.execute("PRAGMA main.table_info(jobs)")
+            for row in cursor.fetchall():
+                if row['name'] not in archived:
+                    cursor.execute(f"ALTER TABLE archive.jobs ADD COLUMN {row['name']} {row['type']}")
+    
+    def incremental_vacuum(self, full: bool = False) -> int:
+        
+        # Return free pages to the filesystem; returns the pages released.
+        # A full VACUUM is needed once to switch databases created before
+        # auto_vacuum was enabled.
+        conn = self._get_connection()
+        before = conn.execute("PRAGMA page_count").fetchone()[0]
+
+        if full:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            # VACUUM builds a copy of the database in temp storage
+            conn.execute("PRAGMA temp_store = FILE")
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA temp_store = MEMORY")
+        elif conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            # Each step frees a single page and execute() only steps once;
+            # executescript runs the pragma to completion
+            conn.executescript("PRAGMA incremental_vacuum;")
+
+        return before - conn.execute("PRAGMA page_count").fetchone()[0]
+    
+    def get_job_counts(self, exact: bool = False) -> dict:
+        
+        # From the job_counts counters, or with exact from a GROUP BY over
+        # every job
+        with self._get_cursor() as cursor:
+            if exact:
+                cursor.execute("""
+                    SELECT state, COUNT(*) as count 
+                    FROM jobs 
+                    GROUP BY state
+                """)
+            else:
+                cursor.execute("SELECT state, count FROM job_counts")
             
             counts = {state.value: 0 for state in JobState}
 
@@ -165,14 +1373,172 @@ class JobStorage:
                 counts[row['state']] = row['count']
             
             return counts
+
+    def reconcile_job_counts(self) -> Tuple[dict, dict]:
+
+        # Recount every state and overwrite job_counts. Returns the exact
+        # counts and, for each state that was off, exact minus counter.
+        # Holds the write lock for the length of one GROUP BY.
+        with self._write_transaction() as cursor:
+            cursor.execute("SELECT state, count FROM job_counts")
+            cached = {row['state']: row['count'] for row in cursor.fetchall()}
+
+            cursor.execute("SELECT state, COUNT(*) AS count FROM jobs GROUP BY state")
+            exact = {row['state']: row['count'] for row in cursor.fetchall()}
+
+            cursor.execute("DELETE FROM job_counts")
+            cursor.executemany("INSERT INTO job_counts (state, count) VALUES (?, ?)", exact.items())
+
+        counts = {state.value: 0 for state in JobState}
+        counts.update(exact)
+        drift = {}
+        for state in {*exact, *cached}:
+            if exact.get(state, 0) != cached.get(state, 0):
+                drift[state] = exact.get(state, 0) - cached.get(state, 0)
+        return counts, drift
+
+    def get_job_stats(self, windows: Tuple[int, ...] = (1, 5, 15)) -> dict:
+
+        # Jobs finished over the last `windows` minutes and the mean run
+        # time of the completed ones, from job_stats; each window also
+        # covers the current minute so far, and `seconds` is its real
+        # length. oldest_ready_at is when the longest-waiting claimable job
+        # became ready, None if nothing is waiting.
+        if max(windows) >= STATS_MINUTES:
+            raise ValueError(f"Windows must be shorter than {STATS_MINUTES} minutes")
+
+        now = now_micros()
+        minute = now // 60_000_000
+        with self._get_cursor() as cursor:
+            cursor.execute("SELECT MIN(ready_at) FROM jobs WHERE ready_at IS NOT NULL")
+            oldest = cursor.fetchone()[0]
+
+            cursor.execute("SELECT * FROM job_stats WHERE minute >= ?", (minute - max(windows),))
+            rows = cursor.fetchall()
+
+        stats = {
+            'oldest_ready_at': from_micros(oldest) if oldest is not None and oldest <= now else None,
+            'windows': {},
+        }
+        for window in windows:
+            picked = [row for row in rows if minute - window <= row['minute'] <= minute]
+            completed = sum(row['completed'] for row in picked)
+            runtime = sum(row['runtime_micros'] for row in picked)
+            stats['windows'][window] = {
+                'seconds': window * 60 + now % 60_000_000 / 1_000_000,
+                'completed': completed,
+                'failed': sum(row['failed'] for row in picked),
+                'dead': sum(row['dead'] for row in picked),
+                'mean_runtime': runtime / completed / 1_000_000 if completed else None,
+            }
+        return stats
+    
+    def _row_schedule(self, row) -> Schedule:
+        
+        return Schedule(row['name'], row['cron'], json.loads(row['template']),
+                        from_micros(row['next_run_at']), from_micros(row['last_run_at']),
+                        from_micros(row['created_at']))
+    
+    def add_schedule(self, schedule: Schedule) -> bool:
+        
+        # False if a schedule with this name exists
+        with self._get_cursor() as cursor:
+            cursor.execute("""
+                INSERT OR IGNORE INTO schedules (name, cron, template, next_run_at, last_run_at, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (schedule.name, schedule.cron, json.dumps(schedule.template),
+                  to_micros(schedule.next_run_at), to_micros(schedule.last_run_at),
+                  to_micros(schedule.created_at)))
+
+            return cursor.rowcount == 1
+    
+    def list_schedules(self) -> List[Schedule]:
+        
+        with self._get_cursor() as cursor:
+            cursor.execute("SELECT * FROM schedules ORDER BY name")
+
+            return [self._row_schedule(row) for row in cursor.fetchall()]
+    
+    def remove_schedule(self, name: str) -> bool:
+        
+        with self._get_cursor() as cursor:
+            cursor.execute("DELETE FROM schedules WHERE name = ?", (name,))
+
+            return cursor.rowcount > 0
+    
+    def next_schedule_at(self) -> Optional[datetime]:
+        
+        with self._get_cursor() as cursor:
+            cursor.execute("SELECT MIN(next_run_at) FROM schedules")
+
+            return from_micros(cursor.fetchone()[0])
+    
+    def materialize_schedules(self, expand: Callable[[Schedule, datetime], Tuple[List[Job], datetime]],
+                              limit: int = 100) -> Tuple[int, int]:
+        
+        # Enqueue the instances of up to limit due schedules and move each
+        # schedule to its next run, all in one transaction. expand(schedule,
+        # now) returns the jobs to enqueue and the next run time. Instances
+        # are inserted with OR IGNORE, so a tick that was already enqueued
+        # is never enqueued again. Returns (schedules, jobs inserted).
+        now = now_micros()
+
+        with self._write_transaction() as cursor:
+            cursor.execute("""
+                SELECT * FROM schedules WHERE next_run_at <= ? ORDER BY next_run_at LIMIT ?
+            """, (now, limit))
+            due = [self._row_schedule(row) for row in cursor.fetchall()]
+
+            inserted = 0
+            for schedule in due:
+                jobs, next_run_at = expand(schedule, from_micros(now))
+                for job in jobs:
+                    row = self._job_row(job)
+                    cursor.execute(self._insert_sql(row, 'IGNORE'), row)
+                    inserted += cursor.rowcount
+
+                cursor.execute("""
+                    UPDATE schedules SET next_run_at = ?, last_run_at = ? WHERE name = ?
+                """, (to_micros(next_run_at), now, schedule.name))
+
+            return len(due), inserted
+    
+    def acquire_lock(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        
+        # Take or renew the named lock; True while owner holds it. Readers
+        # that find a live lock held by someone else never write.
+        now = now_micros()
+
+        with self._get_cursor() as cursor:
+            cursor.execute("SELECT owner, expires_at FROM locks WHERE name = ?", (name,))
+            row = cursor.fetchone()
+        if row and row['owner'] != owner and row['expires_at'] > now:
+            return False
+
+        with self._write_transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO locks (name, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE locks.owner = excluded.owner OR locks.expires_at <= ?
+            """, (name, owner, now + int(ttl_seconds * 1_000_000), now))
+
+            return cursor.rowcount == 1
+    
+    def release_lock(self, name: str, owner: str) -> None:
+        
+        with self._get_cursor() as cursor:
+            cursor.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
     
     def delete_job(self, job_id: str) -> bool:
         
         
         with self._get_cursor() as cursor:
             cursor.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            if cursor.rowcount == 0:
+                return False
 
-            return cursor.rowcount > 0
+            self._drop_dependencies(cursor, [job_id])
+            return True
     
     def close(self):
         
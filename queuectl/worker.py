@@ -1,25 +1,309 @@
 
 
+import importlib
+import json
+import multiprocessing
+import os
+import re
 import signal
+import socket
 import subprocess
+import sys
+import threading
 import time
-from datetime import datetime, timedelta
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
 
 from .config import Config
-from .models import Job, JobState
+from .executor import executor_pool
+from .joblog import LogSink, log_path
+from .limits import describe_exit, job_limits, kill_group, launch_argv
+from .metrics import Metrics, NullMetrics, metrics_dir
+from .models import Job, JobState, from_now, now_micros, to_micros
+from .notify import WakeupListener, notify_workers
+from .queues import QueueSelector
+from .retention import collect
+from .retry import backoff_delay, retry_policy, retryable
+from .scheduler import Scheduler
 from .storage import JobStorage
 
 
+# First idle wait; doubles on every empty poll up to worker_poll_interval
+POLL_MIN_INTERVAL = 0.05
+
+
+class ResultBuffer:
+    # Write-behind buffer for finished jobs
+    #
+    # Completed, failed and dead transitions are written together in one
+    # transaction once max_jobs results are waiting or the oldest has waited
+    # max_delay_ms. Until then the row stays in PROCESSING, so a crash can
+    # only make a job run again; it is never marked done without running
+    # and never lost. Each result is a guarded UPDATE, so a job that another
+    # worker took over in the meantime is skipped rather than overwritten.
+
+    def __init__(self, storage: JobStorage, owner: str, max_jobs: int = 1, max_delay_ms: int = 50,
+                 metrics: Optional[Metrics] = None):
+
+        self.storage = storage
+        self.owner = owner
+        self.metrics = metrics or Metrics()
+        self.max_jobs = max(1, max_jobs)
+        self.max_delay = max_delay_ms / 1000
+        self.pending = []
+        self.oldest = 0.0
+        self.lock = threading.RLock()
+        self.cond = threading.Condition(self.lock)
+
+        if self.max_jobs > 1:
+            # flushes batches that reach max_delay_ms; it keeps one connection
+            threading.Thread(target=self.flushloop, daemon=True).start()
+
+    def add(self, job: Job) -> None:
+
+        with self.lock:
+            if not self.pending:
+                self.oldest = time.monotonic()
+            self.pending.append(job)
+
+            if len(self.pending) >= self.max_jobs:
+                self.flush()
+            else:
+                self.cond.notify()
+
+    def flush(self) -> int:
+
+        with self.lock:
+            jobs, self.pending = self.pending, []
+            if not jobs:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                stale, released = self.storage.finish_jobs(jobs, self.owner)
+            except Exception:
+                # keep them for the next flush
+                self.pending = jobs + self.pending
+                raise
+            self.metrics.observe('queuectl_persist_seconds', time.perf_counter() - started, 'op="finish"')
+            if stale:
+                self.metrics.inc('queuectl_results_discarded_total', value=len(stale))
+
+            if released:
+                # dependents that just became ready
+                notify_workers(self.storage.db_path)
+
+            for job in stale:
+                print(f"[ResultBuffer] Job {job.jid} changed while running, result discarded")
+            return len(jobs) - len(stale)
+
+    def flushloop(self) -> None:
+
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+
+                wait = self.oldest + self.max_delay - time.monotonic()
+                if wait > 0:
+                    self.cond.wait(wait)
+                    continue
+
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"[ResultBuffer] Flush failed, retrying: {e}")
+                    self.cond.wait(1)
+
+
+# Callables of python jobs, imported once per process
+TARGETS = {}
+
+TARGET_NAME = re.compile(r'^[A-Za-z_][\w.]*:[A-Za-z_][\w.]*$')
+
+
+def parse_call(jdata: dict) -> tuple:
+
+    # Validate the target/args/kwargs of a python job's JSON
+    target = jdata.get('target')
+    if not isinstance(target, str) or not TARGET_NAME.match(target):
+        raise ValueError("'target' must look like 'package.module:function'")
+
+    args, kwargs = jdata.get('args', []), jdata.get('kwargs', {})
+    if not isinstance(args, list):
+        raise ValueError("'args' must be a JSON array")
+    if not isinstance(kwargs, dict):
+        raise ValueError("'kwargs' must be a JSON object")
+    return target, args, kwargs
+
+
+def resolve_target(target: str):
+
+    # "pkg.mod:func" or "pkg.mod:Class.method" -> the callable
+    if target not in TARGETS:
+        module, _, attr = target.partition(':')
+        obj = importlib.import_module(module)
+        for part in attr.split('.'):
+            obj = getattr(obj, part)
+        TARGETS[target] = obj
+    return TARGETS[target]
+
+
+def calltarget(target: str, args: list, kwargs: dict) -> tuple:
+
+    # Runs in the worker or a pool process: (0, JSON result, None) or
+    # (exit code, None, traceback), so nothing but strings crosses back.
+    # SystemExit and KeyboardInterrupt end the job, never the worker.
+    try:
+        result = resolve_target(target)(*args, **kwargs)
+        return 0, json.dumps(result, separators=(',', ':')), None
+    except SystemExit as e:
+        # sys.exit() as `python -c` maps it
+        if e.code is None or isinstance(e.code, int):
+            if not e.code:
+                return 0, 'null', None
+            return e.code, None, f"SystemExit: {e.code}"
+        return 1, None, str(e.code)
+    except BaseException as e:
+        # start at the job's own code
+        return 1, None, ''.join(traceback.format_exception(type(e), e, e.__traceback__.tb_next))
+
+
+class PythonExecutor:
+    # Runs python jobs
+    #
+    # With processes = 0 the target is called in the worker itself: no
+    # isolation and no timeout, but no pickling either. Otherwise calls go
+    # to a ProcessPoolExecutor of that many processes, started with
+    # forkserver (or spawn) so they do not inherit the worker's threads and
+    # database connections. A timeout cannot cancel a single call, so it
+    # kills the pool; calls still running in it fail and are retried.
+
+    def __init__(self, processes: int = 0):
+
+        self.processes = processes
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def getpool(self) -> ProcessPoolExecutor:
+
+        with self.lock:
+            if self.pool is None:
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                # Ctrl-C stops the worker, which lets running calls finish
+                self.pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context(method),
+                                                initializer=signal.signal, initargs=(signal.SIGINT, signal.SIG_IGN))
+            return self.pool
+
+    def reset(self, pool: ProcessPoolExecutor) -> None:
+
+        with self.lock:
+            if self.pool is pool:
+                self.pool = None
+        # ProcessPoolExecutor has no way to stop one call
+        for proc in list(getattr(pool, '_processes', {}).values()):
+            proc.kill()
+        self.shutdown(pool, wait=False)
+
+    def run(self, job: Job, timeout: Optional[float]) -> tuple:
+
+        # (exit code, JSON result, error): 0 on success, 1 if the call
+        # raised or its sys.exit() code, -1 on timeout or a lost pool process
+        args, kwargs = job.args or [], job.kwargs or {}
+        if not self.processes:
+            return calltarget(job.command, args, kwargs)
+
+        pool = self.getpool()
+        try:
+            return pool.submit(calltarget, job.command, args, kwargs).result(timeout=timeout)
+        except FutureTimeout:
+            self.reset(pool)
+            return -1, None, f"Call timed out after {timeout:g} seconds"
+        except BrokenProcessPool as e:
+            self.reset(pool)
+            return -1, None, f"Python worker process died: {e}"
+        except Exception as e:
+            # e.g. arguments that do not pickle
+            return 1, None, ''.join(traceback.format_exception(type(e), e, e.__traceback__))
+
+    def close(self) -> None:
+
+        if self.pool is not None:
+            self.shutdown(self.pool, wait=True)
+
+    @staticmethod
+    def shutdown(pool: ProcessPoolExecutor, wait: bool) -> None:
+
+        # cancel_futures is new in 3.9; before that queued calls are
+        # cancelled one by one
+        if sys.version_info >= (3, 9):
+            pool.shutdown(wait=wait, cancel_futures=True)
+            return
+        queue = getattr(pool, '_pending_work_items', {})
+        for item in list(queue.values()):
+            item.future.cancel()
+        pool.shutdown(wait=wait)
+
+
 class Worker:
     
     
-    def __init__(self, worker_id: int, db_path: str, config: Config):
+    def __init__(self, worker_id: int, db_path: str, config: Config, prefetch: int = 1,
+                 queues: Optional[str] = None):
         
         self.worker_id = worker_id
+        self.db_path = db_path
+        # Unique across hosts and processes, recorded as the job's lock owner
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{worker_id}"
         self.storage = JobStorage(db_path)
 
         self.config = config
         self.running = True
+
+        # Phase timings and outcomes, written to <db>.metrics/ every
+        # metrics_interval seconds for `queuectl metrics`; 0 turns them off
+        self.metrics_interval = config.get('metrics_interval', 10)
+        self.metrics = Metrics() if self.metrics_interval else NullMetrics()
+        self.metrics_path = metrics_dir(db_path) / f"{socket.gethostname()}-{os.getpid()}-{worker_id}.json"
+        if self.metrics_interval:
+            self.storage.lockwait = lambda seconds: self.metrics.observe('queuectl_db_lock_wait_seconds', seconds)
+
+        # Jobs leased with claim_batch but not started yet
+        self.prefetch = max(1, prefetch)
+        self.buffer = deque()
+
+        # Queues this worker serves and the order it claims from them
+        self.queues = QueueSelector(queues or config.get('queues', 'default'))
+
+        # Results are written in batches when result_batch_size > 1
+        self.results = ResultBuffer(self.storage, self.owner, config.get('result_batch_size', 1),
+                                    config.get('result_flush_ms', 50), self.metrics)
+
+        # Retention runs in small steps while idle when gc_interval is set
+        self.lastgc = time.monotonic()
+
+        # Running jobs keep their leases alive with one UPDATE per interval;
+        # idle workers return other workers' expired leases to the queue
+        self.lease_seconds = config.get('lease_seconds', 300)
+        self.heartbeat_interval = min(config.get('heartbeat_interval', 30), self.lease_seconds / 3)
+        self.stopped = threading.Event()
+        self.lastreap = 0.0
+
+        # Warm Python executors for eligible jobs when executor = pool
+        self.pool = executor_pool(config, 1)
+
+        # python jobs: import targets once, call them inline or in processes
+        self.python = PythonExecutor(config.get('python_processes', 0))
+
+        # Materializes recurring jobs while this worker holds the scheduler lock
+        self.scheduler = Scheduler(self.storage, self.owner, config)
+
+        # Woken by enqueue; polling with backoff remains the fallback
+        self.listener = WakeupListener(db_path, f"worker-{os.getpid()}-{worker_id}")
         
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self.signalhandler)
@@ -30,52 +314,147 @@ class Worker:
         
         print(f"\n[Worker {self.worker_id}] Received shutdown signal, finishing current job...")
         self.running = False
+        self.listener.wake()
     
     def stop(self):
         
         print(f"[Worker {self.worker_id}] Stop requested")
         self.running = False
+        self.listener.wake()
     
-    def executecommand(self, command: str) -> tuple:
+    def executecommand(self, job: Job) -> tuple:
+
+        # stdout/stderr are streamed to per-job log files by reader threads;
+        # only the capped tails come back for the job row
+        maxbytes = self.config.get('log_max_bytes', 10 * 1024 * 1024)
+        tailbytes = self.config.get('log_tail_bytes', 4096)
+        limits = job_limits(job, self.config)
+
+        if job.kind == 'python':
+            return self.executepython(job, limits)
 
+        outsink = LogSink(log_path(self.db_path, job.jid, 'out'), maxbytes, tailbytes)
+        errsink = LogSink(log_path(self.db_path, job.jid, 'err'), maxbytes, tailbytes)
+
+        argv = self.pool.eligible(job.command, limits) if self.pool else None
+        if argv is not None:
+            return self.executepooled(argv, limits, outsink, errsink)
         
+        launcher = launch_argv(job.command, limits)
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
+            proc = subprocess.Popen(
+                launcher or job.command,
+                shell=launcher is None,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                # own process group, so a timeout kills the whole tree
+                start_new_session=True
+            )
+        except Exception as e:
+            outsink.close()
+            errsink.close()
+            return -1, None, str(e)
 
-                text=True,
+        readers = [
+            threading.Thread(target=outsink.drain, args=(proc.stdout,), daemon=True),
+            threading.Thread(target=errsink.drain, args=(proc.stderr,), daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
 
-                timeout=300  # 5 minute timeout
-            )
-            return result.returncode, result.stdout, result.stderr
+        timedout = False
+        try:
+            exit_code = proc.wait(timeout=limits.timeout)
         except subprocess.TimeoutExpired:
 
-            return -1, "", "Command timed out after 300 seconds"
+            kill_group(proc, self.config.get('kill_grace_seconds', 5))
+            exit_code = -1
+            timedout = True
+
+        for reader in readers:
+            # a child that left the process group may still hold the pipes open
+            reader.join(timeout=5 if timedout else None)
+
+        if timedout:
+            errsink.write(f"Command timed out after {limits.timeout:g} seconds".encode())
+        elif describe_exit(exit_code, limits):
+            errsink.write(describe_exit(exit_code, limits))
+
+        return exit_code, outsink.close(), errsink.close()
+
+    def executepython(self, job: Job, limits) -> tuple:
+
+        # The return value goes to job.result; the error keeps the tail of
+        # the traceback, like stderr for shell jobs
+        exit_code, job.result, error = self.python.run(job, limits.timeout)
+        if error:
+            error = error[-self.config.get('log_tail_bytes', 4096):]
+        return exit_code, None, error
+
+    def executepooled(self, argv: list, limits, outsink: LogSink, errsink: LogSink) -> tuple:
+
+        # executecommand for a job run on a warm executor; the executor
+        # writes straight into pipes drained by the same LogSinks
+        outr, outw = os.pipe()
+        errr, errw = os.pipe()
+        readers = [
+            threading.Thread(target=outsink.drain, args=(os.fdopen(outr, 'rb', 0),), daemon=True),
+            threading.Thread(target=errsink.drain, args=(os.fdopen(errr, 'rb', 0),), daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+
+        error = None
+        try:
+            exit_code, timedout = self.pool.run(argv, outw, errw, limits.timeout,
+                                                self.config.get('kill_grace_seconds', 5))
         except Exception as e:
+            exit_code, timedout, error = -1, False, str(e)
+        finally:
+            os.close(outw)
+            os.close(errw)
+
+        for reader in readers:
+            reader.join(timeout=5 if timedout else None)
+
+        if timedout:
+            errsink.write(f"Command timed out after {limits.timeout:g} seconds".encode())
 
-            return -1, "", str(e)
+        output, stderr = outsink.close(), errsink.close()
+        return exit_code, output, error or stderr
     
-    def calbackoff(self, attempts: int) -> float:
+    def calbackoff(self, job: Job) -> float:
        
-        base = self.config.get('backoff_base', 2)
+        policy = retry_policy(job, self.config)
 
-        return base ** attempts
+        return backoff_delay(policy, job.attempts, job.retry_delay)
     
-    def processjob(self, job: Job) -> None:
-       
-        print(f"[Worker {self.worker_id}] Processing job {job.jid}: {job.command}")
-        
+    def startjob(self, job: Job) -> bool:
 
-        job.attempts += 1
-        job.state = JobState.PROCESSING
+        # When the job became claimable; a dependent's release time is not
+        # recorded, so jobs with dependencies are left out of queue wait
+        ready = job.next_retry_at if job.state == JobState.FAILED else job.run_at or job.created_at
 
-        self.storage.save_job(job)
-        
-        # Execute the command
-        exit_code, output, error = self.executecommand(job.command)
-        
+        started = time.perf_counter()
+        if not self.storage.mark_processing(job, self.owner, self.lease_seconds):
+            # Lease expired and another worker took the job
+            self.metrics.inc('queuectl_jobs_lost_total')
+            print(f"[Worker {self.worker_id}] Lost lease on job {job.jid}, skipping")
+            return False
+
+        self.metrics.observe('queuectl_persist_seconds', time.perf_counter() - started, 'op="start"')
+        self.metrics.inc('queuectl_jobs_started_total')
+        if ready and not job.depends_on:
+            wait = (job.updated_at - ready).total_seconds()
+            self.metrics.observe('queuectl_queue_wait_seconds', max(wait, 0.0))
+
+        print(f"[Worker {self.worker_id}] Processing job {job.jid}: {job.command}")
+        return True
+    
+    def finishjob(self, job: Job, exit_code: int, output, error) -> None:
+
+        # Shared by every engine: record the result and apply retry/DLQ rules
         job.exit_code = exit_code
 
         job.output = output if output else None
@@ -88,50 +467,181 @@ class Worker:
             print(f"[Worker {self.worker_id}]  Job {job.jid} completed successfully")
         else:
             # Failure
-            max_retries = self.config.get('max_retries', 3)
-            
-            if job.attempts >= max_retries:
+            if not retryable(retry_policy(job, self.config), exit_code):
+                job.state = JobState.DEAD
+                print(f"[Worker {self.worker_id}]  Job {job.jid} moved to DLQ, exit code {exit_code} is not retryable")
+            elif job.attempts >= job.max_retries:
                 # Move to DLQ
                 job.state = JobState.DEAD
                 print(f"[Worker {self.worker_id}]  Job {job.jid} moved to DLQ after {job.attempts} attempts")
             else:
                 # Retry with backoff
                 job.state = JobState.FAILED
-                backoff_seconds = self.calbackoff(job.attempts)
-                job.next_retry_at = datetime.now() + timedelta(seconds=backoff_seconds)
+                job.retry_delay = self.calbackoff(job)
+                job.next_retry_at = from_now(job.retry_delay)
+
+                print(f"[Worker {self.worker_id}]  Job {job.jid} failed (attempt {job.attempts}/{job.max_retries}), retry in {job.retry_delay:.1f}s")
 
-                print(f"[Worker {self.worker_id}]  Job {job.jid} failed (attempt {job.attempts}/{max_retries}), retry in {backoff_seconds}s")
+        self.metrics.inc('queuectl_jobs_finished_total', f'state="{job.state.value}"')
+        self.results.add(job)
+    
+    def processjob(self, job: Job) -> None:
+       
+        if not self.startjob(job):
+            return
         
-        self.storage.save_job(job)
+        # Execute the command
+        started = time.perf_counter()
+        exit_code, output, error = self.executecommand(job)
+        self.metrics.observe('queuectl_execute_seconds', time.perf_counter() - started)
+
+        self.finishjob(job, exit_code, output, error)
+    
+    def claim(self, n: int) -> list:
+
+        started = time.perf_counter()
+        jobs = self.storage.claim_batch(n, self.owner, self.lease_seconds, self.queues.order(),
+                                        self.config.get('queue_starvation_seconds', 300))
+        self.metrics.observe('queuectl_claim_seconds', time.perf_counter() - started)
+        if jobs:
+            self.metrics.inc('queuectl_jobs_claimed_total', value=len(jobs))
+        return jobs
+
+    def heartbeat(self) -> None:
+
+        try:
+            self.storage.heartbeat(self.owner, self.lease_seconds)
+        except Exception as e:
+            print(f"[Worker {self.worker_id}] Heartbeat failed: {e}")
+
+    def heartbeatloop(self) -> None:
+
+        while not self.stopped.wait(self.heartbeat_interval):
+            self.heartbeat()
+
+    def dumpmetrics(self) -> None:
+
+        if not self.metrics_interval:
+            return
+        try:
+            self.metrics.dump(self.metrics_path, worker=self.worker_id, owner=self.owner)
+        except OSError as e:
+            print(f"[Worker {self.worker_id}] Writing metrics failed: {e}")
+
+    def metricsloop(self) -> None:
+
+        # File I/O only, so it never holds up a claim or a job
+        self.dumpmetrics()
+        while self.metrics_interval and not self.stopped.wait(self.metrics_interval):
+            self.dumpmetrics()
+
+    def idlereap(self) -> None:
+
+        if time.monotonic() - self.lastreap < self.heartbeat_interval:
+            return
+
+        self.lastreap = time.monotonic()
+        requeued, dead = self.storage.reap_expired()
+        if requeued:
+            self.metrics.inc('queuectl_leases_reaped_total', 'outcome="requeued"', requeued)
+        if dead:
+            self.metrics.inc('queuectl_leases_reaped_total', 'outcome="dead"', dead)
+        if requeued or dead:
+            print(f"[Worker {self.worker_id}] Recovered {requeued} job(s) with expired leases, {dead} moved to DLQ")
+        if requeued:
+            notify_workers(self.db_path)
+
+    def idlesleep(self, idle_wait: float) -> float:
+
+        # Sleep until the next job in our queues is due. Enqueue wakes us
+        # early, so with wakeups the only other cap is one heartbeat interval
+        # (expired leases still get reaped); without them the backoff poll
+        # remains the ceiling.
+        limit = self.heartbeat_interval if self.listener.enabled else idle_wait
+
+        due = self.storage.next_due_at(self.queues.names())
+        if due is not None:
+            limit = min(limit, max((to_micros(due) - now_micros()) / 1_000_000, POLL_MIN_INTERVAL))
+        return limit
+    
+    def idlegc(self) -> None:
+
+        interval = self.config.get('gc_interval', 0)
+        if not interval or time.monotonic() - self.lastgc < interval:
+            return
+
+        self.lastgc = time.monotonic()
+        result = collect(self.storage, self.config, max_batches=4)
+        archived = sum(v for k, v in result.items() if k != 'vacuumed_pages')
+        if archived:
+            print(f"[Worker {self.worker_id}] Archived {archived} expired job(s)")
     
     def run(self):
         
         print(f"[Worker {self.worker_id}] Started and ready to process jobs")
+
+        threading.Thread(target=self.heartbeatloop, daemon=True).start()
+        threading.Thread(target=self.metricsloop, daemon=True).start()
+        scheduler = threading.Thread(target=self.scheduler.run, args=(self.stopped,), daemon=True)
+        scheduler.start()
+
+        idle_wait = POLL_MIN_INTERVAL
         
         while self.running:
             try:
-                # Get next pending job
-                job = self.storage.get_pending_job()
+                # Refill the local buffer with one round-trip
+                if not self.buffer:
+                    self.buffer.extend(self.claim(self.prefetch))
                 
-                if job:
-                    self.processjob(job)
+                if self.buffer:
+                    self.processjob(self.buffer.popleft())
+                    idle_wait = POLL_MIN_INTERVAL
                 else:
-                    # No jobs available, sleep briefly
-                    time.sleep(1)
+                    # Nothing to batch with while idle
+                    self.results.flush()
+                    self.idlereap()
+                    self.idlegc()
+
+                    # No jobs available: wait for a wakeup or the next due job
+                    if self.listener.wait(self.idlesleep(idle_wait)):
+                        idle_wait = POLL_MIN_INTERVAL
+                    else:
+                        idle_wait = min(idle_wait * 2, self.config.get('worker_poll_interval', 2))
                     
             except Exception as e:
                 print(f"[Worker {self.worker_id}] Error: {e}")
 
                 time.sleep(1)
         
+        self.results.flush()
+        self.stopped.set()
+        scheduler.join()
+
+        # Hand unstarted jobs back instead of waiting for their leases to expire
+        released = self.storage.release_jobs([job.jid for job in self.buffer], self.owner)
+        if released:
+            print(f"[Worker {self.worker_id}] Released {released} prefetched job(s)")
+            notify_workers(self.db_path)
+        self.buffer.clear()
+        self.listener.close()
+        if self.pool:
+            self.pool.close()
+        self.python.close()
+        self.dumpmetrics()
+
         print(f"[Worker {self.worker_id}] Stopped gracefully")
 
         self.storage.close()
 
 
-def start_worker(db_path: str, worker_id: int = 1):
+def start_worker(db_path: str, worker_id: int = 1, prefetch: int = 1,
+                 engine: str = 'process', concurrency: int = 1, queues: Optional[str] = None):
     
     config = Config()
 
-    worker = Worker(worker_id, db_path, config)
+    if engine == 'async':
+        from .async_worker import AsyncWorker
+        worker = AsyncWorker(worker_id, db_path, config, concurrency, prefetch, queues)
+    else:
+        worker = Worker(worker_id, db_path, config, prefetch, queues)
     worker.run()
@@ -4,6 +4,7 @@ import json
 import multiprocessing
 import os
 import signal
+import sqlite3
 import subprocess
 
 import sys
@@ -13,6 +14,7 @@ from pathlib import Path
 from typing import List
 
 from .config import Config
+from .storage import JobStorage
 from .worker import start_worker
 
 
@@ -25,13 +27,14 @@ class WorkerManager:
         
         self.pid_file = "queuectl_workers.pid"
     
-    def start_workers(self, count: int = 1):
+    def start_workers(self, count: int = 1, prefetch: int = 1,
+                      engine: str = 'process', concurrency: int = 1, queues: str = None):
         
         for i in range(count):
             process = multiprocessing.Process(
                 target=start_worker,
 
-                args=(self.db_path,),
+                args=(self.db_path, i + 1, prefetch, engine, concurrency, queues),
 
                 daemon=False
             )
@@ -45,15 +48,28 @@ class WorkerManager:
         
         print(f"Started {count} worker(s)")
         
-        # Wait for workers (foreground mode)
+        # Wait for workers (foreground mode), recovering jobs whose worker
+        # died without finishing them
+        interval = Config().get('heartbeat_interval', 30)
         try:
-            for worker in self.workers:
-                worker.join()
+            while True:
+                alive = [worker for worker in self.workers if worker.is_alive()]
+                if not alive:
+                    break
+
+                alive[0].join(timeout=interval)
+                try:
+                    self.reap()
+                except sqlite3.Error as e:
+                    # e.g. the database is locked; the workers keep running,
+                    # so keep supervising them and try again next round
+                    print(f"Recovering expired leases failed: {e}")
         except KeyboardInterrupt:
             print("\nStopping workers...")
             self.stop_workers()
     
-    def startworkbackground(self, count: int = 1):
+    def startworkbackground(self, count: int = 1, prefetch: int = 1,
+                            engine: str = 'process', concurrency: int = 1, queues: str = None):
         
         import subprocess
         import sys
@@ -65,7 +81,7 @@ class WorkerManager:
                 proc = subprocess.Popen(
 
                     [sys.executable, '-c', 
-                     f'from queuectl.worker import start_worker; start_worker("{self.db_path}")'],
+                     f'from queuectl.worker import start_worker; start_worker("{self.db_path}", {i + 1}, {prefetch}, "{engine}", {concurrency}, {queues!r})'],
                     creationflags=subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS,
                     stdout=subprocess.DEVNULL,
 
@@ -77,7 +93,7 @@ class WorkerManager:
                 # Unix: background process
                 proc = subprocess.Popen(
                     [sys.executable, '-c',
-                     f'from queuectl.worker import start_worker; start_worker("{self.db_path}")'],
+                     f'from queuectl.worker import start_worker; start_worker("{self.db_path}", {i + 1}, {prefetch}, "{engine}", {concurrency}, {queues!r})'],
                     stdout=subprocess.DEVNULL,
 
                     stderr=subprocess.DEVNULL,
@@ -90,6 +106,18 @@ class WorkerManager:
         # Save PIDs
         self.savepid(pids)
     
+    def reap(self) -> tuple:
+
+        storage = JobStorage(self.db_path)
+        try:
+            requeued, dead = storage.reap_expired()
+        finally:
+            storage.close()
+
+        if requeued or dead:
+            print(f"Recovered {requeued} job(s) with expired leases, {dead} moved to DLQ")
+        return requeued, dead
+    
     def stop_workers(self):
        
         pids = self.loadpid()
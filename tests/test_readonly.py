@@ -0,0 +1,77 @@
+# Read-only CLI paths must not wait on a worker's write lock
+#
+#   python -m pytest tests
+
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from click.testing import CliRunner
+
+from queuectl.cli import cli
+from queuectl.models import Job
+from queuectl.storage import JobStorage
+
+
+class ReadOnlyTest(unittest.TestCase):
+
+    def setUp(self):
+
+        # status writes the pid file and Config reads its file in the cwd
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+        self.db = os.path.join(self.tmp.name, 'queuectl.db')
+        storage = JobStorage(self.db)
+        storage.insert_jobs([Job(jid=f"job-{i}", command='true') for i in range(3)])
+        storage.close()
+
+        # a worker in the middle of a claim
+        self.writer = sqlite3.connect(self.db, isolation_level=None)
+        self.writer.execute("BEGIN IMMEDIATE")
+
+    def tearDown(self):
+
+        self.writer.execute("ROLLBACK")
+        self.writer.close()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def invoke(self, *args):
+
+        started = time.perf_counter()
+        result = CliRunner().invoke(cli, [*args, '--db', self.db])
+        self.assertEqual(result.exit_code, 0, result.output)
+        # well under any profile's busy_timeout
+        self.assertLess(time.perf_counter() - started, 2)
+        return result.output
+
+    def test_status(self):
+
+        output = self.invoke('status')
+        self.assertRegex(output, r'PENDING\s*\|\s*3')
+
+    def test_metrics(self):
+
+        output = self.invoke('metrics')
+        self.assertIn('queuectl_jobs{state="pending"} 3', output)
+
+    def test_list_and_info(self):
+
+        self.assertIn('job-1', self.invoke('list'))
+        self.assertIn('job-1', self.invoke('info', 'job-1'))
+
+    def test_readonly_falls_back_without_a_database(self):
+
+        path = os.path.join(self.tmp.name, 'new.db')
+        storage = JobStorage(path, readonly=True)
+        self.assertFalse(storage.readonly)
+        self.assertEqual(storage.get_job_counts()['pending'], 0)
+        storage.close()
+
+
+if __name__ == '__main__':
+    unittest.main()